@@ -0,0 +1,124 @@
+"""
+Process-wide client-side rate limiting for OpenRouter calls.
+
+All routers of one backend process share one token bucket per (model, API key).
+All ":free" models of a key share a single bucket, matching OpenRouter's free-tier limit.
+Waiting callers are served by priority class: interactive before routing before batch.
+
+Buckets and priorities are per process. The day 4 evaluator run as a script gets its own scheduler,
+so it stays under the rate cap on its own but is not ordered against the backend's requests.
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+
+INTERACTIVE, ROUTING, BATCH = 0, 1, 2
+PRIORITIES = {"interactive": INTERACTIVE, "routing": ROUTING, "batch": BATCH}
+
+# Requests per minute per bucket (0 = unlimited), e.g. OPENROUTER_RATE_LIMITS="openai/gpt-4o-mini=120,:free=20"
+OPENROUTER_RPM = float(os.getenv("OPENROUTER_RPM", 20))
+OPENROUTER_RATE_BURST = int(os.getenv("OPENROUTER_RATE_BURST", 5))
+OPENROUTER_RATE_LIMITS = os.getenv("OPENROUTER_RATE_LIMITS", "")
+OPENROUTER_RATE_MAX_WAIT_S = float(os.getenv("OPENROUTER_RATE_MAX_WAIT_S", 120))
+
+
+class RateLimitTimeout(RuntimeError):
+    """No slot became available within max_wait seconds."""
+
+
+def _parse_limits(spec: str) -> dict[str, float]:
+    limits = {}
+    for item in spec.split(","):
+        name, sep, value = item.strip().rpartition("=")
+        try:
+            if sep and name.strip():
+                limits[name.strip()] = float(value)
+        except ValueError:
+            pass
+    return limits
+
+
+class _Bucket:
+    def __init__(self, rpm: float, burst: int):
+        self.rate = rpm / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateScheduler:
+    def __init__(
+        self,
+        rpm: float = OPENROUTER_RPM,
+        burst: int = OPENROUTER_RATE_BURST,
+        limits: dict[str, float] | None = None,
+        max_wait: float = OPENROUTER_RATE_MAX_WAIT_S,
+    ):
+        self.rpm = rpm
+        self.burst = burst
+        self.limits = _parse_limits(OPENROUTER_RATE_LIMITS) if limits is None else limits
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._buckets: dict[tuple[str, str], _Bucket] = {}
+        self._queues: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        self._seq = itertools.count()
+
+    def _key(self, model: str, api_key) -> tuple[str, str]:
+        name = model if model in self.limits or not model.endswith(":free") else ":free"
+        # Only a fingerprint of the API key is kept in memory
+        return name, hashlib.sha256(str(api_key or "").encode()).hexdigest()[:12]
+
+    def acquire(self, model: str, api_key=None, priority: int | str = INTERACTIVE) -> float:
+        """Block until a request slot is free; returns the time spent waiting in seconds."""
+        priority = PRIORITIES.get(priority, INTERACTIVE) if isinstance(priority, str) else priority
+        key = self._key(model, api_key)
+        rpm = self.limits.get(key[0], self.rpm)
+        if rpm <= 0:
+            return 0.0
+        with self._cond:
+            bucket = self._buckets.setdefault(key, _Bucket(rpm, self.burst))
+            queue = self._queues.setdefault(key, [])
+            ticket = (priority, next(self._seq))
+            heapq.heappush(queue, ticket)
+            start = time.monotonic()
+            try:
+                while True:
+                    delay = bucket.wait_time() if queue[0] == ticket else None
+                    if delay == 0.0:
+                        heapq.heappop(queue)
+                        bucket.tokens -= 1
+                        self._cond.notify_all()
+                        return time.monotonic() - start
+                    remaining = start + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"No OpenRouter slot for {model} after {self.max_wait:.0f}s")
+                    self._cond.wait(remaining if delay is None else min(delay, remaining))
+            except BaseException:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                    self._cond.notify_all()
+                raise
+
+
+_scheduler = RateScheduler()
+
+
+def get_rate_scheduler() -> RateScheduler:
+    return _scheduler
+
+
+def chat_completion(client, priority: int | str = INTERACTIVE, **kwargs):
+    """Drop-in for client.chat.completions.create(**kwargs) that waits for a rate-limit slot first."""
+    _scheduler.acquire(kwargs.get("model", ""), getattr(client, "api_key", None), priority)
+    return client.chat.completions.create(**kwargs)
@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from openai import OpenAI
 
 from ...models import ChatRequest, ChatResponse
+from ...rate_limit import chat_completion
 
 load_dotenv()
 
@@ -36,7 +37,8 @@ def film_critic(request: ChatRequest) -> ChatResponse:
     # Output format
     Write a short text between four and six sentences in the definded language. Any given answer should be in the language mentioned in the input. If no language is mentioned, answer in English."""
 
-    completion = client.chat.completions.create(
+    completion = chat_completion(
+        client,
         extra_body={},
         model="openai/gpt-oss-20b:free",
         messages=[
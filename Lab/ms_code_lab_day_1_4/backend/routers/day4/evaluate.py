@@ -19,9 +19,14 @@ load_dotenv(override=True)
 
 try:
     from .models import JudgeResponse, EvaluationResult, EvaluationData
+    from ...rate_limit import BATCH, chat_completion
 except ImportError:
     from models import JudgeResponse, EvaluationResult, EvaluationData
 
+    # Run as a script from this directory: make the lab root importable for the shared rate limiter
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+    from backend.rate_limit import BATCH, chat_completion
+
 
 def load_evaluation_data(file_path: str) -> EvaluationData:
     """Load and validate evaluation data from JSON file"""
@@ -187,7 +192,11 @@ def call_llm_judge(
                 print(f"Attempt {attempt + 1}: Using {'structured' if use_structured_output else 'basic'} output mode")
                 print(f"Response format: {response_format}")
 
-            response = client.chat.completions.create(
+            # Batch priority only orders calls within this process: run as a script, the evaluator has its own
+            # scheduler, so it respects the per-key rate cap but does not yield to the backend's interactive requests
+            response = chat_completion(
+                client,
+                BATCH,
                 model="openrouter/sonoma-dusk-alpha",
                 messages=[
                     {
@@ -0,0 +1,67 @@
+# scripts/benchmark_embedder.py
+"""Compare get_embedder().encode throughput and fp32 parity of the EMBEDDING_BACKEND options.
+
+    uv run scripts/benchmark_embedder.py                              # all backends, chunks from data/pdfs
+    uv run scripts/benchmark_embedder.py --backends local onnx-int8 --synthetic 2000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.tools.ingest import EMBEDDING_BACKENDS, chunk_text, load_embedder, pdf_to_text
+
+PDF_DIR = Path("data/pdfs")
+
+
+def load_texts(pdf_dir: Path, limit: int) -> list:
+    texts = []
+    for pdf in sorted(pdf_dir.glob("**/*.pdf")):
+        texts.extend(chunk_text(pdf_to_text(pdf)))
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def synthetic_texts(n: int) -> list:
+    base = "Die Prüfung im Modul {i} besteht aus einer Klausur von 90 Minuten. Wiederholung ist zweimal möglich. "
+    return [(base.format(i=i) * 8)[:1000] for i in range(n)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    arg_parser.add_argument("--pdf-dir", type=Path, default=PDF_DIR)
+    arg_parser.add_argument("--synthetic", type=int, default=0, help="encode N generated chunks instead of --pdf-dir")
+    arg_parser.add_argument("--limit", type=int, default=1000, help="max chunks taken from --pdf-dir")
+    arg_parser.add_argument("--batch-size", type=int, default=32)
+    args = arg_parser.parse_args()
+
+    texts = synthetic_texts(args.synthetic) if args.synthetic else load_texts(args.pdf_dir, args.limit)
+    if not texts:
+        sys.exit(f"No PDFs in {args.pdf_dir}; use --synthetic N")
+    print(f"{len(texts)} chunks, batch size {args.batch_size}\n")
+
+    reference = None
+    for backend in args.backends:
+        start = time.perf_counter()
+        model = load_embedder(backend)
+        load_s = time.perf_counter() - start
+        model.encode(texts[: args.batch_size], batch_size=args.batch_size)  # warm-up
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=args.batch_size, normalize_embeddings=True)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = vectors
+        parity = float((vectors * reference).sum(axis=1).min())
+        print(f"{backend:<12} load {load_s:6.2f}s  encode {elapsed:8.3f}s  {len(texts) / elapsed:8.1f} chunks/s  min cos vs {args.backends[0]}: {parity:.4f}")
+
+
+if __name__ == "__main__":
+    main()
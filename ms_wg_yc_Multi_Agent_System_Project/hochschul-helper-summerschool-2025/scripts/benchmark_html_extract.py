@@ -0,0 +1,90 @@
+# scripts/benchmark_html_extract.py
+"""Compare HTML-to-text throughput of the timetable ingest extractors.
+
+    uv run scripts/benchmark_html_extract.py                 # pages in data/timetables_html
+    uv run scripts/benchmark_html_extract.py --synthetic 200 # generated JSF-like pages
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.tools.html_extract import EXTRACTORS, available_extractors, extract_files
+
+HTML_DIR = Path("./data/timetables_html")
+
+
+def legacy_bs4(html: str) -> str:
+    """The previous ingest path: full page through BeautifulSoup's html.parser."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for t in soup(["script", "style", "noscript"]):
+        t.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def synthetic_page(i: int) -> str:
+    boilerplate = "".join(f'<div class="ui-menuitem"><a href="#m{j}">Menü {j}</a></div>' for j in range(400))
+    rows = "".join(
+        f"<tr><td>{8 + r}:00 - {9 + r}:30</td><td>Vorlesung {i}-{r}<br>E-{200 + r}<br>Prof. Dr. Muster</td><td></td></tr>" for r in range(8)
+    )
+    return (
+        "<html><head><script>" + "var x=1;" * 2000 + "</script><style>.a{color:red}</style></head><body>"
+        f'<form id="form1"><input name="javax.faces.ViewState" value="{i}">{boilerplate}'
+        f'<div id="form1:timetable"><table><tr><th>Zeit</th><th>Mo</th><th>Di</th></tr>{rows}</table></div>'
+        f"{boilerplate}</form></body></html>"
+    )
+
+
+def _time(label: str, fn, total_bytes: int, n_pages: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {n_pages / elapsed:9.1f} pages/s  {total_bytes / elapsed / 1e6:7.2f} MB/s")
+    return elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--html-dir", type=Path, default=HTML_DIR)
+    arg_parser.add_argument("--synthetic", type=int, default=0, help="benchmark N generated pages instead of --html-dir")
+    arg_parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    args = arg_parser.parse_args()
+
+    tmp = None
+    html_dir = args.html_dir
+    if args.synthetic:
+        tmp = tempfile.TemporaryDirectory()
+        html_dir = Path(tmp.name)
+        for i in range(args.synthetic):
+            (html_dir / f"page_{i}.html").write_text(synthetic_page(i), encoding="utf-8")
+
+    paths = sorted(html_dir.glob("*.html"))
+    if not paths:
+        sys.exit(f"No HTML files in {html_dir}; crawl first or use --synthetic N")
+    pages = [p.read_text(encoding="utf-8", errors="ignore") for p in paths]
+    total_bytes = sum(len(p.encode("utf-8")) for p in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.1f} MB\n")
+
+    available = available_extractors()
+    if "bs4" in available:
+        _time("bs4 full page (previous)", lambda: [legacy_bs4(h) for h in pages], total_bytes, len(pages))
+    for name in available:
+        _time(f"{name} (serial)", lambda fn=EXTRACTORS[name]: [fn(h) for h in pages], total_bytes, len(pages))
+    best = available[0]
+    _time(f"{best} (process pool)", lambda: extract_files(paths, best, workers=args.workers), total_bytes, len(pages))
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
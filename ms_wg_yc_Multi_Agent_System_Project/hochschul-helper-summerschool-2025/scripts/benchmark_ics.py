@@ -0,0 +1,90 @@
+# scripts/benchmark_ics.py
+"""Benchmark the streaming ICS bundle writer against one make_ics() call per event (and icalendar, if installed).
+
+    uv run scripts/benchmark_ics.py               # 10k synthetic events
+    uv run scripts/benchmark_ics.py --events 50000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to Python path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.tools.ics_calendar_tool import make_ics, write_ics
+
+
+def synthetic_events(n: int):
+    base = datetime(2025, 10, 6, 8, 0)
+    for i in range(n):
+        start = base + timedelta(days=i // 8, hours=(i % 8) * 1.5)
+        yield {
+            "summary": f"Vorlesung Höhere Mathematik {i}",
+            "start": start,
+            "end": start + timedelta(minutes=90),
+            "location": f"E-{200 + i % 50}",
+            "description": "Prof. Dr. Müller; Übungsblatt, Skript und Klausurvorbereitung – " * 2,
+        }
+
+
+def _measure(label: str, fn, n: int) -> None:
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()  # zweiter Lauf nur für den Spitzenverbrauch (tracemalloc verfälscht die Zeit)
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {elapsed:7.3f}s  {n / elapsed:9.0f} events/s  peak {peak / 1e6:6.1f} MB  {size / 1e6:6.1f} MB out")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--events", type=int, default=10_000)
+    args = arg_parser.parse_args()
+    n = args.events
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bundle.ics"
+        _measure("write_ics (stream to file)", lambda: (write_ics(synthetic_events(n), path), path.stat().st_size)[1], n)
+        _measure("write_ics (StringIO)", lambda: len(_to_string(n)), n)
+    _measure("make_ics per event (previous)", lambda: sum(len(make_ics(**e)) for e in synthetic_events(n)), n)
+
+    try:
+        from icalendar import Calendar, Event
+    except ImportError:
+        print("icalendar not installed – skipping comparison")
+        return
+
+    def _icalendar():
+        cal = Calendar()
+        cal.add("prodid", "-//HKA Helper//DE")
+        cal.add("version", "2.0")
+        for e in synthetic_events(n):
+            ev = Event()
+            for key in ("summary", "location", "description"):
+                ev.add(key, e[key])
+            ev.add("dtstart", e["start"])
+            ev.add("dtend", e["end"])
+            cal.add_component(ev)
+        return len(cal.to_ical())
+
+    _measure("icalendar (in memory)", _icalendar, n)
+
+
+def _to_string(n: int) -> str:
+    buf = io.StringIO()
+    write_ics(synthetic_events(n), buf)
+    return buf.getvalue()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,32 @@
+import argparse
 import os
 import re
+import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add project root to Python path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-from bs4 import BeautifulSoup
 from langchain.schema import Document
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from src.tools.html_extract import EXTRACTORS, extract_files, resolve_extractor
+from src.tools.timetable_changes import clear_changes, read_changes
+from src.tools.timetable_index import TIMETABLE_CHROMA_DIR, TIMETABLE_COLLECTION, TIMETABLE_DB_PATH, parse_timetable_html, write_entries
+from src.utils.text import timetable_chunk_id
+
 # === Config ===
 HTML_DIR = Path("./data/timetables_html")
-CHROMA_PERSIST_DIR = "./vectordb"
-CHROMA_COLLECTION_NAME = "timetables"
+CHROMA_PERSIST_DIR = TIMETABLE_CHROMA_DIR
+CHROMA_COLLECTION_NAME = TIMETABLE_COLLECTION
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))  # must stay < 5461 (Chroma max batch)
 # regex for filename metadata extraction
 # Example filename patterns:
 #   "Architecture_and_Civil_Engineering-Architektur_(B)-ARTB.1.html"
@@ -46,19 +58,17 @@ def parse_filename_meta(fname: str) -> Dict[str,str]:
 
 
 def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    # remove script/style
-    for t in soup(["script", "style", "noscript"]):
-        t.decompose()
-    return soup.get_text(separator="\n", strip=True)
+    # timetable container only, via the fastest installed backend (HTML_EXTRACTOR overrides)
+    return EXTRACTORS[resolve_extractor()](html)
 
 
-def load_files_and_prepare_documents(html_dir: Path) -> List[Document]:
+def load_files_and_prepare_documents(html_dir: Path, files: Optional[Iterable[Path]] = None) -> List[Document]:
     docs: List[Document] = []
     splitter = CharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
-    for p in sorted(html_dir.glob("*.html")):
-        raw = p.read_text(encoding="utf-8", errors="ignore")
-        text = html_to_text(raw)
+    paths = sorted(files if files is not None else html_dir.glob("*.html"))
+    texts = extract_files(paths)  # process pool over all pages
+    for p in paths:
+        text = texts[p]
         meta = parse_filename_meta(p.name)
         # Build a header with metadata for context
         header = f"Filename: {p.name}\nFaculty: {meta.get('faculty')}\nMajor: {meta.get('major')}\nSemester: {meta.get('semester')}\n\n"
@@ -80,21 +90,95 @@ def load_files_and_prepare_documents(html_dir: Path) -> List[Document]:
     return docs
 
 
-def main():
+def build_structured_index(html_dir: Path, files: Optional[Iterable[Path]] = None, removed: Iterable[str] = ()) -> int:
+    """Parse timetable tables into the SQLite index used for direct schedule lookups."""
+    removed = list(removed)
+    if removed:
+        write_entries([], TIMETABLE_DB_PATH, source_files=removed)
+    total = 0
+    for p in sorted(files if files is not None else html_dir.glob("*.html")):
+        raw = p.read_text(encoding="utf-8", errors="ignore")
+        meta = {"source_file": p.name, **parse_filename_meta(p.name)}
+        entries = parse_timetable_html(raw, meta)
+        # replace per file, so files without parsable entries still clear their old rows
+        total += write_entries(entries, TIMETABLE_DB_PATH, source_files=[p.name])
+    return total
+
+
+def chunk_id(doc: Document) -> str:
+    """Deterministic id: same file, position and content -> same id, so re-ingests are idempotent."""
+    return timetable_chunk_id(doc.metadata["source_file"], doc.metadata["chunk_index"], doc.page_content)
+
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def upsert_documents(db: Chroma, documents: List[Document], batch_size: int = EMBED_BATCH_SIZE) -> int:
+    """Embed and upsert only chunks whose id is not stored yet, batch_size chunks per embedding call."""
+    ids = [chunk_id(d) for d in documents]
+    existing = set()
+    for batch in _batches(ids, batch_size):
+        existing.update(db.get(ids=batch, include=[]).get("ids", []))
+    new = [(i, d) for i, d in zip(ids, documents) if i not in existing]
+    for n, batch in enumerate(_batches(new, batch_size), 1):
+        # Chroma.add_documents with explicit ids upserts
+        db.add_documents([d for _, d in batch], ids=[i for i, _ in batch])
+        print(f"  embedded batch {n}: {len(batch)} chunks")
+    return len(new)
+
+
+def prune_stale(db: Chroma, documents: List[Document], removed_sources: Iterable[str] = ()) -> int:
+    """Delete chunks of re-ingested files that are no longer produced, plus all chunks of removed files."""
+    keep: Dict[str, set] = {}
+    for d in documents:
+        keep.setdefault(d.metadata["source_file"], set()).add(chunk_id(d))
+    stale: List[str] = []
+    for source in list(keep) + list(removed_sources):
+        stored = db.get(where={"source_file": source}, include=[]).get("ids", [])
+        stale.extend(i for i in stored if i not in keep.get(source, set()))
+    for batch in _batches(stale, EMBED_BATCH_SIZE):
+        db.delete(ids=batch)
+    return len(stale)
+
+
+def main(full: bool = False, batch_size: int = EMBED_BATCH_SIZE):
     # initialize embeddings and Chroma
     embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    print("Loading documents...")
-    documents = load_files_and_prepare_documents(HTML_DIR)
-    print(f"Prepared {len(documents)} chunks from HTML files.")
+    db = Chroma(persist_directory=CHROMA_PERSIST_DIR, collection_name=CHROMA_COLLECTION_NAME, embedding_function=embeddings)
 
-    print("Creating/connecting to Chroma collection...")
-    db = Chroma.from_documents(documents,
-                               embedding=embeddings,
-                               persist_directory=CHROMA_PERSIST_DIR,
-                               collection_name=CHROMA_COLLECTION_NAME)
+    # change list written by time_table_crawler.py; without one (or with --full) everything is ingested
+    changes = None if full else read_changes(HTML_DIR)
+    if changes is None:
+        files = sorted(HTML_DIR.glob("*.html"))
+        present = {p.name for p in files}
+        stored_sources = {m.get("source_file") for m in db.get(include=["metadatas"]).get("metadatas", []) if m}
+        removed = sorted(s for s in stored_sources if s and s not in present)
+        print(f"Full ingest: {len(files)} timetables, {len(removed)} no longer present")
+    else:
+        files = [HTML_DIR / name for name in changes.get("changed", []) if (HTML_DIR / name).exists()]
+        removed = changes.get("removed", [])
+        print(f"Incremental ingest: {len(files)} changed, {len(removed)} removed timetables")
+
+    documents = load_files_and_prepare_documents(HTML_DIR, files)
+    print(f"Prepared {len(documents)} chunks from HTML files.")
+    n_new = upsert_documents(db, documents, batch_size)
+    n_pruned = prune_stale(db, documents, removed)
     db.persist()
-    print("Ingestion complete. Chroma persisted to:", CHROMA_PERSIST_DIR)
+    print(f"Ingestion complete: {n_new} chunks embedded, {len(documents) - n_new} unchanged, {n_pruned} stale removed.")
+    print("Chroma persisted to:", CHROMA_PERSIST_DIR)
+
+    print("Building structured timetable index...")
+    n_entries = build_structured_index(HTML_DIR, files, removed)
+    print(f"Indexed {n_entries} lectures into {TIMETABLE_DB_PATH}")
+
+    clear_changes(HTML_DIR)
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Ingest crawled timetables into Chroma and the structured index")
+    arg_parser.add_argument("--full", action="store_true", help="ignore the crawler's change list and re-ingest every file")
+    arg_parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="chunks per embedding/upsert call")
+    args = arg_parser.parse_args()
+    main(full=args.full, batch_size=args.batch_size)
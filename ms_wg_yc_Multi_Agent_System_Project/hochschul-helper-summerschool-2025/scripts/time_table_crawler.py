@@ -1,108 +1,231 @@
+import argparse
 import asyncio
 import os
+import sys
+from typing import List, Optional, Tuple
 
-from playwright.async_api import async_playwright
-
-
-async def scrape_all_departments():
+from playwright.async_api import Browser, Page, async_playwright
+
+# Add project root to Python path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.tools.timetable_changes import load_manifest, merge_changes, record_page, save_manifest
+
+TIMETABLE_URL = os.getenv("TIMETABLE_URL", "https://raumzeit.hka-iwi.de/timetables")
+OUTPUT_DIR = "data/timetables_html"
+CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", 4))
+TIMEOUT_MS = 30_000
+OPEN_RETRIES = int(os.getenv("CRAWLER_OPEN_RETRIES", 3))
+OPEN_BACKOFF_S = 2.0
+
+DATE_EN = "11/12/2025"  # MM/DD/YYYY
+DATE_DE = "12.11.2025"  # DD.MM.YYYY
+
+DATE_INPUT = "#form1\\:select_date_input"
+DROPDOWNS = {
+    "department": ("#form1\\:department_label", "#form1\\:department_panel li"),
+    "cost": ("#form1\\:cost_label", "#form1\\:cost_panel li"),
+    "course_semester": ("#form1\\:course_semester_label", "#form1\\:course_semester_panel li"),
+}
+SKIP_DEPARTMENTS = {"Fakultäten", "Faculties"}
+STOP_DEPARTMENTS = {"Einrichtungen", "Departments"}
+
+# (department_idx, department, cost_idx, cost, semester_idx, semester)
+Combination = Tuple[int, str, int, str, int, str]
+
+
+def timetable_filename(department: str, cost: str, course_semester: str) -> str:
+    return f"{department}-{cost}-{course_semester}.html".replace(" ", "_").replace("/", "_")
+
+
+# ----------------- Page helpers -----------------
+async def _wait_ajax_idle(page: Page) -> None:
+    """Wait until PrimeFaces has no AJAX request queued/in flight (instead of fixed sleeps)."""
+    await page.wait_for_function("() => !window.PrimeFaces || !PrimeFaces.ajax || PrimeFaces.ajax.Queue.isEmpty()", timeout=TIMEOUT_MS)
+    await page.wait_for_load_state("networkidle", timeout=TIMEOUT_MS)
+
+
+async def _open_timetables(page: Page, url: str) -> None:
+    await page.goto(url, wait_until="networkidle", timeout=TIMEOUT_MS)
+    await page.wait_for_selector(DATE_INPUT, timeout=TIMEOUT_MS)
+
+    title_value = await page.get_attribute(DATE_INPUT, "title")
+    date = DATE_EN if title_value and "Date selection" in title_value else DATE_DE  # else assume German
+
+    # Replace the value directly and trigger the "change" event so JS reacts to it
+    await page.fill(DATE_INPUT, date)
+    await page.eval_on_selector(DATE_INPUT, "el => el.dispatchEvent(new Event('change', { bubbles: true }))")
+    await _wait_ajax_idle(page)
+
+
+async def _open_with_retry(page: Page, url: str, worker_id: int, retries: Optional[int] = None, backoff_s: Optional[float] = None) -> bool:
+    """Open the timetable page with exponential backoff; False (and logged) if every attempt fails."""
+    retries = OPEN_RETRIES if retries is None else retries
+    backoff_s = OPEN_BACKOFF_S if backoff_s is None else backoff_s
+    for attempt in range(retries + 1):
+        try:
+            await _open_timetables(page, url)
+            return True
+        except Exception as e:
+            print(f"[worker {worker_id}] could not open {url} (attempt {attempt + 1}/{retries + 1}): {e}")
+            if attempt < retries:
+                await asyncio.sleep(backoff_s * 2**attempt)
+    return False
+
+
+async def _option_texts(page: Page, dropdown: str) -> List[str]:
+    label, options = DROPDOWNS[dropdown]
+    await page.click(label)
+    await page.wait_for_selector(options, state="visible", timeout=TIMEOUT_MS)
+    texts = [t.strip() for t in await page.locator(options).all_inner_texts()]
+    await page.keyboard.press("Escape")  # close the panel without changing the selection
+    return texts
+
+
+async def _select_option(page: Page, dropdown: str, index: int) -> None:
+    label, options = DROPDOWNS[dropdown]
+    await page.click(label)
+    await page.wait_for_selector(options, state="visible", timeout=TIMEOUT_MS)
+    await page.locator(options).nth(index).click()
+    await _wait_ajax_idle(page)
+
+
+async def _is_enabled(page: Page, dropdown: str) -> bool:
+    label = await page.query_selector(DROPDOWNS[dropdown][0])
+    if not label:
+        return False
+    is_disabled = await label.get_attribute("aria-disabled")
+    return not is_disabled or is_disabled == "false"
+
+
+# ----------------- Crawl phases -----------------
+async def enumerate_combinations(page: Page) -> List[Combination]:
+    """Walk the dropdowns once (without saving pages) to collect all department/cost/semester combinations."""
+    combos: List[Combination] = []
+    for i, text in enumerate(await _option_texts(page, "department")):
+        if text in SKIP_DEPARTMENTS:
+            continue
+        if text in STOP_DEPARTMENTS:
+            break
+        await _select_option(page, "department", i)
+        for j, cost_text in enumerate(await _option_texts(page, "cost")):
+            await _select_option(page, "cost", j)
+            if not await _is_enabled(page, "course_semester"):
+                print(f"  {text} / {cost_text}: course semester dropdown disabled or missing, skipping.")
+                continue
+            for k, semester_text in enumerate(await _option_texts(page, "course_semester")):
+                combos.append((i, text, j, cost_text, k, semester_text))
+    return combos
+
+
+async def _crawl_worker(
+    worker_id: int,
+    browser: Browser,
+    url: str,
+    queue: "asyncio.Queue[Combination]",
+    out_dir: str,
+    results: list,
+    manifest: dict,
+    changed: list,
+    failed: list,
+) -> None:
+    """
+    One isolated browser context; keeps department/cost selected while consecutive jobs share them.
+    If the page cannot be (re)opened even after retries, the worker stops and leaves the remaining jobs to the others.
+    """
+    context = await browser.new_context()
+    page = await context.new_page()
+    if not await _open_with_retry(page, url, worker_id):
+        await context.close()
+        return
+    selected: Tuple[Optional[int], Optional[int]] = (None, None)
+    while True:
+        try:
+            combo = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        dept_idx, dept, cost_idx, cost, sem_idx, sem = combo
+        healthy = True
+        try:
+            if selected[0] != dept_idx:
+                await _select_option(page, "department", dept_idx)
+                selected = (dept_idx, None)
+            if selected[1] != cost_idx:
+                await _select_option(page, "cost", cost_idx)
+                selected = (dept_idx, cost_idx)
+            await _select_option(page, "course_semester", sem_idx)
+            html = await page.content()
+            filename = timetable_filename(dept, cost, sem)
+            if record_page(manifest, out_dir, filename, html, department=dept, cost=cost, semester=sem):
+                changed.append(filename)
+                print(f"[worker {worker_id}] saved {dept} / {cost} / {sem}")
+            else:
+                print(f"[worker {worker_id}] unchanged {dept} / {cost} / {sem}")
+            results.append((dept, cost, sem))
+        except Exception as e:
+            print(f"[worker {worker_id}] failed {dept} / {cost} / {sem} ({url}): {e}")
+            failed.append((dept, cost, sem))
+            selected = (None, None)
+            healthy = await _open_with_retry(page, url, worker_id)  # start from a clean page state
+        finally:
+            queue.task_done()
+        if not healthy:
+            break
+    await context.close()
+
+
+async def scrape_all_departments(url: str = TIMETABLE_URL, out_dir: str = OUTPUT_DIR, concurrency: int = CONCURRENCY, headless: bool = True):
+    os.makedirs(out_dir, exist_ok=True)
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        await page.goto("https://raumzeit.hka-iwi.de/timetables")
-
-        title_value = await page.get_attribute("#form1\\:select_date_input", "title")
-        if title_value and "Date selection" in title_value:
-            date = "11/12/2025"  # MM/DD/YYYY
-        else:  # Assume German
-            date = "12.11.2025"  # DD.MM.YYYY
-
-        # Replace the value directly
-        await page.fill("#form1\\:select_date_input", date)
-
-        # Trigger the "change" event so JS reacts to it
-        await page.eval_on_selector("#form1\\:select_date_input", "el => el.dispatchEvent(new Event('change', { bubbles: true }))")
-
-        # Click to open department dropdown
-        await page.click("#form1\\:department_label")
-
-        # Get all <li> options
-        department_options = await page.query_selector_all("#form1\\:department_panel li")
-
-        results = []
-        for i, opt in enumerate(department_options):
-
-            text = await opt.inner_text()
-            if text == "Fakultäten" or text == "Faculties":
-                continue  # skip this option
-            elif text == "Einrichtungen" or text == "Departments":
-                break  # stop processing options
-            print(f"Option {i}: {text}")
-
-            # Click the dropdown again each loop, because it closes after selection
-            await page.click("#form1\\:department_label")
-            department_options = await page.query_selector_all("#form1\\:department_panel li")
-
-            # Select the i-th option
-            await department_options[i].click()
-
-            # Wait for timetable (or next dropdown, depending on workflow)
-            await page.wait_for_timeout(1000)  # adjust if needed
-
-            # Click to open the cost dropdown (should be "#form1\\:cost_label")
-            await page.click("#form1\\:cost_label")
-            # Get all <li> options for cost (should be "#form1\\:cost_panel li")
-            cost_options = await page.query_selector_all("#form1\\:cost_panel li")
-            print(f"Found {len(cost_options)} cost options")
-            for j, cost_opt in enumerate(cost_options):
-                cost_text = await cost_opt.inner_text()
-                print(f"  Cost Option {j}: {cost_text}")
-
-                # Click the dropdown again each loop, because it closes after selection
-                await page.click("#form1\\:cost_label")
-                cost_options = await page.query_selector_all("#form1\\:cost_panel li")
-
-                # Select the j-th option
-                await cost_options[j].click()
-
-                # Wait for timetable (or next dropdown, depending on workflow)
-                await page.wait_for_timeout(1000)  # adjust if needed
-                html = await page.content()
-
-                # Check if the course semester dropdown exists and is enabled
-                course_semester_label = await page.query_selector("#form1\\:course_semester_label")
-                if course_semester_label:
-                    is_disabled = await course_semester_label.get_attribute("aria-disabled")
-                    if not is_disabled or is_disabled == "false":
-                        await page.click("#form1\\:course_semester_label")
-                        # Get all <li> options for course semester
-                        course_semester_options = await page.query_selector_all("#form1\\:course_semester_panel li")
-                        print(f"    Found {len(course_semester_options)} course semester options")
-                        for k, course_semester_opt in enumerate(course_semester_options):
-                            course_semester_text = await course_semester_opt.inner_text()
-                            print(f"      Course Semester Option {k}: {course_semester_text}")
-                            # Click the dropdown again each loop, because it closes after selection
-                            await page.click("#form1\\:course_semester_label")
-                            course_semester_options = await page.query_selector_all("#form1\\:course_semester_panel li")
-                            await course_semester_options[k].click()
-                            await page.wait_for_timeout(1000)  # adjust if needed
-                            html = await page.content()
-                            # Save the HTML content to a file
-                            folder_name = "data/timetables_html"
-                            os.makedirs(folder_name, exist_ok=True)
-                            filename = f"{text}-{cost_text}-{course_semester_text}.html".replace(" ", "_").replace("/", "_")
-                            save_name = os.path.join(folder_name, filename)
-                            with open(save_name, "w", encoding="utf-8") as f:
-                                f.write(html)
-                            results.append((text, cost_text, course_semester_text))
-                    else:
-                        print("    Course semester dropdown is disabled, skipping.")
-                else:
-                    print("    Course semester dropdown not found, skipping.")
+        browser = await p.chromium.launch(headless=headless)
+
+        context = await browser.new_context()
+        page = await context.new_page()
+        await _open_timetables(page, url)
+        combos = await enumerate_combinations(page)
+        await context.close()
+        print(f"Found {len(combos)} timetable combinations, crawling with {concurrency} contexts")
+
+        queue: "asyncio.Queue[Combination]" = asyncio.Queue()
+        for combo in combos:
+            queue.put_nowait(combo)
+        manifest = load_manifest(out_dir)
+        results: list = []
+        changed: list = []
+        failed: list = []
+        workers = [_crawl_worker(n, browser, url, queue, out_dir, results, manifest, changed, failed) for n in range(max(1, min(concurrency, len(combos))))]
+        await asyncio.gather(*workers)
+        # Jobs left behind when every worker lost its page
+        while not queue.empty():
+            _, dept, _, cost, _, sem = queue.get_nowait()
+            failed.append((dept, cost, sem))
 
         await browser.close()
-        return results
+
+    # Pages that no longer exist on the site; failed fetches are not treated as removed
+    current = {timetable_filename(c[1], c[3], c[5]) for c in combos}
+    removed = sorted(name for name in manifest if name not in current) if combos else []
+    for name in removed:
+        manifest.pop(name, None)
+        if os.path.exists(os.path.join(out_dir, name)):
+            os.remove(os.path.join(out_dir, name))
+    save_manifest(out_dir, manifest)
+    pending = merge_changes(out_dir, changed, removed)
+    for dept, cost, sem in failed:
+        print(f"not crawled: {dept} / {cost} / {sem} ({url})")
+    print(f"{len(changed)} changed, {len(removed)} removed, {len(results) - len(changed)} unchanged, {len(failed)} failed; pending for ingest: {len(pending['changed'])} changed, {len(pending['removed'])} removed")
+    return results
 
 
 if __name__ == "__main__":
-    data = asyncio.run(scrape_all_departments())
-    print("Scraped", len(data), "departments")
+    arg_parser = argparse.ArgumentParser(description="Crawl HKA timetables into HTML files")
+    arg_parser.add_argument("--url", default=TIMETABLE_URL)
+    arg_parser.add_argument("--out", default=OUTPUT_DIR)
+    arg_parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    arg_parser.add_argument("--headed", action="store_true", help="show the browser windows")
+    args = arg_parser.parse_args()
+
+    data = asyncio.run(scrape_all_departments(args.url, args.out, args.concurrency, headless=not args.headed))
+    print("Scraped", len(data), "timetables")
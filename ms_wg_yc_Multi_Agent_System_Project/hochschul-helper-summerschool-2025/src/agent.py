@@ -6,21 +6,21 @@ import os
 from datetime import datetime, timedelta
 from typing import Literal, Optional, TypedDict
 
-from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.graph import END, StateGraph
 from pydantic import BaseModel, Field
 
+from src.conversation import cached_answer, follow_up_context, get_checkpointer, is_follow_up, last_turn, record_turn, thread_config
 from src.models import LLM
-from src.tools import google_calendar_tool, rag, search
-from src.tools.rag_calender import answer as calendar_rag_answer
+
+# Schwere Abhängigkeiten (langgraph, chromadb, sentence-transformers, tavily, Google API) werden erst in den
+# Nodes bzw. beim ersten get_agent_graph() importiert, damit der Import von src.agent den Chainlit-Start nicht bremst.
 
 GUARD_MODEL = os.getenv("GUARD_MODEL", "deepseek/deepseek-chat-v3.1:free")
 SUPERVISOR_MODEL = os.getenv("SUPERVISOR_MODEL", "deepseek/deepseek-chat-v3.1:free")
 CALENDAR_AGENT_MODEL = os.getenv("CALENDAR_AGENT_MODEL", "deepseek/deepseek-chat-v3.1:free")
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", 0.6))
 
-_guard = LLM(GUARD_MODEL)
-_supervisor = LLM(SUPERVISOR_MODEL)
+_guard = LLM(GUARD_MODEL, priority="routing")
+_supervisor = LLM(SUPERVISOR_MODEL, priority="routing")
 _calendar_agent = LLM(CALENDAR_AGENT_MODEL)
 
 
@@ -46,6 +46,25 @@ class AgentState(TypedDict, total=False):
     calendar_events: Optional[list]
     hka_rag_results: Optional[dict]
     done: bool
+    # Gesprächsgedächtnis (per Checkpointer pro Session persistiert)
+    history: list[dict]
+    chunk_ids: list[str]
+    retrieval: Optional[dict]
+
+
+# Felder, die pro Turn neu berechnet werden; `history` bleibt über Turns erhalten
+_TURN_RESET: AgentState = {
+    "guard": None,
+    "plan": None,
+    "answer": None,
+    "confidence": None,
+    "citations": [],
+    "calendar_events": None,
+    "hka_rag_results": None,
+    "done": False,
+    "chunk_ids": [],
+    "retrieval": None,
+}
 
 
 # ---------- Prompts ----------
@@ -140,6 +159,8 @@ def supervisor_node(state: AgentState) -> AgentState:
         {"role": "system", "content": SUPERVISOR_PROMPT},
         {"role": "user", "content": state["user_msg"]},
     ]
+    if is_follow_up(state["user_msg"], state.get("history")):
+        messages.insert(1, {"role": "system", "content": follow_up_context(state.get("history"))})
     raw = _supervisor.chat(messages)
     try:
         plan = Plan.model_validate_json(raw) if raw.strip().startswith("{") else Plan(**json.loads(raw))
@@ -154,12 +175,29 @@ def route_tools(state: AgentState) -> str:
     return state["plan"].tool
 
 
+def _reusable(state: AgentState, tool: str):
+    """(gecachtes Ergebnis derselben Query, Chunk-IDs des letzten Turns bei Folgefragen) aus der Session-Historie."""
+    history = state.get("history")
+    cached = cached_answer(history, tool, state["plan"].query)
+    if cached is not None and cached.get("retrieval"):
+        return cached, None
+    prior = last_turn(history, tool) if is_follow_up(state["user_msg"], history) else None
+    return None, (prior or {}).get("chunk_ids") or None
+
+
 def rag_node(state: AgentState) -> AgentState:
     """RAG with web search fallback"""
     print(f"AGENT rag_node was called")
+    from src.tools import rag, search
+
     q = state["plan"].query
-    ans, conf, cites = rag.answer(q)
-    state["answer"], state["confidence"], state["citations"] = ans, float(conf), cites or []
+    cached, prior_chunks = _reusable(state, "rag")
+    if cached is not None:
+        print(f"AGENT rag_node reusing cached result")
+        state.update(cached["retrieval"], chunk_ids=cached.get("chunk_ids", []), retrieval=cached["retrieval"], done=True)
+        return state
+    ans, conf, cites, chunk_ids = rag.answer_with_chunks(q, prior_chunks)
+    state["answer"], state["confidence"], state["citations"], state["chunk_ids"] = ans, float(conf), cites or [], chunk_ids
 
     # If confidence is low, try web search as fallback
     if state.get("confidence", 0.0) < CONFIDENCE_THRESHOLD:
@@ -169,6 +207,7 @@ def rag_node(state: AgentState) -> AgentState:
             if "citations" in web_result:
                 state["citations"].extend(web_result["citations"])
 
+    state["retrieval"] = {"answer": state["answer"], "confidence": state["confidence"], "citations": state["citations"]}
     state["done"] = True
     print(f"AGENT rag_node finished")
     return state
@@ -177,7 +216,14 @@ def rag_node(state: AgentState) -> AgentState:
 def web_node(state: AgentState) -> AgentState:
     """Web search with RAG fallback"""
     print(f"AGENT web_node was called")
+    from src.tools import rag, search
+
     q = state["plan"].query
+    cached, _ = _reusable(state, "web")
+    if cached is not None:
+        print(f"AGENT web_node reusing cached result")
+        state.update(cached["retrieval"], retrieval=cached["retrieval"], done=True)
+        return state
     web_result = search.search_and_answer(q)
 
     if isinstance(web_result, dict):
@@ -196,6 +242,7 @@ def web_node(state: AgentState) -> AgentState:
             state["confidence"] = float(rag_conf)
             state["citations"] = rag_cites or []
 
+    state["retrieval"] = {"answer": state["answer"], "confidence": state["confidence"], "citations": state["citations"]}
     state["done"] = True
     print(f"AGENT web_node finished")
     return state
@@ -204,11 +251,22 @@ def web_node(state: AgentState) -> AgentState:
 def rag_calendar_node(state: AgentState) -> AgentState:
     """Step 1: HKA timetable RAG lookup only"""
     print(f"AGENT rag_calendar_node was called")
+    from src.tools.rag_calender import answer_with_chunks as calendar_rag_answer
+
     q = state["plan"].query
+    cached, prior_chunks = _reusable(state, "rag_calendar")
+    if cached is not None:
+        # Stundenplan-Treffer wiederverwenden; die Kalenderaktion selbst läuft trotzdem neu
+        print(f"AGENT rag_calendar_node reusing cached result")
+        state["hka_rag_results"] = state["retrieval"] = cached["retrieval"]
+        state["chunk_ids"] = cached.get("chunk_ids", [])
+        return state
 
     try:
         # Use the timetables-specific RAG instead of general RAG
-        timetable_ans, timetable_conf, timetable_cites = calendar_rag_answer(f"HKA Stundenplan Termine Veranstaltungen: {q}")
+        timetable_ans, timetable_conf, timetable_cites, state["chunk_ids"] = calendar_rag_answer(
+            f"HKA Stundenplan Termine Veranstaltungen: {q}", prior_chunks
+        )
 
         # Ensure proper types
         if not isinstance(timetable_conf, (int, float)):
@@ -223,6 +281,7 @@ def rag_calendar_node(state: AgentState) -> AgentState:
 
     # Store results for calendar agent
     state["hka_rag_results"] = {"answer": timetable_ans, "confidence": float(timetable_conf), "citations": timetable_cites or []}
+    state["retrieval"] = state["hka_rag_results"]
 
     print(f"AGENT rag_calendar_node finished")
     return state
@@ -235,7 +294,7 @@ def calendar_agent_node(state: AgentState) -> AgentState:
     from datetime import datetime, timedelta
 
     from src.tools.google_calendar_tool import (
-        create_event_tool,
+        create_events_tool,
         delete_event_tool,
         list_events_tool,
         postpone_event_tool,
@@ -307,7 +366,22 @@ Antworte ausschließlich mit valider JSON: {{"action": "list|create|postpone|del
         calendar_result = f"📅 Gefundene Termine: {len(events)} Einträge"
 
     elif action == "create":
-        # Create event(s) based on HKA context and user request
+        # Create event(s) based on HKA context and user request; weekly lectures become one recurring event
+        from src.utils.recurrence import build_rrule, lecture_period_end
+        from src.utils.time_parser import resolve_event_time
+
+        weekly_rrule = build_rrule(until=lecture_period_end())
+        # Nur Datum UND ausdrückliche Uhrzeit lokal auflösen ("morgen um 8", "Freitag 14–16 Uhr"); sonst rechnet das LLM
+        resolved = resolve_event_time(user_query)
+        time_hint = ""
+        if resolved is not None:
+            start, end = resolved
+            times = f"Start {start:%Y-%m-%dT%H:%M:%S}" + (f", Ende {end:%Y-%m-%dT%H:%M:%S}" if end is not None else "")
+            if hka_context.get("answer"):
+                # Stundenplan mit mehreren Terminen: Zeitangabe der Anfrage ist nur ein Anhaltspunkt
+                time_hint = f"Hinweis: in der Nutzeranfrage genannte Zeit ({times}); für die Termine aus dem HKA-Kontext gelten deren Zeiten"
+            else:
+                time_hint = f"Aufgelöste Zeitangabe der Nutzeranfrage (übernehmen, nicht neu berechnen): {times}"
         create_prompt = f"""
 Erstelle Kalendereinträge basierend auf:
 
@@ -315,12 +389,14 @@ HKA-Kontext: {hka_context.get('answer', '')}
 Nutzeranfrage: {user_query}
 
 Wichtig: Verwende realistische Zeiten. Aktuelles Datum: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+{time_hint}
 
-Extrahiere ALLE Termine aus dem HKA-Kontext und erstelle für jeden einen Eintrag.
+Extrahiere ALLE Termine aus dem HKA-Kontext. Wöchentliche Vorlesungen/Übungen NUR EINMAL ausgeben (nächster Termin)
+mit "recurrence": "{weekly_rrule}" – nicht jede Woche einzeln. Einmalige Termine ohne "recurrence".
 Antworte NUR mit JSON-Array, ohne zusätzlichen Text:
 [
-  {{"title": "Vorlesung 1", "start": "2025-01-20T09:00:00", "end": "2025-01-20T10:30:00", "location": "Raum A123", "description": "Beschreibung"}},
-  {{"title": "Vorlesung 2", "start": "2025-01-21T14:00:00", "end": "2025-01-21T15:30:00", "location": "Raum B456", "description": "Beschreibung"}}
+  {{"title": "Vorlesung 1", "start": "2025-01-20T09:00:00", "end": "2025-01-20T10:30:00", "location": "Raum A123", "description": "Beschreibung", "recurrence": "{weekly_rrule}"}},
+  {{"title": "Prüfung", "start": "2025-01-21T14:00:00", "end": "2025-01-21T15:30:00", "location": "Raum B456", "description": "Beschreibung"}}
 ]
 """
 
@@ -357,25 +433,22 @@ Antworte NUR mit JSON-Array, ohne zusätzlichen Text:
                 events_data = [events_data] if isinstance(events_data, dict) else []
 
             created_events = []
+            valid_events = []
             for event_data in events_data:
                 # Validate required fields
                 if not event_data.get("start") or not event_data.get("end"):
                     created_events.append(f"❌ Übersprungen: Fehlende Start-/Endzeit in {event_data.get('title', 'Unbekannt')}")
                     continue
+                valid_events.append(event_data)
 
-                try:
-                    result = create_event_tool.invoke(
-                        {
-                            "start_datetime": event_data.get("start"),
-                            "end_datetime": event_data.get("end"),
-                            "summary": event_data.get("title", "HKA Termin"),
-                            "location": event_data.get("location", ""),
-                            "description": event_data.get("description", ""),
-                        }
-                    )
-                    created_events.append(f"✅ Erstellt: {event_data.get('title', 'HKA Termin')} - {result}")
-                except Exception as e:
-                    created_events.append(f"❌ Fehler bei '{event_data.get('title', 'Unbekannt')}': {e}")
+            # Alle Termine in einem Batch-Request statt einem HTTP-Roundtrip pro Termin
+            if valid_events:
+                for event_data, status in zip(valid_events, create_events_tool.invoke({"events": valid_events})):
+                    title = event_data.get("title", "HKA Termin")
+                    if status.get("ok"):
+                        created_events.append(f"✅ Erstellt: {title} - Event created: {status.get('link')}")
+                    else:
+                        created_events.append(f"❌ Fehler bei '{title}': {status.get('error')}")
 
             if created_events:
                 calendar_result = f"Kalendererstellung abgeschlossen:\n" + "\n".join(created_events)
@@ -450,8 +523,27 @@ Antworte NUR mit JSON-Array, ohne zusätzlichen Text:
     return state
 
 
+def remember_node(state: AgentState) -> AgentState:
+    """Hängt Plan, Chunk-IDs und Antworten des Turns an die Session-Historie an."""
+    plan = state.get("plan")
+    if plan is not None:
+        turn = {
+            "user_msg": state["user_msg"],
+            "tool": plan.tool,
+            "query": plan.query,
+            "chunk_ids": state.get("chunk_ids") or [],
+            "retrieval": state.get("retrieval"),
+            "answer": state.get("answer"),
+        }
+        state["history"] = record_turn(state.get("history"), turn)
+    return state
+
+
 # ---------- Graph bauen ----------
-def build_agent():
+def build_agent(checkpointer=None):
+    """checkpointer: z.B. conversation.get_checkpointer() – State (inkl. Historie) pro thread_id persistieren."""
+    from langgraph.graph import END, StateGraph
+
     g = StateGraph(AgentState)
     g.add_node("guard", guard_node)
     g.add_node("deny", deny_node)
@@ -460,6 +552,7 @@ def build_agent():
     g.add_node("web", web_node)
     g.add_node("rag_calendar", rag_calendar_node)
     g.add_node("calendar_agent", calendar_agent_node)
+    g.add_node("remember", remember_node)
 
     g.set_entry_point("guard")
     g.add_conditional_edges(
@@ -478,20 +571,53 @@ def build_agent():
     g.add_edge("rag_calendar", "calendar_agent")
 
     g.add_edge("deny", END)
-    g.add_edge("rag", END)
-    g.add_edge("web", END)
-    g.add_edge("calendar_agent", END)
+    g.add_edge("rag", "remember")
+    g.add_edge("web", "remember")
+    g.add_edge("calendar_agent", "remember")
+    g.add_edge("remember", END)
+
+    return g.compile(checkpointer=checkpointer)
 
-    return g.compile()
 
+_agent_graph = None
+_session_graph = None
 
-AGENT_GRAPH = build_agent()
-print(AGENT_GRAPH.get_graph().draw_mermaid())
 
+def get_agent_graph():
+    """Kompiliert den Graphen beim ersten Aufruf (statt beim Import)."""
+    global _agent_graph
+    if _agent_graph is None:
+        _agent_graph = build_agent()
+    return _agent_graph
 
-def run_agent(user_msg: str) -> dict:
-    state: AgentState = {"user_msg": user_msg}
-    out = AGENT_GRAPH.invoke(state)
+
+def get_session_graph():
+    """Graph mit SQLite-Checkpointer für Gespräche mit Session-ID."""
+    global _session_graph
+    if _session_graph is None:
+        _session_graph = build_agent(checkpointer=get_checkpointer())
+    return _session_graph
+
+
+def __getattr__(name: str):
+    # Abwärtskompatibel: `from src.agent import AGENT_GRAPH` baut den Graphen erst bei Zugriff
+    if name == "AGENT_GRAPH":
+        return get_agent_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run_agent(user_msg: str, session_id: Optional[str] = None) -> dict:
+    """session_id (z.B. Chainlit-Session): Folgefragen sehen Plan, Chunks und Antworten der vorherigen Turns."""
+    return run_agent_turn(user_msg, session_id)[0]
+
+
+def run_agent_turn(user_msg: str, session_id: Optional[str] = None) -> tuple[dict, Optional[dict]]:
+    """Wie `run_agent`, zusätzlich der Historien-Eintrag dieses Turns (None z.B. nach Ablehnung durch den Guard)."""
+    config = thread_config(session_id)
+    if config is None:
+        out = get_agent_graph().invoke({"user_msg": user_msg})
+    else:
+        out = get_session_graph().invoke({**_TURN_RESET, "user_msg": user_msg}, config)
 
     # # Add debugging
     # print(f"RUN_AGENT DEBUG - Final state keys: {list(out.keys())}")
@@ -508,4 +634,16 @@ def run_agent(user_msg: str) -> dict:
         result["calendar_events"] = out["calendar_events"]
 
     print(f"RUN_AGENT DEBUG - Final result: {result}")
-    return result
+    turn = out["history"][-1] if out.get("plan") is not None and out.get("history") else None
+    return result, turn
+
+
+def record_session_turn(session_id: str, turn: dict) -> None:
+    """Einen anderswo berechneten Turn (zusammengelegte Anfrage) in die Historie dieser Session übernehmen."""
+    graph, config = get_session_graph(), thread_config(session_id)
+    history = (graph.get_state(config).values or {}).get("history")
+    graph.update_state(config, {"user_msg": turn.get("user_msg"), "history": record_turn(history, turn)}, as_node="remember")
+
+
+if __name__ == "__main__":
+    print(get_agent_graph().get_graph().draw_mermaid())
@@ -6,13 +6,32 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # ..
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+import asyncio
+
 import chainlit as cl
+from chainlit.server import app as chainlit_server
+from fastapi.responses import JSONResponse
 
 # Wichtig: Der Router exportiert jetzt nur noch `supervise`, der Guard steckt im Agent.
 from router import supervise
+from src.warmup import WARMUP_ON_START, is_ready, readiness, start_background_warm_up, wait_until_ready
 
 WELCOME_TEXT = "👋 Willkommen beim HKA Hochschul-Helper. Stelle deine Frage!"
 
+# Embedder, Chroma, OpenRouter-Verbindung usw. laden, während der Server schon hochfährt
+if WARMUP_ON_START:
+    start_background_warm_up()
+
+
+async def ready():
+    """Readiness-Probe für Load-Balancer/Kubernetes: 503, bis das Warm-up abgeschlossen ist."""
+    status = readiness() if WARMUP_ON_START else {"ready": True, "ok": True, "steps": {}}
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+chainlit_server.router.add_api_route("/ready", ready, methods=["GET"])
+chainlit_server.router.routes.insert(0, chainlit_server.router.routes.pop())  # vor Chainlits Catch-all-Route
+
 
 @cl.on_chat_start
 async def start():
@@ -26,9 +45,15 @@ async def main(message: cl.Message):
         await cl.Message(content="Bitte formuliere deine Frage zur HKA.").send()
         return
 
+    if WARMUP_ON_START and not is_ready():
+        # Nachrichten, die während des Warm-ups eintreffen, warten statt die Ladezeit selbst zu bezahlen
+        await asyncio.to_thread(wait_until_ready)
+
     try:
         with cl.Step(name="Agent (Plan & Tools)"):
-            result = supervise(user_msg)
+            # Session-ID als thread_id des Checkpointers: Folgefragen sehen die vorherigen Turns.
+            # Im Worker-Thread, damit gleichzeitige Nachrichten parallel laufen und identische zusammengelegt werden.
+            result = await asyncio.to_thread(supervise, user_msg, session_id=cl.context.session.id)
 
         # Debug-Ausgabe
         print(f"APP DEBUG - Received result: {result}")
@@ -0,0 +1,111 @@
+# src/conversation.py
+"""
+Gesprächsgedächtnis des Agent-Graphen: ein LangGraph-Checkpointer (SQLite) pro Chainlit-Session (thread_id)
+speichert Plan, abgerufene Chunk-IDs und Antworten der letzten Turns. Folgefragen ("und am Dienstag?")
+nutzen diese Treffer wieder, statt die komplette Suche erneut auszuführen.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+CHECKPOINT_DB_PATH = Path(os.getenv("CHECKPOINT_DB_PATH", "./data/checkpoints.sqlite"))
+# Anzahl gespeicherter Turns pro Session (ältere fallen aus dem State)
+CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", 10))
+
+# Anschlussfragen beziehen sich auf den vorherigen Turn ("und am Dienstag?", "what about room?", "wo ist das?")
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*(und|aber|auch|dann|what about|how about|and|also|was ist mit|wie sieht('?s| es) mit|wie ist es mit)\b"
+    r"|\b(dort|da|dafür|davon|diese[rsnm]?|dieselbe[nr]?|it|there|that one|same)\b",
+    re.IGNORECASE,
+)
+_FOLLOW_UP_MAX_WORDS = 6
+
+# Strukturausgaben im State, die der Checkpointer wieder deserialisieren darf
+_STATE_TYPES = [("src.agent", "GuardResult"), ("src.agent", "Plan")]
+
+_checkpointer = None
+_lock = threading.Lock()
+
+
+def _serde():
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=_STATE_TYPES)
+    except TypeError:  # ältere langgraph-Versionen ohne Allowlist
+        return None
+
+
+def get_checkpointer():
+    """SqliteSaver (langgraph-checkpoint-sqlite), sonst MemorySaver – Verlauf dann nur bis zum Neustart."""
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            try:
+                from langgraph.checkpoint.sqlite import SqliteSaver
+            except ImportError:
+                from langgraph.checkpoint.memory import MemorySaver
+
+                print("CONVERSATION langgraph-checkpoint-sqlite not installed, using in-memory checkpoints")
+                _checkpointer = MemorySaver(serde=_serde())
+            else:
+                CHECKPOINT_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(CHECKPOINT_DB_PATH), check_same_thread=False)
+                _checkpointer = SqliteSaver(conn, serde=_serde())
+        return _checkpointer
+
+
+def thread_config(session_id: Optional[str]) -> Optional[dict]:
+    return {"configurable": {"thread_id": session_id}} if session_id else None
+
+
+# ----------------- Turn-Historie -----------------
+def normalize_query(query: str) -> str:
+    return " ".join(re.findall(r"\w+", (query or "").lower()))
+
+
+def looks_like_follow_up(user_msg: str) -> bool:
+    """Kurze, anknüpfende Nachricht, die ohne vorherigen Turn nicht verständlich ist."""
+    return bool(_FOLLOW_UP_RE.search(user_msg or "")) and len((user_msg or "").split()) <= _FOLLOW_UP_MAX_WORDS
+
+
+def is_follow_up(user_msg: str, history: Optional[List[dict]]) -> bool:
+    """Anknüpfende Nachricht nach mindestens einem früheren Turn."""
+    return bool(history) and looks_like_follow_up(user_msg)
+
+
+def last_turn(history: Optional[List[dict]], tool: Optional[str] = None) -> Optional[dict]:
+    for turn in reversed(history or []):
+        if tool is None or turn.get("tool") == tool:
+            return turn
+    return None
+
+
+def cached_answer(history: Optional[List[dict]], tool: str, query: str) -> Optional[dict]:
+    """Gleiches Tool + gleiche (normalisierte) Query wie ein früherer Turn → dessen Ergebnis wiederverwenden."""
+    key = normalize_query(query)
+    for turn in reversed(history or []):
+        if turn.get("tool") == tool and normalize_query(turn.get("query", "")) == key and turn.get("answer"):
+            return turn
+    return None
+
+
+def record_turn(history: Optional[List[dict]], turn: dict, max_turns: int = CONVERSATION_MAX_TURNS) -> List[dict]:
+    return (list(history or []) + [turn])[-max_turns:]
+
+
+def follow_up_context(history: Optional[List[dict]]) -> str:
+    """Kontext des letzten Turns für den Supervisor, damit er die Folgefrage zu einer vollständigen Query ergänzt."""
+    turn = last_turn(history)
+    if not turn:
+        return ""
+    return (
+        f"Vorherige Nutzerfrage: {turn.get('user_msg', '')}\n"
+        f"Vorheriger Plan: tool={turn.get('tool')}, query={turn.get('query', '')}\n"
+        "Die aktuelle Nachricht ist eine Folgefrage dazu – formuliere eine vollständige, eigenständige Query."
+    )
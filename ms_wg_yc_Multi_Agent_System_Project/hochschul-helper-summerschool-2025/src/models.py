@@ -4,25 +4,90 @@ from __future__ import annotations
 import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from src.utils.llm_resilience import call_with_fallback, call_with_retries, parse_models, retry_after, status_code
+from src.utils.rate_limiter import INTERACTIVE, PRIORITIES, RateBudget, get_rate_scheduler
 
 load_dotenv()
 
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1")
 OPENAI_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
+# Free-Tier-Modelle schwanken stark in Latenz und 429-Rate: Timeout, Retries und Ausweichmodelle je Aufruf
+LLM_FALLBACK_MODELS = os.getenv("LLM_FALLBACK_MODELS", "")  # kommagetrennt, nach dem Hauptmodell probiert
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", 30))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", 0.5))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", 8))
+# > 0: nach so vielen Sekunden ohne Antwort parallel das nächste Modell anfragen (Hedged Request); 0 = aus
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", 0))
+
+
+_client = None
+
+
+def get_client():
+    """OpenAI-Client (OpenRouter) beim ersten Aufruf erzeugen; `openai` ist ein teurer Import."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
 
-client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+        # Wiederholungen übernimmt LLM.chat (mit Jitter und Modellwechsel), nicht das SDK
+        _client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0)
+    return _client
 
 
 class LLM:
-    def __init__(self, model: str):
-        self.model = model
-
-    def chat(self, messages: list[dict], temperature: float = 0.2):
-        resp = client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
+    """
+    model: ein Modell oder eine geordnete Liste ("a,b" bzw. ["a", "b"]); LLM_FALLBACK_MODELS wird angehängt.
+    Pro Modell: Timeout und Retries mit gejittertem Backoff bei 429/5xx; danach das nächste Modell.
+    priority ("interactive" | "routing" | "batch"): Reihenfolge im prozessweiten Rate-Limiter, pro chat() überschreibbar.
+    """
+
+    def __init__(
+        self,
+        model: str | list[str],
+        fallbacks: str | list[str] | None = None,
+        timeout: float = LLM_TIMEOUT_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        hedge_after: float = LLM_HEDGE_AFTER_S,
+        priority: int | str = INTERACTIVE,
+    ):
+        self.models = parse_models(model, LLM_FALLBACK_MODELS if fallbacks is None else fallbacks)
+        self.model = self.models[0]
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.priority = PRIORITIES.get(priority, INTERACTIVE) if isinstance(priority, str) else priority
+
+    def _complete(self, model: str, messages: list[dict], temperature: float, priority: int, budget: RateBudget) -> str:
+        scheduler = budget.scheduler
+
+        def _once():
+            budget.acquire(model, OPENAI_API_KEY, priority)  # jeder Versuch ist ein Request gegen das Limit
+            try:
+                resp = get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=self.timeout,
+                )
+            except Exception as e:
+                if status_code(e) == 429:
+                    hinted = retry_after(e)
+                    scheduler.throttle(model, OPENAI_API_KEY, hinted if hinted is not None else LLM_BACKOFF_MAX_S)
+                raise
+            return resp.choices[0].message.content or ""
+
+        return call_with_retries(_once, self.max_retries, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S)
+
+    def chat(self, messages: list[dict], temperature: float = 0.2, priority: int | str | None = None):
+        if priority is None:
+            priority = self.priority
+        elif isinstance(priority, str):
+            priority = PRIORITIES.get(priority, self.priority)
+        # ein Budget für den ganzen Aufruf: Fallbacks im selben (z.B. ":free"-)Bucket warten nicht erneut
+        budget = RateBudget(get_rate_scheduler())
+        return call_with_fallback(
+            self.models, lambda model: self._complete(model, messages, temperature, priority, budget), self.hedge_after
         )
-        return resp.choices[0].message.content or ""
@@ -1,7 +1,59 @@
 # src/router.py – minimal angepasst
-from src.agent import GuardResult, run_agent  # Agent wie oben
+import os
+import re
+
+from src.agent import GuardResult, record_session_turn, run_agent, run_agent_turn  # Agent wie oben
+from src.conversation import looks_like_follow_up, normalize_query
+from src.utils.singleflight import SingleFlight
+
+# Gleichzeitige identische Fragen (z.B. in der Vorlesungspause) teilen sich einen Agent-Durchlauf
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() == "true"
+
+_inflight = SingleFlight()
+
+# Kalenderaktionen (anlegen/verschieben/löschen) haben Seiteneffekte pro Nutzer und werden nie zusammengelegt
+_CALENDAR_ACTION_RE = re.compile(
+    r"\b(?:\w*trag\w*\s+(?:\w+\s+)*ein|eintrag\w*|hinzufüg\w*|anleg\w*|erstell\w*|verschieb\w*|verleg\w*|lösch\w*|entfern\w*|"
+    r"sag\w*\s+(?:\w+\s+)*ab|absag\w*|storn\w*|add|create|schedule|reschedule|postpone|move|delete|remove|cancel)\b",
+    re.IGNORECASE,
+)
+
+
+def is_calendar_action(user_msg: str) -> bool:
+    return bool(_CALENDAR_ACTION_RE.search(user_msg or ""))
+
+
+def coalescing_key(user_msg: str, session_id: str | None = None) -> tuple:
+    """
+    (normalisierte Nachricht, Route): eigenständige Fragen laufen über die gemeinsame Route und werden
+    sitzungsübergreifend zusammengelegt; Folgefragen hängen vom Verlauf ab und bleiben pro Session getrennt.
+    """
+    route = f"session:{session_id}" if session_id and looks_like_follow_up(user_msg) else "shared"
+    return normalize_query(user_msg), route
+
+
+def _run_shared(user_msg: str, session_id: str | None) -> dict:
+    result, turn = run_agent_turn(user_msg, session_id)
+    return {"result": result, "turn": turn, "session_id": session_id}
 
 
 # guard_check/supervise entfallen – der Graph macht das Routing.
-def supervise(user_msg: str):
-    return run_agent(user_msg)
+def supervise(user_msg: str, session_id: str | None = None):
+    if not REQUEST_COALESCING or is_calendar_action(user_msg):
+        return run_agent(user_msg, session_id=session_id)
+    shared = _inflight.do(coalescing_key(user_msg, session_id), _run_shared, user_msg, session_id)
+    if session_id and shared["session_id"] != session_id and shared["turn"] is not None:
+        # Nur der Leader hat in seiner Session checkpointed – sonst fehlte der Turn für spätere Folgefragen
+        try:
+            record_session_turn(session_id, shared["turn"])
+        except Exception as e:
+            print(f"ROUTER could not record shared turn for session {session_id}: {e}")
+    return shared["result"]
+
+
+def get_coalescing_stats() -> dict:
+    return {**_inflight.stats, "in_flight": _inflight.in_flight()}
+
+
+def reset_coalescing_stats() -> None:
+    _inflight.reset_stats()
@@ -0,0 +1,96 @@
+# src/tools/bm25.py
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bezeichner wie "§ 12", "12.3.1", "INFB-120", "ws_2025" bleiben als ein Token erhalten
+_TOKEN_RE = re.compile(r"§\s*\d+[a-z]?|\d+(?:\.\d+)+|[a-z0-9äöüß]+(?:[-_/][a-z0-9äöüß]+)*", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Kleingeschriebene Tokens; zusammengesetzte Bezeichner zusätzlich in ihre Teile zerlegt."""
+    tokens: List[str] = []
+    for m in _TOKEN_RE.finditer((text or "").lower()):
+        tok = re.sub(r"\s+", "", m.group(0))
+        tokens.append(tok)
+        parts = re.split(r"[-_/]", tok) if not tok.startswith("§") and not re.fullmatch(r"\d+(?:\.\d+)+", tok) else []
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+
+class BM25Index:
+    """Okapi-BM25 über ein Inverted Index; als JSON neben der Chroma-Collection persistiert."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_tfs: Dict[str, Dict[str, int]] = {}
+        self._postings: Optional[Dict[str, List[Tuple[str, int]]]] = None
+
+    # ----- Aufbau -----
+    def upsert(self, ids: Sequence[str], docs: Sequence[str]) -> None:
+        for doc_id, doc in zip(ids, docs):
+            self.doc_tfs[doc_id] = dict(Counter(tokenize(doc)))
+        self._postings = None
+
+    def delete(self, ids: Iterable[str]) -> None:
+        for doc_id in ids:
+            self.doc_tfs.pop(doc_id, None)
+        self._postings = None
+
+    def _build(self) -> None:
+        postings: Dict[str, List[Tuple[str, int]]] = {}
+        for doc_id, tfs in self.doc_tfs.items():
+            for term, tf in tfs.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+        self._doc_len = {doc_id: sum(tfs.values()) for doc_id, tfs in self.doc_tfs.items()}
+        self._avg_len = (sum(self._doc_len.values()) / len(self._doc_len)) if self._doc_len else 0.0
+        self._postings = postings
+
+    # ----- Suche -----
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        if self._postings is None:
+            self._build()
+        n_docs = len(self.doc_tfs)
+        if not n_docs:
+            return []
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            plist = self._postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for doc_id, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / (self._avg_len or 1.0))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+    # ----- Persistenz -----
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"k1": self.k1, "b": self.b, "doc_tfs": self.doc_tfs}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        index.doc_tfs = data.get("doc_tfs", {})
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """RRF: score(d) = Σ 1 / (k + rank_i(d)); robust gegenüber unterschiedlich skalierten Scores."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
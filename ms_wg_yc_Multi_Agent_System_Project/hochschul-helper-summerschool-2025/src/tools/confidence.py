@@ -0,0 +1,52 @@
+# src/tools/confidence.py
+from __future__ import annotations
+
+import math
+import os
+from typing import Optional, Sequence
+
+# Kalibrierungsanker für Cosinus-Ähnlichkeiten (all-MiniLM-L6-v2): unter LOW praktisch nie relevant,
+# über HIGH praktisch immer. Dazwischen wird linear interpoliert.
+RAG_SIM_LOW = float(os.getenv("RAG_SIM_LOW", 0.25))
+RAG_SIM_HIGH = float(os.getenv("RAG_SIM_HIGH", 0.65))
+# Unterhalb dieser Konfidenz wird keine LLM-Antwort erzeugt (nichts Relevantes gefunden)
+RAG_MIN_CONFIDENCE = float(os.getenv("RAG_MIN_CONFIDENCE", 0.15))
+
+CONF_FLOOR = 0.05
+CONF_CAP = 0.95
+
+
+def similarity_from_distance(distance: float, space: str = "cosine") -> float:
+    """Chroma-Distanz → Ähnlichkeit in [0, 1] (cosine: 1 - d; l2 auf normierten Vektoren: 1 - d²/2)."""
+    sim = 1.0 - distance / 2.0 if space == "l2" else 1.0 - distance  # l2: Chroma liefert quadrierte Distanz
+    return max(0.0, min(1.0, sim))
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = sum(x * x for x in a) ** 0.5
+    nb = sum(y * y for y in b) ** 0.5
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def confidence_from_scores(similarities: Sequence[float], rerank_scores: Optional[Sequence[float]] = None) -> float:
+    """
+    Konfidenz aus den tatsächlichen Retrieval-Scores statt aus der Trefferanzahl.
+    - similarities: Ähnlichkeiten der Treffer in [0, 1]
+    - rerank_scores: optionale Cross-Encoder-Logits; fließen per Sigmoid zur Hälfte ein
+    """
+    if not similarities:
+        return 0.0
+    ranked = sorted(similarities, reverse=True)
+    support = sum(ranked[:3]) / len(ranked[:3])
+    blended = 0.7 * ranked[0] + 0.3 * support
+    conf = (blended - RAG_SIM_LOW) / max(1e-6, RAG_SIM_HIGH - RAG_SIM_LOW)
+    conf = max(0.0, min(1.0, conf))
+    if rerank_scores:
+        conf = 0.5 * conf + 0.5 * (1.0 / (1.0 + math.exp(-max(rerank_scores))))
+    return round(CONF_FLOOR + (CONF_CAP - CONF_FLOOR) * conf, 3)
+
+
+def is_relevant(confidence: float) -> bool:
+    """False → LLM-Generierung überspringen, der Agent fällt direkt auf die Websuche zurück."""
+    return confidence >= RAG_MIN_CONFIDENCE
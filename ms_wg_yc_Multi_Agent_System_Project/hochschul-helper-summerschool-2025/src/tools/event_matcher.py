@@ -0,0 +1,168 @@
+# src/tools/event_matcher.py
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.time_parser import WEEKDAYS, TimeHints, parse_time_hints
+
+try:  # schneller, aber optional – sonst difflib
+    from rapidfuzz.fuzz import ratio as _rf_ratio
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    _rf_ratio = None
+
+# Bester Kandidat muss mindestens so ähnlich sein und sich um MARGIN vom zweitbesten absetzen
+EVENT_MATCH_MIN_SCORE = float(os.getenv("EVENT_MATCH_MIN_SCORE", 0.6))
+EVENT_MATCH_MARGIN = float(os.getenv("EVENT_MATCH_MARGIN", 0.15))
+# Kandidaten ab diesem Score gehen bei Mehrdeutigkeit an das LLM (statt der ganzen Liste)
+EVENT_MATCH_CANDIDATE_SCORE = float(os.getenv("EVENT_MATCH_CANDIDATE_SCORE", 0.35))
+
+# Aktions- und Füllwörter, die nichts über den gemeinten Termin aussagen
+_STOPWORDS = {
+    # de
+    "verschiebe", "verschieben", "verlege", "verlegen", "lösche", "löschen", "loesche", "entferne", "entfernen", "sage", "sag", "ab",
+    "absagen", "streiche", "streichen", "bitte", "mein", "meine", "meinen", "meinem", "den", "die", "das", "der", "dem", "des", "ein",
+    "eine", "einen", "termin", "termine", "mit", "um", "auf", "von", "vom", "zum", "zur", "am", "im", "in", "nach", "vor", "später",
+    "früher", "stunde", "stunden", "minute", "minuten", "std", "min", "h", "uhr", "und", "alle", "kalender", "aus", "bei", "heute",
+    "morgen", "übermorgen", "nächste", "nächsten", "woche", "halb", "halbe", "anderthalb", "eineinhalb", "tag", "tage", "tagen",
+    "hinten", "vorne",
+    # en
+    "postpone", "move", "reschedule", "delay", "push", "delete", "remove", "cancel", "drop", "please", "my", "the", "a", "an", "with",
+    "by", "to", "at", "on", "in", "from", "for", "of", "event", "events", "appointment", "later", "earlier", "hour", "hours", "minute",
+    "minutes", "and", "all", "calendar", "today", "tomorrow", "next", "week", "half", "day", "days",
+}
+_ALL_RE = re.compile(r"\b(alle|all|sämtliche|beide|both)\b", re.IGNORECASE)
+
+
+@dataclass
+class MatchResult:
+    selected: List[dict]  # eindeutig aufgelöste Events (leer → LLM entscheidet)
+    candidates: List[Tuple[dict, float]]  # (Event, Score) absteigend; bei Mehrdeutigkeit die Auswahl fürs LLM
+    ambiguous: bool
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.selected)
+
+
+_stats: Dict[str, int] = {"local": 0, "llm": 0}
+
+
+def get_matcher_stats() -> Dict[str, float]:
+    total = sum(_stats.values())
+    return {**_stats, "llm_rate": round(_stats["llm"] / total, 3) if total else 0.0}
+
+
+def reset_matcher_stats() -> None:
+    for key in _stats:
+        _stats[key] = 0
+
+
+# ----------------- Text -----------------
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKC", (text or "").lower())
+    return text.replace("ß", "ss")
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9äöü]+", _fold(text)) if len(t) > 1 or t.isdigit()]
+
+
+def _content_tokens(query: str) -> List[str]:
+    stop = {_fold(w) for w in _STOPWORDS} | set(WEEKDAYS)
+    return [t for t in _tokens(query) if t not in stop and not t.isdigit()]
+
+
+def _ratio(a: str, b: str) -> float:
+    if _rf_ratio is not None:
+        return _rf_ratio(a, b) / 100.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _coverage(source: List[str], target: List[str]) -> float:
+    """Mittel über source-Tokens der besten Fuzzy-Übereinstimmung in target (tolerant gegenüber Tippfehlern)."""
+    if not source or not target:
+        return 0.0
+    return sum(max(_ratio(s, t) for t in target) for s in source) / len(source)
+
+
+# ----------------- Zeit -----------------
+def _event_start(event: dict) -> Optional[datetime]:
+    raw = event.get("start")
+    if isinstance(raw, dict):
+        raw = raw.get("dateTime") or raw.get("date")
+    if not raw:
+        return None
+    for fmt in ("%Y/%m/%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(raw[:19], fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(raw.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _time_factor(event: dict, hints: TimeHints) -> float:
+    """1.0 wenn das Event zu allen genannten Zeitangaben passt, sonst abgewertet."""
+    if not hints:
+        return 1.0
+    start = _event_start(event)
+    if start is None:
+        return 0.5
+    checks = []
+    if hints.dates:
+        checks.append(start.date() in hints.dates)
+    if hints.weekdays:
+        checks.append(start.weekday() in hints.weekdays)
+    if hints.times:
+        checks.append(any(abs(start.hour * 60 + start.minute - (h * 60 + m)) <= 30 for h, m in hints.times))
+    return 1.0 if all(checks) else 0.4
+
+
+# ----------------- Matching -----------------
+def score_event(query_tokens: List[str], event: dict, hints: TimeHints) -> float:
+    summary = _tokens(event.get("summary") or "")
+    location = _tokens(event.get("location") or "")
+    description = _tokens(event.get("description") or "")
+    if query_tokens:
+        text = max(
+            0.8 * _coverage(query_tokens, summary) + 0.2 * _coverage(summary, query_tokens),
+            0.6 * _coverage(query_tokens, location),
+            0.4 * _coverage(query_tokens, description),
+            0.85 * _coverage(query_tokens, summary + location),
+        )
+    else:
+        text = 0.7 if hints else 0.0  # nur Zeitangabe ("lösche den Termin morgen um 10 Uhr")
+    return round(text * _time_factor(event, hints), 4)
+
+
+def match_events(query: str, events: List[dict], now: Optional[datetime] = None, allow_multiple: bool = False) -> MatchResult:
+    """
+    Ordnet eine Anfrage wie "verschiebe das Meeting mit Bob" lokal einem Event zu.
+    Eindeutig → selected gefüllt, kein LLM nötig; sonst die knappen Kandidaten für eine LLM-Rückfrage.
+    allow_multiple: "lösche alle Tutorien" darf mehrere Events auswählen.
+    """
+    hints = parse_time_hints(query, now)
+    query_tokens = _content_tokens(query)
+    scored = sorted(((e, score_event(query_tokens, e, hints)) for e in events), key=lambda es: es[1], reverse=True)
+    if not scored or scored[0][1] < EVENT_MATCH_CANDIDATE_SCORE:
+        _stats["llm"] += 1
+        return MatchResult(selected=[], candidates=scored, ambiguous=False)
+
+    best = scored[0][1]
+    close = [(e, s) for e, s in scored if s >= EVENT_MATCH_CANDIDATE_SCORE and best - s < EVENT_MATCH_MARGIN]
+    if allow_multiple and _ALL_RE.search(query) and best >= EVENT_MATCH_MIN_SCORE:
+        _stats["local"] += 1
+        return MatchResult(selected=[e for e, s in scored if s >= EVENT_MATCH_MIN_SCORE], candidates=close, ambiguous=False)
+    if best >= EVENT_MATCH_MIN_SCORE and len(close) == 1:
+        _stats["local"] += 1
+        return MatchResult(selected=[scored[0][0]], candidates=close, ambiguous=False)
+    _stats["llm"] += 1
+    return MatchResult(selected=[], candidates=close, ambiguous=True)
@@ -13,13 +13,16 @@ from dotenv import load_dotenv
 from langchain.tools import tool
 
 from src.models import LLM
+from src.tools.event_matcher import match_events
 from src.utils.google_calendar_utils import (
     CreateGoogleCalendarEvent,
+    CreateGoogleCalendarEventsBatch,
     DeleteGoogleCalendarEvent,
     ListGoogleCalendarEvents,
     PostponeGoogleCalendarEvent,
-    api_resource,
+    get_api_resource,
 )
+from src.utils.time_parser import postpone_delta
 
 load_dotenv()
 
@@ -40,16 +43,18 @@ def create_event_tool(
     summary,
     location="",
     description="",
+    recurrence="",
 ):
     """
-    Create a Google Calendar event.
+    Create a Google Calendar event, optionally recurring.
 
     Args:
-        start_datetime (str): Start datetime (YYYY-MM-DDTHH:MM:SS).
-        end_datetime (str): End datetime (YYYY-MM-DDTHH:MM:SS).
+        start_datetime (str): Start datetime (YYYY-MM-DDTHH:MM:SS) of the first occurrence.
+        end_datetime (str): End datetime (YYYY-MM-DDTHH:MM:SS) of the first occurrence.
         summary (str): Event title.
         location (str, optional): Event location.
         description (str, optional): Event description.
+        recurrence (str, optional): RRULE, e.g. "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959Z" for a weekly lecture.
         timezone (str): Timezone.
 
     Returns:
@@ -58,8 +63,10 @@ def create_event_tool(
     print(f"TOOL create_event_tool was called")
     timezone = "Europe/Berlin"
     try:
-        tool = CreateGoogleCalendarEvent(api_resource)
-        result = tool._run(start_datetime=start_datetime, end_datetime=end_datetime, summary=summary, location=location, description=description, timezone=timezone)
+        tool = CreateGoogleCalendarEvent(get_api_resource())
+        result = tool._run(
+            start_datetime=start_datetime, end_datetime=end_datetime, summary=summary, location=location, description=description, timezone=timezone, recurrence=recurrence or None
+        )
         logger.info(f"Created event: {summary} from {start_datetime} to {end_datetime}")
         print(f"TOOL create_event_tool finished")
         return result
@@ -69,6 +76,32 @@ def create_event_tool(
         return f"❌ Error creating event: {e}"
 
 
+@tool
+def create_events_tool(events: list) -> list:
+    """
+    Create many Google Calendar events at once (batched HTTP requests, one round-trip per 50 events).
+
+    Args:
+        events (list): Event dicts with "title", "start", "end" (YYYY-MM-DDTHH:MM:SS), optional "location", "description"
+            and "recurrence" (RRULE) for series such as weekly lectures.
+
+    Returns:
+        list: One status dict per input event, in order: {"summary", "ok", "link"/"id"} or {"summary", "ok": False, "error"}.
+    """
+    print(f"TOOL create_events_tool was called")
+    timezone = "Europe/Berlin"
+    try:
+        tool = CreateGoogleCalendarEventsBatch(get_api_resource())
+        results = tool._run(events=events, timezone=timezone)
+        logger.info(f"Batch created {sum(r['ok'] for r in results)}/{len(results)} events")
+        print(f"TOOL create_events_tool finished")
+        return results
+    except Exception as e:
+        logger.error(f"Error batch creating events: {e}")
+        print(f"TOOL create_events_tool finished with error")
+        return [{"summary": ev.get("title") or ev.get("summary"), "ok": False, "error": str(e)} for ev in events]
+
+
 @tool
 def list_events_tool(
     start_datetime,
@@ -90,7 +123,7 @@ def list_events_tool(
     print(f"TOOL list_events_tool was called")
     timezone = "Europe/Berlin"
     try:
-        tool = ListGoogleCalendarEvents(api_resource)
+        tool = ListGoogleCalendarEvents(get_api_resource())
         events = tool._run(start_datetime=start_datetime, end_datetime=end_datetime, max_results=max_results, timezone=timezone)
         logger.info(f"Listed {len(events)} events from {start_datetime} to {end_datetime}")
         print(f"TOOL list_events_tool finished")
@@ -101,6 +134,15 @@ def list_events_tool(
         return []
 
 
+def _narrow_candidates(user_query: str, events: list, match=None) -> list:
+    match = match if match is not None else match_events(user_query, events)
+    if match.resolved:
+        return match.selected
+    if match.ambiguous:
+        return [e for e, _ in match.candidates]
+    return events
+
+
 @tool
 def postpone_event_tool(user_query: str) -> str:
     """
@@ -126,10 +168,23 @@ def postpone_event_tool(user_query: str) -> str:
         print(f"TOOL postpone_event_tool finished - no events found")
         return "No upcoming events found."
 
-    # Prepare event options for the LLM
-    event_options = [f"{idx+1}. {e.get('summary', 'No Title')} at {e.get('start')} (ID: {e.get('id')})" for idx, e in enumerate(events)]
+    # Lokaler Matcher grenzt die Auswahl ein: eindeutig → nur dieses Event, mehrdeutig → nur die knappen Kandidaten
+    match = match_events(user_query, events)
+    options = _narrow_candidates(user_query, events, match)
+    event_options = [f"{idx+1}. {e.get('summary', 'No Title')} at {e.get('start')} (ID: {e.get('id')})" for idx, e in enumerate(options)]
     options_text = "\n".join(event_options)
 
+    import json
+
+    import dateutil.parser as parser
+
+    # Vom Matcher eindeutig aufgelöster Termin + lokal verstandene Zeitangabe → kein LLM-Aufruf.
+    # Nicht len(options) == 1: ohne Treffer enthält options alle Events, bei nur einem wäre das ein fremder Termin.
+    time_delta = None
+    if match.resolved and len(match.selected) == 1:
+        event_id = match.selected[0].get("id")
+        time_delta = postpone_delta(user_query, parser.parse(match.selected[0].get("start").replace("/", "-")))
+
     # LLM extracts both event selection AND time adjustment
     class PostponeOutput(TypedDict):
         event_id: str
@@ -150,24 +205,20 @@ def postpone_event_tool(user_query: str) -> str:
         'Respond with JSON: {{"event_id": "abc123", "hours_to_add": 2, "minutes_to_add": 0}}'
     )
 
-    try:
-        import json
-
-        import dateutil.parser as parser
-
-        # Use the chat method with proper message format
-        messages = [{"role": "user", "content": structured_prompt}]
-        llm_response_text = llm.chat(messages)
-        llm_response_json = json.loads(llm_response_text.strip())
+    if time_delta is None:
+        try:
+            # Use the chat method with proper message format
+            messages = [{"role": "user", "content": structured_prompt}]
+            llm_response_text = llm.chat(messages)
+            llm_response_json = json.loads(llm_response_text.strip())
 
-        event_id = llm_response_json.get("event_id")
-        hours_to_add = llm_response_json.get("hours_to_add", 0)
-        minutes_to_add = llm_response_json.get("minutes_to_add", 0)
+            event_id = llm_response_json.get("event_id")
+            time_delta = timedelta(hours=llm_response_json.get("hours_to_add", 0), minutes=llm_response_json.get("minutes_to_add", 0))
 
-    except (json.JSONDecodeError, Exception) as e:
-        logger.error(f"Error parsing LLM response: {e}")
-        print(f"TOOL postpone_event_tool finished with parsing error")
-        return f"❌ Could not understand the postponement request: {e}"
+        except (json.JSONDecodeError, Exception) as e:
+            logger.error(f"Error parsing LLM response: {e}")
+            print(f"TOOL postpone_event_tool finished with parsing error")
+            return f"❌ Could not understand the postponement request: {e}"
 
     # Find the selected event
     event = next((e for e in events if e.get("id") == event_id), None)
@@ -182,7 +233,6 @@ def postpone_event_tool(user_query: str) -> str:
         original_end = parser.parse(event.get("end").replace("/", "-"))
 
         # Add the postponement delta
-        time_delta = timedelta(hours=hours_to_add, minutes=minutes_to_add)
         new_start = original_start + time_delta
         new_end = original_end + time_delta
 
@@ -191,11 +241,12 @@ def postpone_event_tool(user_query: str) -> str:
         new_end_datetime = new_end.strftime("%Y-%m-%dT%H:%M:%S")
 
         # Postpone the event
-        tool = PostponeGoogleCalendarEvent(api_resource)
+        tool = PostponeGoogleCalendarEvent(get_api_resource())
         result = tool._run(event_id=event_id, new_start_datetime=new_start_datetime, new_end_datetime=new_end_datetime, timezone=timezone)
 
         print(f"TOOL postpone_event_tool finished")
-        return f"✅ Postponed '{event.get('summary')}' by {hours_to_add}h {minutes_to_add}m → {result}"
+        sign, minutes = ("-" if time_delta < timedelta() else ""), int(abs(time_delta).total_seconds() // 60)
+        return f"✅ Postponed '{event.get('summary')}' by {sign}{minutes // 60}h {minutes % 60}m → {result}"
 
     except Exception as e:
         logger.error(f"Error postponing event: {e}")
@@ -226,32 +277,37 @@ def delete_event_tool(user_query: str) -> str:
         print(f"TOOL delete_event_tool finished - no events found")
         return "No upcoming events found."
 
-    # Prepare event options for the LLM
-    event_options = [f"{idx+1}. {e.get('summary', 'No Title')} at {e.get('start')} (ID: {e.get('id')})" for idx, e in enumerate(events)]
-    options_text = "\n".join(event_options)
+    match = match_events(user_query, events, allow_multiple=True)
+    if match.resolved:
+        # eindeutiger lokaler Treffer → kein LLM-Aufruf
+        selected_event_ids = [e.get("id") for e in match.selected]
+    else:
+        options = [e for e, _ in match.candidates] if match.ambiguous else events
+        event_options = [f"{idx+1}. {e.get('summary', 'No Title')} at {e.get('start')} (ID: {e.get('id')})" for idx, e in enumerate(options)]
+        options_text = "\n".join(event_options)
+
+        # Create a prompt that asks for structured JSON output
+        structured_prompt = (
+            f"User query: '{user_query}'\n"
+            f"Available events:\n{options_text}\n\n"
+            "Based on the user's query, which event ID(s) best match the intent for deletion? "
+            'Respond with a JSON object in this exact format: {{"event_id": ["id1", "id2"]}}. '
+            "Only return the JSON, no other text."
+        )
 
-    # Create a prompt that asks for structured JSON output
-    structured_prompt = (
-        f"User query: '{user_query}'\n"
-        f"Available events:\n{options_text}\n\n"
-        "Based on the user's query, which event ID(s) best match the intent for deletion? "
-        'Respond with a JSON object in this exact format: {{"event_id": ["id1", "id2"]}}. '
-        "Only return the JSON, no other text."
-    )
-
-    try:
-        import json
+        try:
+            import json
 
-        # Use the chat method with proper message format
-        messages = [{"role": "user", "content": structured_prompt}]
-        llm_response_text = llm.chat(messages)
-        llm_response_json = json.loads(llm_response_text.strip())
-        selected_event_ids = llm_response_json.get("event_id", [])
+            # Use the chat method with proper message format
+            messages = [{"role": "user", "content": structured_prompt}]
+            llm_response_text = llm.chat(messages)
+            llm_response_json = json.loads(llm_response_text.strip())
+            selected_event_ids = llm_response_json.get("event_id", [])
 
-    except (json.JSONDecodeError, Exception) as e:
-        logger.error(f"Error parsing LLM response: {e}")
-        # Fallback: return first event if parsing fails
-        selected_event_ids = [events[0].get("id")] if events else []
+        except (json.JSONDecodeError, Exception) as e:
+            logger.error(f"Error parsing LLM response: {e}")
+            # Fallback: return first event if parsing fails
+            selected_event_ids = [options[0].get("id")] if options else []
 
     logger.info(f"Selected event IDs for deletion: {selected_event_ids}")
 
@@ -266,7 +322,7 @@ def delete_event_tool(user_query: str) -> str:
             continue
 
         try:
-            tool = DeleteGoogleCalendarEvent(api_resource)
+            tool = DeleteGoogleCalendarEvent(get_api_resource())
             result = tool._run(event_id=event_id, calendar_id=None)
             msg = f"✅ Deleted event: **{event.get('summary', 'No Title')}** → {result}"
             logger.info(msg)
@@ -280,7 +336,7 @@ def delete_event_tool(user_query: str) -> str:
     return "\n".join(deleted_events)
 
 
-calendar_tools = [create_event_tool, list_events_tool, postpone_event_tool, delete_event_tool]
+calendar_tools = [create_event_tool, create_events_tool, list_events_tool, postpone_event_tool, delete_event_tool]
 
 
 def test_calendar_tools():
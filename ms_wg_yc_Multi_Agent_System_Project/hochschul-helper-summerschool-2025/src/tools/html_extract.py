@@ -0,0 +1,179 @@
+# src/tools/html_extract.py
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# "auto" wählt das schnellste installierte Backend: selectolax > lxml > stdlib
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "auto")
+HTML_EXTRACT_WORKERS = int(os.getenv("HTML_EXTRACT_WORKERS") or 0) or None  # leer/0 → os.cpu_count()
+
+# Container mit dem eigentlichen Stundenplan, in Prioritätsreihenfolge; Rest der JSF-Seite ist Boilerplate.
+CONTAINER_IDS = ["form1:timetable", "form1:schedule", "timetable"]
+CONTAINER_CLASSES = ["fc-view-harness", "ui-schedule", "timetable"]
+SKIP_TAGS = {"script", "style", "noscript"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+
+def _join_lines(texts: Iterable[str]) -> str:
+    return "\n".join(t for t in (s.strip() for s in texts) if t)
+
+
+# ----------------- Backends -----------------
+def extract_bs4(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for t in soup(list(SKIP_TAGS)):
+        t.decompose()
+    node = None
+    for cid in CONTAINER_IDS:
+        node = node or soup.find(id=cid)
+    for cls in CONTAINER_CLASSES:
+        node = node or soup.find(class_=cls)
+    return (node or soup).get_text(separator="\n", strip=True)
+
+
+def extract_lxml(html: str) -> str:
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(html)
+    etree.strip_elements(tree, *SKIP_TAGS, with_tail=False)
+    xpaths = [f"//*[@id='{cid}']" for cid in CONTAINER_IDS]
+    xpaths += [f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]" for cls in CONTAINER_CLASSES]
+    node = tree
+    for xp in xpaths:
+        found = tree.xpath(xp)
+        if found:
+            node = found[0]
+            break
+    return _join_lines(node.itertext())
+
+
+def extract_selectolax(html: str) -> str:
+    from selectolax.parser import HTMLParser as LexborParser
+
+    tree = LexborParser(html)
+    tree.strip_tags(list(SKIP_TAGS))
+    selectors = [f'[id="{cid}"]' for cid in CONTAINER_IDS] + [f".{cls}" for cls in CONTAINER_CLASSES]
+    node = None
+    for sel in selectors:
+        node = tree.css_first(sel)
+        if node is not None:
+            break
+    node = node or tree.body or tree.root
+    return _join_lines(node.text(separator="\n", deep=True).split("\n")) if node is not None else ""
+
+
+class _ContainerTextParser(HTMLParser):
+    """Streaming-Parser ohne DOM: sammelt Text, merkt sich separat den Text im besten Container."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.all_text: List[str] = []
+        self.container_text: Dict[int, List[str]] = {}
+        self._skip_depth = 0
+        self._capture: Optional[Tuple[int, str, int]] = None  # (Priorität, Tag, Verschachtelungstiefe)
+
+    def _priority(self, attrs) -> Optional[int]:
+        attrs = dict(attrs)
+        if attrs.get("id") in CONTAINER_IDS:
+            return CONTAINER_IDS.index(attrs["id"])
+        classes = (attrs.get("class") or "").split()
+        for i, cls in enumerate(CONTAINER_CLASSES):
+            if cls in classes:
+                return len(CONTAINER_IDS) + i
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in _VOID_TAGS:
+            return
+        if self._capture is None:
+            prio = self._priority(attrs)
+            if prio is not None and prio not in self.container_text:
+                self._capture = (prio, tag, 1)
+                self.container_text[prio] = []
+        elif tag == self._capture[1]:
+            self._capture = (self._capture[0], tag, self._capture[2] + 1)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._capture is not None and tag == self._capture[1]:
+            prio, _, depth = self._capture
+            self._capture = None if depth <= 1 else (prio, tag, depth - 1)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.all_text.append(data)
+        if self._capture is not None:
+            self.container_text[self._capture[0]].append(data)
+
+
+def extract_stdlib(html: str) -> str:
+    parser = _ContainerTextParser()
+    parser.feed(html)
+    parser.close()
+    if parser.container_text:
+        return _join_lines(parser.container_text[min(parser.container_text)])
+    return _join_lines(parser.all_text)
+
+
+EXTRACTORS: Dict[str, Callable[[str], str]] = {
+    "selectolax": extract_selectolax,
+    "lxml": extract_lxml,
+    "stdlib": extract_stdlib,
+    "bs4": extract_bs4,
+}
+_MODULES = {"selectolax": "selectolax.parser", "lxml": "lxml.html", "stdlib": "html.parser", "bs4": "bs4"}
+
+
+def available_extractors() -> List[str]:
+    import importlib.util
+
+    names = []
+    for name, module in _MODULES.items():
+        try:
+            if importlib.util.find_spec(module) is not None:
+                names.append(name)
+        except ModuleNotFoundError:
+            continue
+    return names
+
+
+def resolve_extractor(name: Optional[str] = None) -> str:
+    name = (name or HTML_EXTRACTOR).lower()
+    available = available_extractors()
+    if name == "auto":
+        return available[0]
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor '{name}', choose one of {sorted(EXTRACTORS)} or 'auto'")
+    if name not in available:
+        raise ImportError(f"HTML extractor '{name}' is not installed")
+    return name
+
+
+def _extract_file(args: Tuple[str, str]) -> Tuple[str, str]:
+    path, name = args
+    raw = Path(path).read_text(encoding="utf-8", errors="ignore")
+    return path, EXTRACTORS[name](raw)
+
+
+def extract_files(paths: Iterable[Path], extractor: Optional[str] = None, workers: Optional[int] = HTML_EXTRACT_WORKERS) -> Dict[Path, str]:
+    """Extrahiert Text aus vielen HTML-Dateien parallel in einem Prozesspool (workers=1 → seriell)."""
+    name = resolve_extractor(extractor)
+    jobs = [(str(p), name) for p in paths]
+    if workers == 1 or len(jobs) < 2:
+        results = map(_extract_file, jobs)
+        return {Path(p): text for p, text in results}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return {Path(p): text for p, text in pool.map(_extract_file, jobs, chunksize=8)}
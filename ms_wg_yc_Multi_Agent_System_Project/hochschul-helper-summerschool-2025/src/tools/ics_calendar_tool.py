@@ -1,29 +1,167 @@
 # src/tools/calendar.py
 from __future__ import annotations
 
-import re
-from datetime import datetime, timedelta
-
-
-def make_ics(summary: str, start: datetime, end: datetime, location: str | None = None, description: str | None = None):
-    dtfmt = "%Y%m%dT%H%M%S"
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//HKA Helper//DE",
-        "BEGIN:VEVENT",
-        f"UID:{int(datetime.now().timestamp())}@hka-helper",
-        f"DTSTAMP:{datetime.utcnow().strftime(dtfmt)}Z",
-        f"DTSTART:{start.strftime(dtfmt)}",
-        f"DTEND:{end.strftime(dtfmt)}",
-        f"SUMMARY:{summary}",
-    ]
-    if location:
-        lines.append(f"LOCATION:{location}")
-    if description:
-        lines.append(f"DESCRIPTION:{description}")
-    lines += ["END:VEVENT", "END:VCALENDAR", ""]
-    return "\n".join(lines).encode("utf-8")
+import hashlib
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, Optional, TypedDict, Union
+
+from src.utils.recurrence import build_rrule, lecture_period_end, normalize_rrule
+
+PRODID = "-//HKA Helper//DE"
+_DTFMT = "%Y%m%dT%H%M%S"
+_FOLD_OCTETS = 75  # RFC 5545 3.1: Zeilen > 75 Oktette umbrechen (CRLF + Leerzeichen)
+
+
+class IcsEvent(TypedDict, total=False):
+    summary: str
+    start: datetime
+    end: datetime
+    location: str
+    description: str
+    rrule: str
+    uid: str
+
+
+# ----------------- Formatierung -----------------
+def escape_text(value: str) -> str:
+    """TEXT-Werte nach RFC 5545 3.3.11 (Backslash, Semikolon, Komma, Zeilenumbruch)."""
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def fold_line(line: str) -> str:
+    """Bricht nach höchstens 75 Oktetten um, ohne UTF-8-Zeichen zu zerteilen; Ergebnis endet mit CRLF."""
+    if line.isascii():
+        if len(line) <= _FOLD_OCTETS:
+            return line + "\r\n"
+        rest = range(_FOLD_OCTETS, len(line), _FOLD_OCTETS - 1)
+        return "\r\n ".join([line[:_FOLD_OCTETS], *(line[i : i + _FOLD_OCTETS - 1] for i in rest)]) + "\r\n"
+    data = line.encode("utf-8")
+    if len(data) <= _FOLD_OCTETS:
+        return line + "\r\n"
+    parts, pos, limit = [], 0, _FOLD_OCTETS
+    while pos < len(data):
+        cut = min(pos + limit, len(data))
+        while cut < len(data) and data[cut] & 0xC0 == 0x80:  # nicht mitten in einem UTF-8-Zeichen trennen
+            cut -= 1
+        parts.append(data[pos:cut].decode("utf-8"))
+        pos, limit = cut, _FOLD_OCTETS - 1  # Folgezeilen beginnen mit einem Leerzeichen
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def event_uid(event: IcsEvent) -> str:
+    """
+    UID aus dem Inhalt für Einzeltermine ohne eigene Identität: nur ein unveränderter Termin behält seine UID.
+    Stundenplan-Serien bekommen stattdessen timetable_uid().
+    """
+    key = "|".join(str(event.get(k, "")) for k in ("summary", "start", "end", "location", "rrule"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + "@hka-helper"
+
+
+def _vevent_lines(event: IcsEvent, uid: str, dtstamp: str) -> Iterator[str]:
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}"
+    yield f"DTSTAMP:{dtstamp}"
+    yield f"DTSTART:{event['start'].strftime(_DTFMT)}"
+    yield f"DTEND:{event['end'].strftime(_DTFMT)}"
+    yield f"SUMMARY:{escape_text(event.get('summary') or '')}"
+    if event.get("rrule"):
+        yield normalize_rrule(event["rrule"])
+    if event.get("location"):
+        yield f"LOCATION:{escape_text(event['location'])}"
+    if event.get("description"):
+        yield f"DESCRIPTION:{escape_text(event['description'])}"
+    yield "END:VEVENT"
+
+
+def iter_ics(events: Iterable[IcsEvent], prodid: str = PRODID) -> Iterator[str]:
+    """
+    Streamt ein VCALENDAR mit beliebig vielen VEVENTs als gefaltete CRLF-Zeilen; `events` darf ein Generator sein.
+    UIDs: event["uid"] oder event_uid(); doppelte UIDs im selben Export bekommen ein Suffix.
+    """
+    dtstamp = datetime.now(timezone.utc).strftime(_DTFMT) + "Z"
+    seen = set()
+    yield from ("BEGIN:VCALENDAR\r\n", "VERSION:2.0\r\n", fold_line(f"PRODID:{prodid}"), "CALSCALE:GREGORIAN\r\n")
+    for event in events:
+        uid = base = event.get("uid") or event_uid(event)
+        n = 1
+        while uid in seen:
+            n += 1
+            uid = base.replace("@", f"-{n}@", 1) if "@" in base else f"{base}-{n}"
+        seen.add(uid)
+        for line in _vevent_lines(event, uid, dtstamp):
+            yield fold_line(line)
+    yield "END:VCALENDAR\r\n"
+
+
+def write_ics(events: Iterable[IcsEvent], target: Union[str, Path, IO[str]], prodid: str = PRODID) -> int:
+    """Schreibt ein ICS-Bundle zeilenweise in eine Datei/einen Stream (konstanter Speicher); Rückgabe: Anzahl VEVENTs."""
+    if isinstance(target, (str, Path)):
+        with open(target, "w", encoding="utf-8", newline="") as fp:
+            return write_ics(events, fp, prodid)
+    count = 0
+    for line in iter_ics(events, prodid):
+        if line == "BEGIN:VEVENT\r\n":
+            count += 1
+        target.write(line)
+    return count
+
+
+def make_ics(summary: str, start: datetime, end: datetime, location: str | None = None, description: str | None = None, rrule: str | None = None):
+    """rrule: z.B. build_rrule(until=..., floating=True) – eine VEVENT-Serie statt eines Events pro Woche."""
+    event: IcsEvent = {"summary": summary, "start": start, "end": end, "location": location or "", "description": description or "", "rrule": rrule or ""}
+    return "".join(iter_ics([event])).encode("utf-8")
+
+
+# ----------------- Stundenplan-Export -----------------
+def _clock(value: str) -> time:
+    hour, minute = (value or "00:00").split(":")[:2]
+    return time(int(hour), int(minute))
+
+
+def timetable_uid(entry: dict, period_end: date, slot: int = 0) -> str:
+    """
+    UID einer Stundenplan-Serie aus ihrer Identität statt ihrem Inhalt: Studiengang/Semester, Veranstaltung, Wochentag,
+    n-ter Termin des Tages und Vorlesungszeit. Export ab einer anderen Woche, Raum- oder Zeitänderung → dieselbe UID,
+    der Kalender aktualisiert die Serie statt sie zu duplizieren; das nächste Semester bekommt neue UIDs.
+    """
+    parts = [entry.get(k) or "" for k in ("faculty", "major", "semester", "course")]
+    key = "|".join([*parts, str(int(entry.get("weekday", 0))), str(slot), period_end.isoformat()])
+    return "tt-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + "@hka-helper"
+
+
+def timetable_events(entries: Iterable[dict], first_day: date, until: Optional[date] = None) -> Iterator[IcsEvent]:
+    """
+    Wandelt Stundenplan-Einträge (timetable_index.TimetableEntry) in wöchentliche VEVENT-Serien um:
+    erster Termin am passenden Wochentag ab `first_day`, RRULE bis `until` (Standard: Ende der Vorlesungszeit).
+    Einträge nach Wochentag und Beginn sortiert übergeben (wie query_entries), sonst zählen die Slots pro Tag falsch.
+    """
+    period_end = until or lecture_period_end(first_day)
+    rrule = build_rrule(until=period_end, floating=True)
+    slots: Dict[tuple, int] = {}
+    for entry in entries:
+        series = tuple(entry.get(k) for k in ("faculty", "major", "semester", "course", "weekday"))
+        slot = slots[series] = slots.get(series, -1) + 1  # zweiter Termin am selben Tag → eigene Serie
+        day = first_day + timedelta(days=(int(entry.get("weekday", 0)) - first_day.weekday()) % 7)
+        start, end = datetime.combine(day, _clock(entry.get("start"))), datetime.combine(day, _clock(entry.get("end")))
+        details = [entry.get("lecturer"), " ".join(filter(None, (entry.get("major"), entry.get("semester"))))]
+        yield {
+            "summary": entry.get("course", ""),
+            "start": start,
+            "end": end if end > start else start + timedelta(minutes=90),
+            "location": entry.get("room", ""),
+            "description": "\n".join(d for d in details if d),
+            "rrule": rrule,
+            "uid": timetable_uid(entry, period_end, slot),
+        }
+
+
+def export_timetable_ics(target: Union[str, Path, IO[str]], first_day: Optional[date] = None, until: Optional[date] = None, **filters) -> int:
+    """Ganzer Semester-Stundenplan aus dem SQLite-Index als eine ICS-Datei; filters wie timetable_index.query_entries."""
+    from src.tools import timetable_index
+
+    entries = timetable_index.query_entries(**filters)
+    return write_ics(timetable_events(entries, first_day or date.today(), until), target)
 
 
 # simple NLP heuristic as an example
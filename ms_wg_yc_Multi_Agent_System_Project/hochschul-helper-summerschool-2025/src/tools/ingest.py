@@ -9,21 +9,62 @@ from chromadb import PersistentClient
 from pypdf import PdfReader
 from sentence_transformers import SentenceTransformer
 
+from .bm25 import BM25Index
+
 DB_DIR = Path("vectordb")
 COLL_NAME = "hka"
+BM25_PATH = DB_DIR / f"{COLL_NAME}_bm25.json"  # lexikalischer Index für Hybrid-Retrieval in rag.retrieve
 
 
 EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local")
 EMBEDDING_MODEL_LOCAL = os.getenv("EMBEDDING_MODEL_LOCAL", "sentence-transformers/all-MiniLM-L6-v2")
+# Vorquantisierte ONNX-Gewichte im Hub-Repo des Modells (all-MiniLM-L6-v2 liefert u.a. avx2/avx512/arm64 mit)
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+# local: PyTorch fp32 | onnx: ONNX Runtime fp32 | onnx-int8: ONNX Runtime int8 | torch-int8: dynamisch quantisiertes PyTorch
+EMBEDDING_BACKENDS = ("local", "onnx", "onnx-int8", "torch-int8")
+# Frühere .env-Werte, die schon immer das lokale Modell geladen haben
+LEGACY_EMBEDDING_BACKENDS = {"openai": "local"}
 
 
 _model = None
 
 
+def load_embedder(backend: str = EMBEDDING_BACKEND, model_name: str = EMBEDDING_MODEL_LOCAL):
+    """SentenceTransformer für das gewählte CPU-Backend; alle Varianten haben dieselbe encode()-Schnittstelle."""
+    backend = backend.lower()
+    if backend in LEGACY_EMBEDDING_BACKENDS:
+        mapped = LEGACY_EMBEDDING_BACKENDS[backend]
+        print(f"EMBEDDER warning: EMBEDDING_BACKEND '{backend}' is deprecated, using '{mapped}' (choose one of {EMBEDDING_BACKENDS})")
+        backend = mapped
+    if backend == "local":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", device="cpu")
+    if backend == "onnx-int8":
+        try:
+            return SentenceTransformer(model_name, backend="onnx", device="cpu", model_kwargs={"file_name": EMBEDDING_ONNX_FILE})
+        except Exception as e:
+            # Modell ohne mitgelieferte int8-Datei → fp32-ONNX exportieren und lokal quantisieren
+            print(f"EMBEDDER {EMBEDDING_ONNX_FILE} not available ({e}), quantizing ONNX export locally")
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+
+            save_dir = DB_DIR.parent / "models" / model_name.replace("/", "__")
+            model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+            model.save(str(save_dir))
+            export_dynamic_quantized_onnx_model(model, "avx2", str(save_dir))
+            return SentenceTransformer(str(save_dir), backend="onnx", device="cpu", model_kwargs={"file_name": "onnx/model_qint8_avx2.onnx"})
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}', choose one of {EMBEDDING_BACKENDS}")
+
+
 def get_embedder():
     global _model
     if _model is None:
-        _model = SentenceTransformer(EMBEDDING_MODEL_LOCAL)
+        _model = load_embedder()
     return _model
 
 
@@ -69,10 +110,15 @@ def ingest_pdfs(pdf_dir: Path = Path("data/pdfs")):
 
     total = len(docs)
     for start, end in _batched(total, BATCH_SIZE):
-        coll.add(
+        coll.upsert(
             documents=docs[start:end],
             embeddings=vectors[start:end] if vectors is not None else None,
             ids=ids[start:end],
             metadatas=metas[start:end] if metas is not None else None,
         )
+
+    # BM25-Index spiegelt die Collection: bestehende Einträge behalten, diese Chunks ersetzen
+    bm25 = BM25Index.load(BM25_PATH) if BM25_PATH.exists() else BM25Index()
+    bm25.upsert(ids, docs)
+    bm25.save(BM25_PATH)
     return len(docs)
@@ -2,17 +2,28 @@
 from __future__ import annotations
 
 import os
+from typing import List, Optional
 
 from chromadb import PersistentClient
 
 from src.models import LLM
+from src.utils.text import CONTEXT_TOKEN_BUDGET, pack_context
 
-from .ingest import COLL_NAME, DB_DIR, get_embedder
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .confidence import confidence_from_scores, cosine_similarity, is_relevant, similarity_from_distance
+from .ingest import BM25_PATH, COLL_NAME, DB_DIR, get_embedder
+from .rerank import RERANK_CANDIDATES, RERANK_ENABLED, RERANK_TOP_K, rerank
 
 # RAG_MODEL = os.getenv("RAG_MODEL", "openai/gpt-4o-mini")
 RAG_MODEL = os.getenv("RAG_MODEL", "deepseek/deepseek-chat-v3.1:free")
 
+# Hybrid-Retrieval: Vektor- und BM25-Kandidaten per Reciprocal Rank Fusion zusammenführen
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+
 _llm = LLM(RAG_MODEL)
+_bm25 = None
+_bm25_mtime = None
 
 
 SYSTEM = (
@@ -30,28 +41,113 @@ SYSTEM = (
 PROMPT = "Kontext:\n{context}\n\nFrage: {question}\n" "Antworte präzise und nenne Quellen (Dateiname+Chunk)."
 
 
-def retrieve(query: str, k: int = 6):
+def _load_bm25():
+    """BM25-Index lazy laden und nach einem erneuten Ingest (neue mtime) neu einlesen."""
+    global _bm25, _bm25_mtime
+    if not BM25_PATH.exists():
+        return None
+    mtime = BM25_PATH.stat().st_mtime
+    if _bm25 is None or mtime != _bm25_mtime:
+        _bm25, _bm25_mtime = BM25Index.load(BM25_PATH), mtime
+    return _bm25
+
+
+def retrieve_scored(query: str, k: int = 6):
+    """
+    Wie `retrieve`, aber mit Scores je Treffer: [(doc, meta, similarity, rerank_score), ...].
+    similarity liegt in [0, 1]; rerank_score ist None, solange RERANK_ENABLED aus ist.
+    """
     client = PersistentClient(path=str(DB_DIR))
     coll = client.get_or_create_collection(COLL_NAME)
+    space = (coll.metadata or {}).get("hnsw:space", "l2")
     embedder = get_embedder()
     qv = embedder.encode([query]).tolist()
-    res = coll.query(query_embeddings=qv, n_results=k)
+    bm25 = _load_bm25() if HYBRID_RETRIEVAL else None
+    # mit Rerank mehr Kandidaten holen, der Cross-Encoder wählt daraus die besten k
+    n_out = max(k, RERANK_CANDIDATES) if RERANK_ENABLED else k
+    n_candidates = max(n_out, HYBRID_CANDIDATES) if bm25 else n_out
+    res = coll.query(query_embeddings=qv, n_results=n_candidates)
+    ids = res.get("ids", [[]])[0]
     docs = res.get("documents", [[]])[0]
     metas = res.get("metadatas", [[]])[0]
-    return list(zip(docs, metas))
+    sims = [similarity_from_distance(d, space) for d in (res.get("distances") or [[]])[0]]
+    by_id = {i: (d, m, s) for i, d, m, s in zip(ids, docs, metas, sims)}
+    if bm25:
+        # Exakte Bezeichner (Modulcodes, §-Nummern) findet BM25, Paraphrasen der Vektorindex
+        lexical = [doc_id for doc_id, _ in bm25.search(query, n_candidates)]
+        ranked = [doc_id for doc_id, _ in reciprocal_rank_fusion([ids, lexical])][:n_out]
+        missing = [i for i in ranked if i not in by_id]
+        if missing:
+            extra = coll.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            for i, d, m, e in zip(extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]):
+                by_id[i] = (d, m, max(0.0, cosine_similarity(qv[0], list(e))))
+        ranked = [i for i in ranked if i in by_id]
+    else:
+        ranked = ids[:n_out]
+
+    if not RERANK_ENABLED:
+        return [(*by_id[i], None) for i in ranked[:k]]
+    top = rerank(query, [(i, by_id[i][0]) for i in ranked], top_k=k)
+    return [(*by_id[ranked[idx]], score) for idx, score in top]
+
+
+def retrieve(query: str, k: int = 6):
+    return [(d, m) for d, m, _, _ in retrieve_scored(query, k)]
+
+
+def chunk_id(meta: dict) -> str:
+    # gleiche IDs wie ingest_pdfs()
+    return f"{meta['source']}:{meta['chunk']}"
+
+
+def retrieve_known(query: str, chunk_ids: List[str], k: int = 6):
+    """Bereits bekannte Chunks (z.B. aus dem vorherigen Turn) gegen eine Folgefrage bewerten – ohne Vektor-/BM25-Suche."""
+    coll = PersistentClient(path=str(DB_DIR)).get_or_create_collection(COLL_NAME)
+    got = coll.get(ids=list(chunk_ids), include=["documents", "metadatas", "embeddings"])
+    qv = get_embedder().encode([query]).tolist()[0]
+    hits = [(d, m, max(0.0, cosine_similarity(qv, list(e))), None) for d, m, e in zip(got["documents"], got["metadatas"], got["embeddings"])]
+    return sorted(hits, key=lambda h: h[2], reverse=True)[:k]
+
+
+NOT_FOUND = "Ich bin nicht sicher – in den HKA-Dokumenten habe ich dazu nichts Passendes gefunden."
+
+
+def _confidence(hits) -> float:
+    rerank_scores = [r for *_, r in hits if r is not None]
+    return confidence_from_scores([s for _, _, s, _ in hits], rerank_scores or None)
 
 
 def answer(query: str):
+    return answer_with_chunks(query)[:3]
+
+
+def answer_with_chunks(query: str, chunk_ids: Optional[List[str]] = None):
+    """
+    Wie `answer`, zusätzlich mit den IDs der verwendeten Chunks: (antwort, konfidenz, quellen, chunk_ids).
+    chunk_ids: Treffer eines früheren Turns; reichen sie für die Folgefrage, entfällt die Suche.
+    """
     print(f"Normal RAG answer requested")
-    hits = retrieve(query)
-    context = "\n\n".join([f"[{m['source']}#{m['chunk']}]\n{d}" for d, m in hits])
+    k = RERANK_TOP_K if RERANK_ENABLED else 6
+    hits = retrieve_known(query, chunk_ids, k) if chunk_ids else []
+    # Konfidenz aus den Retrieval-Scores; ohne relevante Treffer keine LLM-Generierung
+    conf = _confidence(hits)
+    if hits and is_relevant(conf):
+        print(f"Normal RAG: reusing {len(hits)} chunks from the previous turn")
+    else:
+        hits = retrieve_scored(query, k=k)
+        conf = _confidence(hits)
+    if not is_relevant(conf):
+        print(f"Normal RAG: nothing relevant (confidence {conf}), skipping generation")
+        return NOT_FOUND, conf, [], []
+
+    # Treffer kommen bereits nach Relevanz sortiert; Packer entfernt Dubletten und hält das Token-Budget
+    packed = pack_context([{"text": d, "meta": m} for d, m, _, _ in hits], CONTEXT_TOKEN_BUDGET, overhead_tokens=16)
+    context = "\n\n".join([f"[{c['meta']['source']}#{c['meta']['chunk']}]\n{c['text']}" for c in packed])
     msg = [
         {"role": "system", "content": SYSTEM},
         {"role": "user", "content": PROMPT.format(context=context, question=query)},
     ]
     out = _llm.chat(msg)
 
-    # naive confidence estimation: length & number of hits
-    conf = min(0.95, 0.3 + 0.1 * len(hits)) if hits else 0.2
-    cites = [f"{m['source']}#{m['chunk']}" for _, m in hits]
-    return out, conf, cites
+    cites = [f"{c['meta']['source']}#{c['meta']['chunk']}" for c in packed]
+    return out, conf, cites, [chunk_id(c["meta"]) for c in packed]
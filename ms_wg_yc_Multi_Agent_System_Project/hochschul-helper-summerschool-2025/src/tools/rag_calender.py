@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 import os
+import threading
 from datetime import datetime
+from typing import List, Optional
 
 from langchain.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
 from src.models import LLM
+from src.utils.text import CONTEXT_TOKEN_BUDGET, pack_context, timetable_chunk_id
 
+from . import timetable_index
+from .confidence import confidence_from_scores, cosine_similarity, is_relevant, similarity_from_distance
 from .ingest import get_embedder
+from .rerank import RERANK_CANDIDATES, RERANK_ENABLED, RERANK_TOP_K, rerank
 
 RAG_MODEL = os.getenv("RAG_MODEL", "deepseek/deepseek-chat-v3.1:free")
-CHROMA_COLLECTION_NAME = "timetable_test"
-CHROMA_PERSIST_DIR = "./vectordb"
+CHROMA_COLLECTION_NAME = timetable_index.TIMETABLE_COLLECTION
+CHROMA_PERSIST_DIR = timetable_index.TIMETABLE_CHROMA_DIR
+# Treffer aus dem strukturierten Index nur vom LLM umformulieren lassen (sonst deterministische Antwort)
+TIMETABLE_LLM_PHRASING = os.getenv("TIMETABLE_LLM_PHRASING", "false").lower() == "true"
 
 
 _llm = LLM(RAG_MODEL)
+_db = None
+_db_lock = threading.Lock()
 today = datetime.now().strftime("%d.%m.%Y")
 SYSTEM_PROMPT = """Du bist ein Assistent für die Stundenpläne der Hochschule. 
         Deine Aufgabe ist es, Fragen zu Vorlesungen, Übungen und Räumen anhand 
@@ -48,9 +58,18 @@ USER_PROMPT = """Hier sind relevante Dokumenten-Auszüge (Kontext) aus den Stund
             Füge am Ende deiner Antwort IMMER die Quelle(n) aus den Metadaten (`source_file`) hinzu."""
 
 
+def get_timetable_db():
+    """Embedding-Modell und Chroma-Handle einmal pro Prozess laden (Warm-up und alle Requests teilen sie)."""
+    global _db
+    with _db_lock:
+        if _db is None:
+            embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+            _db = Chroma(persist_directory=CHROMA_PERSIST_DIR, collection_name=CHROMA_COLLECTION_NAME, embedding_function=embeddings)
+        return _db
+
+
 def make_retriever(faculty=None, major=None, semester=None, k=5):
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    db = Chroma(persist_directory=CHROMA_PERSIST_DIR, collection_name=CHROMA_COLLECTION_NAME, embedding_function=embeddings)
+    db = get_timetable_db()
     # create metadata filter dict if provided
     metadata_filter = {}
     if faculty:
@@ -60,30 +79,136 @@ def make_retriever(faculty=None, major=None, semester=None, k=5):
     if semester:
         metadata_filter["semester"] = semester
 
-    retriever = db.as_retriever(search_kwargs={"k": k})
-    # The Chroma retriever supports passing filter args at query time; we'll show how below.
+    retriever = db.as_retriever(search_kwargs={"k": k, "filter": build_where(metadata_filter)})
     return db, retriever, metadata_filter
 
 
+def build_where(metadata_filter: dict):
+    """Übersetzt {faculty, major, semester} in eine Chroma-where-Klausel (mehrere Felder → $and)."""
+    clauses = [{key: value} for key, value in metadata_filter.items() if value]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def retrieve_scored(query: str, k: int = 6, faculty=None, major=None, semester=None):
+    """
+    [(Document, similarity in [0, 1], rerank_score), ...], vorgefiltert auf das im Text genannte Semester.
+    rerank_score ist None, solange RERANK_ENABLED aus ist.
+    """
+    if not (faculty or major or semester):
+        try:
+            semester = timetable_index.extract_timetable_filters(query, timetable_index.known_semesters()).get("semester")
+        except Exception as e:
+            print(f"TOOL timetable filter extraction failed: {e}")
+    n_candidates = max(k, RERANK_CANDIDATES) if RERANK_ENABLED else k
+    db, retriever, meta_filter = make_retriever(faculty, major, semester, n_candidates)
+    where = build_where(meta_filter)
+    scored = db.similarity_search_with_score(query, k=n_candidates, filter=where)
+    if not scored and where:
+        # Filter zu eng (z.B. falsches Kürzel) → ungefiltert über alle Stundenpläne
+        scored = db.similarity_search_with_score(query, k=n_candidates)
+    space = (db._collection.metadata or {}).get("hnsw:space", "l2")
+    hits = [(doc, similarity_from_distance(dist, space)) for doc, dist in scored]
+    if not RERANK_ENABLED:
+        return [(doc, sim, None) for doc, sim in hits[:k]]
+    top = rerank(query, [(_chunk_key(doc), doc.page_content) for doc, _ in hits], top_k=k)
+    return [(*hits[idx], score) for idx, score in top]
+
+
+def _chunk_key(doc) -> str:
+    # dieselbe Id, unter der scripts/ingest_timetables.py den Chunk in Chroma ablegt
+    meta = doc.metadata or {}
+    return timetable_chunk_id(meta.get("source_file"), meta.get("chunk_index"), doc.page_content)
+
+
 def retrieve(query: str, k: int = 6, faculty=None, major=None, semester=None):
-    db, retriever, meta_filter = make_retriever(faculty, major, semester, k)
-    docs = db.similarity_search(query, k=6)
-    return docs
+    return [doc for doc, _, _ in retrieve_scored(query, k, faculty, major, semester)]
+
+
+def retrieve_known(query: str, chunk_keys: List[str], k: int = 6):
+    """Bereits bekannte Stundenplan-Chunks (IDs wie _chunk_key) gegen eine Folgefrage bewerten, ohne neue Suche."""
+    from langchain_core.documents import Document
+
+    db, _, _ = make_retriever(k=k)
+    got = db._collection.get(ids=list(chunk_keys), include=["documents", "metadatas", "embeddings"])
+    qv = db.embeddings.embed_query(query)
+    hits = [
+        (Document(page_content=d, metadata=m or {}), max(0.0, cosine_similarity(qv, list(e))), None)
+        for d, m, e in zip(got["documents"], got["metadatas"], got["embeddings"])
+    ]
+    return sorted(hits, key=lambda h: h[1], reverse=True)[:k]
+
+
+PHRASING_PROMPT = """Formuliere die folgenden Stundenplan-Einträge als kurze, freundliche deutsche Antwort auf die Frage.
+Ändere keine Zeiten, Räume oder Namen und lasse nichts weg.
+
+Einträge:
+{entries}
+
+Frage: {question}"""
+
+
+def structured_answer(query: str, faculty=None, major=None, semester=None):
+    """Schneller Pfad über den SQLite-Stundenplanindex; None, wenn keine Veranstaltung erkannt wurde."""
+    try:
+        if not (faculty or major or semester):
+            extracted = timetable_index.extract_timetable_filters(query, timetable_index.known_semesters()).get("semester")
+            semester = extracted if isinstance(extracted, str) else None
+        entries = timetable_index.lookup(query, faculty=faculty, major=major, semester=semester)
+    except Exception as e:
+        print(f"TOOL timetable index unavailable: {e}")
+        return None
+    if not entries:
+        return None
+    out = timetable_index.format_entries(entries)
+    if TIMETABLE_LLM_PHRASING:
+        out = _llm.chat([{"role": "user", "content": PHRASING_PROMPT.format(entries=out, question=query)}])
+    cites = sorted({e["source_file"] for e in entries if e.get("source_file")})
+    return out, 0.9, cites
+
+
+def _confidence(hits) -> float:
+    rerank_scores = [r for *_, r in hits if r is not None]
+    return confidence_from_scores([sim for _, sim, _ in hits], rerank_scores or None)
 
 
 def answer(query: str):
+    return answer_with_chunks(query)[:3]
+
+
+def answer_with_chunks(query: str, chunk_keys: Optional[List[str]] = None):
+    """
+    Wie `answer`, zusätzlich mit den Keys der verwendeten Chunks: (antwort, konfidenz, quellen, chunk_keys).
+    chunk_keys: Treffer eines früheren Turns; reichen sie für die Folgefrage, entfällt die Vektorsuche.
+    """
     print(f"TOOL Calendar RAG answer was called")
-    hits = retrieve(query)
-    context = "\n\n---\n\n".join([d.page_content for d in hits])
+    structured = structured_answer(query)
+    if structured is not None:
+        print(f"TOOL Calendar RAG answer finished (structured index)")
+        return (*structured, [])
+
+    k = RERANK_TOP_K if RERANK_ENABLED else 6
+    hits = retrieve_known(query, chunk_keys, k) if chunk_keys else []
+    conf = _confidence(hits)
+    if hits and is_relevant(conf):
+        print(f"TOOL Calendar RAG: reusing {len(hits)} chunks from the previous turn")
+    else:
+        hits = retrieve_scored(query, k=k)
+        conf = _confidence(hits)
+    if not is_relevant(conf):
+        print(f"TOOL Calendar RAG: nothing relevant (confidence {conf}), skipping generation")
+        return "Dazu liegen mir keine Informationen vor.", conf, [], []
+
+    packed = pack_context([{"text": d.page_content, "doc": d} for d, _, _ in hits], CONTEXT_TOKEN_BUDGET, overhead_tokens=4)
+    context = "\n\n---\n\n".join([c["text"] for c in packed])
     msg = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": USER_PROMPT.format(context=context, question=query, today=today)},
     ]
     out = _llm.chat(msg)
 
-    # naive confidence estimation: length & number of hits
-    conf = min(0.95, 0.3 + 0.1 * len(hits)) if hits else 0.2
     # cites = [f"{m['source']}#{m['chunk']}" for _, m in hits]
-    cites = [d.metadata.get("source_file", "unknown") for d in hits if hasattr(d, "metadata")]
+    cites = [c["doc"].metadata.get("source_file", "unknown") for c in packed if hasattr(c["doc"], "metadata")]
     print(f"TOOL Calendar RAG answer finished")
-    return out, conf, cites
+    return out, conf, cites, [_chunk_key(c["doc"]) for c in packed]
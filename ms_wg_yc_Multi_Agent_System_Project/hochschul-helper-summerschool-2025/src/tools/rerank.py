@@ -0,0 +1,105 @@
+# src/tools/rerank.py
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+# Optionaler Cross-Encoder-Rerank (CPU): viele Vektor-Kandidaten → wenige präzise Treffer für den Prompt
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")  # mehrsprachig, läuft auf CPU
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 30))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", 4))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 32))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 4096))
+
+# (query, text) Paare → Scores; austauschbar für Tests
+Predictor = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+class ScoreCache:
+    """LRU-Cache für Cross-Encoder-Scores, Schlüssel (query, chunk_id)."""
+
+    def __init__(self, maxsize: int = RERANK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, Hashable], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, Hashable]) -> Optional[float]:
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Tuple[str, Hashable], score: float) -> None:
+        self._data[key] = score
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_cache = ScoreCache()
+_model = None
+
+
+def get_cross_encoder():
+    global _model
+    if _model is None:
+        from sentence_transformers import CrossEncoder
+
+        _model = CrossEncoder(RERANK_MODEL, device="cpu")
+    return _model
+
+
+def _predict(pairs: List[Tuple[str, str]]) -> Sequence[float]:
+    return get_cross_encoder().predict(pairs, batch_size=RERANK_BATCH_SIZE, show_progress_bar=False)
+
+
+def text_key(text: str) -> str:
+    """Fallback-chunk_id für Treffer ohne stabile Id."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def score(query: str, candidates: Sequence[Tuple[Hashable, str]], predict: Optional[Predictor] = None, cache: Optional[ScoreCache] = None) -> List[float]:
+    """Cross-Encoder-Scores für (chunk_id, text)-Kandidaten; nur nicht gecachte Paare werden in einem Batch bewertet."""
+    predict = predict or _predict
+    cache = _cache if cache is None else cache
+    scores: List[Optional[float]] = [cache.get((query, chunk_id)) for chunk_id, _ in candidates]
+    todo = [i for i, s in enumerate(scores) if s is None]
+    if todo:
+        fresh = predict([(query, candidates[i][1]) for i in todo])
+        for i, s in zip(todo, fresh):
+            scores[i] = float(s)
+            cache.put((query, candidates[i][0]), float(s))
+    return scores  # type: ignore[return-value]
+
+
+def rerank(
+    query: str,
+    candidates: Sequence[Tuple[Hashable, str]],
+    top_k: int = RERANK_TOP_K,
+    predict: Optional[Predictor] = None,
+    cache: Optional[ScoreCache] = None,
+) -> List[Tuple[int, float]]:
+    """[(Index in candidates, Score), ...] der besten top_k Kandidaten, absteigend nach Score."""
+    if not candidates:
+        return []
+    scores = score(query, candidates, predict, cache)
+    order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+    return [(i, scores[i]) for i in order[:top_k]]
+
+
+def get_cache_stats() -> dict:
+    total = _cache.hits + _cache.misses
+    return {"size": len(_cache), "hits": _cache.hits, "misses": _cache.misses, "hit_rate": round(_cache.hits / total, 3) if total else 0.0}
@@ -0,0 +1,198 @@
+# src/tools/scope_router.py
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+# ----------------- Konfiguration -----------------
+# Mindest-Cosinus-Ähnlichkeit zum besten Scope-Exemplar und Mindestabstand zum
+# zweitbesten Scope, damit die Embedding-Stufe ohne LLM entscheiden darf.
+SCOPE_MIN_SIMILARITY = float(os.getenv("SCOPE_MIN_SIMILARITY", 0.55))
+SCOPE_MIN_MARGIN = float(os.getenv("SCOPE_MIN_MARGIN", 0.08))
+SCOPE_USE_EMBEDDINGS = os.getenv("SCOPE_USE_EMBEDDINGS", "true").lower() == "true"
+
+# Werte identisch zu search.SearchScope (hier als str, damit das Modul ohne Tavily importierbar ist)
+GENERAL = "general"
+FACHSCHAFT = "fachschaft"
+HKA = "hka"
+
+# ----------------- Regeln -----------------
+SCOPE_PATTERNS: Dict[str, List[str]] = {
+    FACHSCHAFT: [
+        r"\bfachschaft\w*",
+        r"\bo-?phase\b",
+        r"\berstsemester\w*",
+        r"\berstis?\b",
+        r"\basta\b",
+        r"\bstudierendenvertretung\b",
+        r"\bfs[- ]?(iwi|mmt|eit|w)\b",
+        r"\biwi-hka\b",
+        r"\bmmt-hka\b",
+    ],
+    HKA: [
+        r"\bh-ka\.de\b",
+        r"\bhochschule karlsruhe\b",
+        r"\bstudierendensekretariat\b",
+        r"\bstudienb[üu]ro\b",
+        r"\bpr[üu]fungsamt\b",
+        r"\bimmatrikulation\w*",
+        r"\bexmatrikulation\w*",
+        r"\br[üu]ckmeldung\b",
+        r"\bsemesterbeitrag\b",
+        r"\bbewerbungsfrist\w*",
+        r"\bilias\b",
+        r"\braumzeit\b",
+        r"\bdekan\w*",
+        r"\brektor\w*",
+        r"\bbibliothek\b",
+        r"\brechenzentrum\b",
+    ],
+    GENERAL: [
+        r"\bkvv\b",
+        r"\bstudierendenwerk\b",
+        r"\bmensa\b",
+        r"\bwohnheim\w*",
+        r"\bwg-?zimmer\b",
+        r"\bwetter\b",
+        r"\bbafög\b",
+        r"\bstraßenbahn\b",
+    ],
+}
+
+_COMPILED: Dict[str, List[re.Pattern]] = {scope: [re.compile(p, re.IGNORECASE) for p in pats] for scope, pats in SCOPE_PATTERNS.items()}
+
+# ----------------- Exemplare für die Embedding-Stufe -----------------
+SCOPE_EXEMPLARS: Dict[str, List[str]] = {
+    FACHSCHAFT: [
+        "Wann ist die O-Phase für Erstsemester?",
+        "Wie erreiche ich die Fachschaft Informatik?",
+        "Welche Veranstaltungen organisiert die Fachschaft?",
+        "Gibt es Altklausuren bei der Fachschaft?",
+    ],
+    HKA: [
+        "Wie funktioniert die Rückmeldung zum nächsten Semester an der Hochschule Karlsruhe?",
+        "Wer ist der Dekan der Fakultät für Informatik?",
+        "Welche Öffnungszeiten hat das Studierendensekretariat?",
+        "Wie beantrage ich ein Urlaubssemester an der HKA?",
+    ],
+    GENERAL: [
+        "Wie komme ich mit der Straßenbahn zum Campus?",
+        "Was kostet ein WG-Zimmer in Karlsruhe?",
+        "Wie beantrage ich BAföG?",
+        "Was gibt es heute in der Mensa?",
+    ],
+}
+
+
+# ----------------- Metriken -----------------
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"rule": 0, "embedding": 0, "llm_fallback": 0}
+
+
+def _count(stage: str) -> None:
+    with _stats_lock:
+        _stats[stage] = _stats.get(stage, 0) + 1
+
+
+def get_routing_stats() -> Dict[str, float]:
+    """Zähler je Entscheidungsstufe plus Anteil der LLM-Fallbacks."""
+    with _stats_lock:
+        stats: Dict[str, float] = dict(_stats)
+    total = sum(stats.values())
+    stats["total"] = total
+    stats["fallback_rate"] = (stats["llm_fallback"] / total) if total else 0.0
+    return stats
+
+
+def reset_routing_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+# ----------------- Klassifikation -----------------
+def _rule_scope(query: str) -> Optional[str]:
+    """Eindeutiger Keyword-Treffer → Scope, sonst None (keine oder widersprüchliche Treffer)."""
+    hits = {scope for scope, patterns in _COMPILED.items() if any(p.search(query) for p in patterns)}
+    if len(hits) == 1:
+        return hits.pop()
+    return None
+
+
+_exemplar_cache: Dict[Callable, list] = {}
+
+
+def _default_embed(texts: Sequence[str]):
+    from .ingest import get_embedder  # lazy: sentence-transformers nur bei Bedarf laden
+
+    return get_embedder().encode(list(texts), normalize_embeddings=True)
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = sum(x * x for x in a) ** 0.5
+    nb = sum(y * y for y in b) ** 0.5
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _embedding_scope(query: str, embed: Callable[[Sequence[str]], Sequence[Sequence[float]]]) -> Optional[str]:
+    exemplar_vectors = _exemplar_cache.get(embed)
+    if exemplar_vectors is None:
+        labels = [scope for scope, texts in SCOPE_EXEMPLARS.items() for _ in texts]
+        texts = [t for ts in SCOPE_EXEMPLARS.values() for t in ts]
+        exemplar_vectors = _exemplar_cache[embed] = list(zip(labels, [list(v) for v in embed(texts)]))
+
+    qv = list(embed([query])[0])
+    best: Dict[str, float] = {}
+    for scope, vec in exemplar_vectors:
+        best[scope] = max(best.get(scope, -1.0), _cosine(qv, vec))
+
+    ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+    top_scope, top_sim = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+    if top_sim >= SCOPE_MIN_SIMILARITY and top_sim - runner_up >= SCOPE_MIN_MARGIN:
+        return top_scope
+    return None
+
+
+def classify_scope(
+    user_query: str,
+    *,
+    embed: Optional[Callable[[Sequence[str]], Sequence[Sequence[float]]]] = None,
+    use_embeddings: bool = SCOPE_USE_EMBEDDINGS,
+) -> Optional[Dict[str, str]]:
+    """
+    Lokale Scope-Bestimmung ohne LLM.
+    Rückgabe: {"scope", "normalized_query", "stage"} oder None, wenn unsicher.
+    """
+    query = user_query.strip()
+    scope = _rule_scope(query)
+    if scope:
+        return {"scope": scope, "normalized_query": query, "stage": "rule"}
+
+    if use_embeddings:
+        try:
+            scope = _embedding_scope(query, embed or _default_embed)
+        except Exception as e:  # z.B. Modell nicht installiert → LLM übernimmt
+            print(f"SCOPE embedding stage unavailable: {e}")
+            scope = None
+        if scope:
+            return {"scope": scope, "normalized_query": query, "stage": "embedding"}
+    return None
+
+
+def route_scope(
+    user_query: str,
+    llm_router: Callable[[str], Dict[str, str]],
+    **kwargs,
+) -> Dict[str, str]:
+    """Lokal entscheiden, nur bei Unsicherheit `llm_router` aufrufen; zählt die genutzte Stufe mit."""
+    decision = classify_scope(user_query, **kwargs)
+    if decision is not None:
+        _count(decision["stage"])
+        return {"scope": decision["scope"], "normalized_query": decision["normalized_query"]}
+
+    _count("llm_fallback")
+    return llm_router(user_query)
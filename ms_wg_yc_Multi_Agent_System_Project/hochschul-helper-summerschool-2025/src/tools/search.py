@@ -3,18 +3,23 @@ from __future__ import annotations
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
 from tavily import TavilyClient
 
 from ..models import LLM
+from ..utils.text import CONTEXT_TOKEN_BUDGET, dedupe_results, pack_context
+from .scope_router import get_routing_stats, route_scope
 
 # ----------------- Konfiguration -----------------
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 # SEARCH_MODEL = os.getenv("RAG_MODEL", "openai/gpt-4o-mini")  # wird für Summarize & Router genutzt
 SEARCH_MODEL = os.getenv("RAG_MODEL", "deepseek/deepseek-chat-v3.1:free")  # wird für Summarize & Router genutzt
 
+SEARCH_PARALLEL_SCOPES = os.getenv("SEARCH_PARALLEL_SCOPES", "false").lower() == "true"
+
 _llm = LLM(SEARCH_MODEL)
 
 client = TavilyClient(api_key=TAVILY_API_KEY)
@@ -74,7 +79,7 @@ def _route_scope_with_llm(user_query: str) -> Dict[str, str]:
         {"role": "system", "content": ROUTER_SYSTEM},
         {"role": "user", "content": user_query},
     ]
-    raw = _llm.chat(messages, temperature=0.0)  # deterministisch
+    raw = _llm.chat(messages, temperature=0.0, priority="routing")  # deterministisch
     # Robust parsen
     try:
         data = json.loads(raw)
@@ -88,17 +93,67 @@ def _route_scope_with_llm(user_query: str) -> Dict[str, str]:
 
 
 # ----------------- Hilfen -----------------
-def _build_context(results: List[Dict[str, Any]], max_snippet_chars: int = 1000) -> str:
-    blocks: List[str] = []
+def _build_context(
+    results: List[Dict[str, Any]],
+    max_snippet_chars: Optional[int] = None,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """Packt Snippets nach Tavily-Score ins Token-Budget (Dubletten raus, Kürzung an Satzgrenzen)."""
+    chunks = []
     for r in results:
-        title = r.get("title") or ""
-        url = r.get("url") or ""
         content = r.get("content") or ""
-        snippet = content[:max_snippet_chars]
-        blocks.append(f"- {title}\n {url}\n {snippet}")
+        if max_snippet_chars:
+            content = content[:max_snippet_chars]
+        chunks.append({"text": content, "score": r.get("score"), "result": r})
+    blocks: List[str] = []
+    for c in pack_context(chunks, token_budget, overhead_tokens=24):
+        title = c["result"].get("title") or ""
+        url = c["result"].get("url") or ""
+        blocks.append(f"- {title}\n {url}\n {c['text']}")
     return "\n\n".join(blocks)
 
 
+def _search_scope(query: str, scope: SearchScope, top_k: int, search_depth: str) -> List[Dict[str, Any]]:
+    include_domains = _domains_for_scope(scope)
+    res = client.search(query=query, max_results=top_k, include_domains=include_domains or None, search_depth=search_depth)
+    results = res.get("results", []) or []
+    for r in results:
+        r.setdefault("scope", scope.value)
+    return results
+
+
+def _search_all_scopes(query: str, top_k: int, search_depth: str) -> List[Dict[str, Any]]:
+    """Fragt hka, fachschaft und general parallel ab; Reihenfolge = Priorität beim Deduplizieren."""
+    scopes = [SearchScope.HKA, SearchScope.FACHSCHAFT, SearchScope.GENERAL]
+    with ThreadPoolExecutor(max_workers=len(scopes)) as pool:
+        futures = [pool.submit(_search_scope, query, s, top_k, search_depth) for s in scopes]
+        merged: List[Dict[str, Any]] = []
+        for scope, fut in zip(scopes, futures):
+            try:
+                merged.extend(fut.result())
+            except Exception as e:
+                print(f"TOOL search scope {scope.value} failed: {e}")
+    return dedupe_results(merged)
+
+
+def _rank_results(query: str, results: List[Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+    """Sortiert Treffer nach Embedding-Ähnlichkeit zur Query (Fallback: Tavily-Score)."""
+    if not results:
+        return []
+    try:
+        from .ingest import get_embedder
+
+        texts = [f"{r.get('title') or ''}\n{r.get('content') or ''}" for r in results]
+        vectors = get_embedder().encode([query] + texts, normalize_embeddings=True)
+        qv, dvs = vectors[0], vectors[1:]
+        scores = [float(sum(a * b for a, b in zip(qv, dv))) for dv in dvs]
+    except Exception as e:
+        print(f"TOOL search ranking falls back to Tavily score: {e}")
+        scores = [float(r.get("score") or 0.0) for r in results]
+    ranked = sorted(zip(scores, range(len(results))), key=lambda x: x[0], reverse=True)
+    return [{**results[i], "score": score} for score, i in ranked[:top_n]]
+
+
 def _summarize(context: str, query: str, scope: SearchScope) -> str:
     scope_note = {
         SearchScope.GENERAL: "Scope: Allgemeine Websuche (keine Domainbeschränkung).",
@@ -120,20 +175,38 @@ def search_and_answer(
     top_k: int = 8,
     search_depth: str = "advanced",  # "basic" | "advanced" (falls von Tavily unterstützt)
     fallback_to_general: bool = True,  # sinnvoll: bei engen Scopes auf general fallen, wenn leer
-    max_snippet_chars: int = 1000,
+    max_snippet_chars: Optional[int] = None,  # optionale harte Kürzung je Snippet; sonst regelt das Token-Budget
+    context_token_budget: int = CONTEXT_TOKEN_BUDGET,
+    parallel_scopes: bool = SEARCH_PARALLEL_SCOPES,  # alle Scopes parallel statt Routing + seriellem Fallback
+    top_n: int = 5,  # nur für parallel_scopes: so viele Top-Snippets gehen in die Zusammenfassung
 ) -> dict:
     """
     Führt eine Tavily-Suche aus und fasst die Resultate per LLM zusammen.
-    - scope="auto": interner Mini-Agent wählt general|fachschaft|hka
+    - scope="auto": lokaler Klassifikator (Regeln + Embeddings) wählt general|fachschaft|hka,
+      nur bei Unsicherheit entscheidet der LLM-Mini-Agent
     - scope in {"general","fachschaft","hka"}: explizit erzwingen
+    - parallel_scopes=True (nur bei scope="auto"): alle Scopes parallel durchsuchen, nach URL/Inhalt
+      deduplizieren, lokal ranken und nur die besten `top_n` Snippets zusammenfassen
     Rückgabe: {"answer": <str>, "citations": [<url>, ...]}
     """
     print(f"TOOL search_and_answer was called")
+    if parallel_scopes and (scope is None or str(scope).lower() == "auto"):
+        results = _rank_results(query, _search_all_scopes(query, top_k, search_depth), top_n)
+        if results:
+            context = _build_context(results, max_snippet_chars=max_snippet_chars, token_budget=context_token_budget)
+            summary = _summarize(context, query, SearchScope.GENERAL)
+            citations = [r.get("url") for r in results if r.get("url")]
+            print(f"TOOL search_and_answer finished (parallel scopes)")
+            return {"answer": summary, "citations": citations}
+        print(f"TOOL search_and_answer finished - no results")
+        return {"answer": "Es wurden keine geeigneten Treffer gefunden.", "citations": []}
+
     # 1) Scope bestimmen
     if scope is None or str(scope).lower() == "auto":
-        routed = _route_scope_with_llm(query)
+        routed = route_scope(query, _route_scope_with_llm)
         scope_value = routed["scope"]
         used_query = routed["normalized_query"]
+        print(f"TOOL search_and_answer scope={scope_value} routing_stats={get_routing_stats()}")
     else:
         scope_value = str(scope).lower()
         if scope_value not in {s.value for s in SearchScope}:
@@ -161,7 +234,7 @@ def search_and_answer(
 
     # 4) Zusammenfassen
     if results:
-        context = _build_context(results, max_snippet_chars=max_snippet_chars)
+        context = _build_context(results, max_snippet_chars=max_snippet_chars, token_budget=context_token_budget)
         summary = _summarize(context, used_query, scope_enum)
         citations = [r.get("url") for r in results if r.get("url")]
         print(f"TOOL search_and_answer finished")
@@ -0,0 +1,80 @@
+# src/tools/timetable_changes.py
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+MANIFEST_NAME = "_manifest.json"  # filename -> {"hash", "department", "cost", "semester", "crawled_at"}
+CHANGES_NAME = "_changes.json"  # noch nicht ingestierte Änderungen: {"changed": [...], "removed": [...]}
+
+# JSF/PrimeFaces-Seiten enthalten pro Request wechselnde Token, die nichts mit dem Stundenplan zu tun haben
+_VOLATILE_RE = [
+    re.compile(r'(name="javax\.faces\.ViewState"[^>]*value=")[^"]*(")', re.IGNORECASE),
+    re.compile(r'(id="[^"]*ViewState[^"]*"[^>]*value=")[^"]*(")', re.IGNORECASE),
+    re.compile(r"(<script\b[^>]*>).*?(</script>)", re.IGNORECASE | re.DOTALL),
+    re.compile(r'(\snonce=")[^"]*(")', re.IGNORECASE),
+]
+
+
+def page_hash(html: str) -> str:
+    """SHA-256 über den stabilen Teil einer Stundenplanseite (ViewState, Skripte, Nonces ausgeblendet)."""
+    for pattern in _VOLATILE_RE:
+        html = pattern.sub(r"\1\2", html)
+    html = re.sub(r"\s+", " ", html).strip()
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _read_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _write_json(path: Path, data) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_manifest(out_dir: Path) -> Dict[str, dict]:
+    return _read_json(Path(out_dir) / MANIFEST_NAME, {})
+
+
+def save_manifest(out_dir: Path, manifest: Dict[str, dict]) -> None:
+    _write_json(Path(out_dir) / MANIFEST_NAME, manifest)
+
+
+def record_page(manifest: Dict[str, dict], out_dir: Path, filename: str, html: str, **meta: str) -> bool:
+    """Schreibt die Seite nur, wenn sich ihr Inhalt geändert hat; True = geändert/neu."""
+    digest = page_hash(html)
+    entry = manifest.get(filename)
+    if entry and entry.get("hash") == digest and (Path(out_dir) / filename).exists():
+        return False
+    (Path(out_dir) / filename).write_text(html, encoding="utf-8")
+    manifest[filename] = {"hash": digest, "crawled_at": datetime.now().isoformat(timespec="seconds"), **meta}
+    return True
+
+
+def merge_changes(out_dir: Path, changed: Iterable[str], removed: Iterable[str]) -> Dict[str, List[str]]:
+    """Ergänzt die offene Änderungsliste, damit mehrere Crawls vor einem Ingest nichts verlieren."""
+    path = Path(out_dir) / CHANGES_NAME
+    pending = _read_json(path, {"changed": [], "removed": []})
+    changed_set = (set(pending.get("changed", [])) | set(changed)) - set(removed)
+    removed_set = (set(pending.get("removed", [])) | set(removed)) - set(changed)
+    result = {"changed": sorted(changed_set), "removed": sorted(removed_set)}
+    _write_json(path, result)
+    return result
+
+
+def read_changes(html_dir: Path):
+    """Offene Änderungsliste oder None, falls es keine gibt (→ Vollindizierung)."""
+    return _read_json(Path(html_dir) / CHANGES_NAME, None)
+
+
+def clear_changes(html_dir: Path) -> None:
+    (Path(html_dir) / CHANGES_NAME).unlink(missing_ok=True)
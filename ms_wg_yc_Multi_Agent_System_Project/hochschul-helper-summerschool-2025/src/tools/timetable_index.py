@@ -0,0 +1,366 @@
+# src/tools/timetable_index.py
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TypedDict
+
+TIMETABLE_DB_PATH = Path(os.getenv("TIMETABLE_DB_PATH", "./data/timetables.sqlite"))
+# Chroma-Collection der Stundenplan-Chunks – von scripts/ingest_timetables.py geschrieben, von rag_calender gelesen
+TIMETABLE_CHROMA_DIR = "./vectordb"
+TIMETABLE_COLLECTION = os.getenv("TIMETABLE_COLLECTION", "timetables")
+
+WEEKDAYS = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+_WEEKDAY_ALIASES: Dict[str, int] = {}
+for _i, _names in enumerate(
+    [
+        ("montag", "monday", "mo", "mon"),
+        ("dienstag", "tuesday", "di", "tue"),
+        ("mittwoch", "wednesday", "mi", "wed"),
+        ("donnerstag", "thursday", "do", "thu"),
+        ("freitag", "friday", "fr", "fri"),
+        ("samstag", "saturday", "sa", "sat"),
+        ("sonntag", "sunday", "so", "sun"),
+    ]
+):
+    for _n in _names:
+        _WEEKDAY_ALIASES[_n] = _i
+
+_TIME_RANGE_RE = re.compile(r"(\d{1,2})[:.](\d{2})\s*(?:-|–|bis|to)\s*(\d{1,2})[:.](\d{2})")
+_ROOM_RE = re.compile(r"\b(?:Raum:?\s*)?([A-Z]{1,3}-?\s?\d{3}[a-z]?)\b")
+_LECTURER_RE = re.compile(r"\b(Prof\.|Dr\.|Dipl\.|M\.\s?Sc\.|Lehrbeauftragte?r?)", re.IGNORECASE)
+_TOKEN_RE = re.compile(r"[a-zäöüß0-9]+", re.IGNORECASE)
+# Studiengangs-Kürzel + Semester wie in den Dateinamen ("ARTB.1"): "INFB 3", "INFB3", "INFB.3", "INFB im 3. Semester"
+_SEMESTER_CODE_RE = re.compile(r"\b([A-Z]{3,5})(?![A-Z])(?:\s*[.\-]?\s*(\d{1,2})\b|\s+(?:im\s+)?(\d{1,2})\.\s*Semester\b)?", re.IGNORECASE)
+
+# Füllwörter aus Fragen, die nie Teil eines Veranstaltungsnamens sein sollen
+_STOPWORDS = {
+    "wann", "wo", "ist", "findet", "statt", "die", "der", "das", "den", "dem", "und", "oder", "im", "in", "am",
+    "um", "vorlesung", "übung", "uebung", "labor", "praktikum", "raum", "uhrzeit", "termin", "termine",
+    "veranstaltung", "veranstaltungen", "stundenplan", "hka", "when", "where", "is", "the", "lecture",
+    "welcher", "welchem", "welche", "nächste", "naechste", "woche", "mein", "meine", "trage", "ein", "kalender",
+}
+
+
+class TimetableEntry(TypedDict, total=False):
+    course: str
+    weekday: int  # 0 = Montag
+    start: str  # "HH:MM"
+    end: str
+    room: str
+    lecturer: str
+    faculty: str
+    major: str
+    semester: str
+    source_file: str
+
+
+# ----------------- Parsing -----------------
+def parse_weekday(text: str, allow_abbrev: bool = False) -> Optional[int]:
+    """Wochentag (0-6) aus Text; Kürzel wie 'Mo' nur mit allow_abbrev (z.B. Tabellenköpfe)."""
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        idx = _WEEKDAY_ALIASES.get(tok)
+        if idx is not None and (allow_abbrev or len(tok) > 3):
+            return idx
+    return None
+
+
+def parse_entry_text(text: str) -> Optional[TimetableEntry]:
+    """Zerlegt den Text eines Termin-Blocks (Zeit, Veranstaltung, Raum, Dozent) in Felder."""
+    m = _TIME_RANGE_RE.search(text or "")
+    if not m:
+        return None
+    entry: TimetableEntry = {
+        "start": f"{int(m.group(1)):02d}:{m.group(2)}",
+        "end": f"{int(m.group(3)):02d}:{m.group(4)}",
+        "course": "",
+        "room": "",
+        "lecturer": "",
+    }
+    for line in [l.strip() for l in text.splitlines() if l.strip()]:
+        rest = _TIME_RANGE_RE.sub("", line).strip(" ,;|")
+        if not rest:
+            continue
+        if _LECTURER_RE.search(rest):
+            entry["lecturer"] = entry["lecturer"] or rest
+            continue
+        room = _ROOM_RE.search(rest)
+        if room and len(rest) <= len(room.group(0)) + 8:
+            entry["room"] = entry["room"] or room.group(1).replace(" ", "")
+            continue
+        if not entry["course"]:
+            entry["course"] = rest
+        elif room and not entry["room"]:
+            entry["room"] = room.group(1).replace(" ", "")
+    return entry if entry["course"] else None
+
+
+def _grid(table) -> List[List]:
+    """Expandiert rowspan/colspan einer HTML-Tabelle in ein Raster aus Zellen."""
+    grid: List[List] = []
+    pending: Dict[int, list] = {}  # Spalte -> [Zelle, verbleibende Zeilen]
+    for tr in table.find_all("tr"):
+        row: List = []
+        cells = tr.find_all(["td", "th"], recursive=False)
+        col = 0
+        while cells or col in pending:
+            if col in pending:
+                cell, left = pending[col]
+                row.append(cell)
+                if left <= 1:
+                    del pending[col]
+                else:
+                    pending[col][1] = left - 1
+                col += 1
+                continue
+            cell = cells.pop(0)
+            colspan = int(cell.get("colspan", 1) or 1)
+            rowspan = int(cell.get("rowspan", 1) or 1)
+            for _ in range(colspan):
+                row.append(cell)
+                if rowspan > 1:
+                    pending[col] = [cell, rowspan - 1]
+                col += 1
+        grid.append(row)
+    return grid
+
+
+def parse_timetable_html(html: str, meta: Optional[Dict[str, str]] = None) -> List[TimetableEntry]:
+    """
+    Extrahiert Termine aus einer gespeicherten Stundenplan-Seite.
+    Unterstützt FullCalendar-Markup (PrimeFaces-Schedule, .fc-event) und Tabellen mit Wochentag-Köpfen.
+    """
+    from bs4 import BeautifulSoup  # nur für Ingest benötigt
+
+    soup = BeautifulSoup(html, "html.parser")
+    meta = meta or {}
+    entries: List[TimetableEntry] = []
+
+    # 1) FullCalendar: Wochentag aus data-date der Spalte, Text aus dem Event-Block
+    for ev in soup.select(".fc-event, .fc-timegrid-event"):
+        col = ev.find_parent(attrs={"data-date": True})
+        weekday = None
+        if col is not None:
+            try:
+                weekday = date.fromisoformat(col["data-date"][:10]).weekday()
+            except ValueError:
+                weekday = parse_weekday(col["data-date"], allow_abbrev=True)
+        parsed = parse_entry_text(ev.get_text("\n", strip=True))
+        if parsed and weekday is not None:
+            entries.append({**parsed, "weekday": weekday})
+
+    # 2) Tabellenraster: Kopfzeile mit Wochentagen, Zellen mit Zeitspanne
+    if not entries:
+        for table in soup.find_all("table"):
+            grid = _grid(table)
+            header_idx, day_cols = None, {}
+            for r, row in enumerate(grid):
+                cols = {c: parse_weekday(cell.get_text(" ", strip=True), allow_abbrev=True) for c, cell in enumerate(row)}
+                cols = {c: d for c, d in cols.items() if d is not None}
+                if len(cols) >= 2:
+                    header_idx, day_cols = r, cols
+                    break
+            if header_idx is None:
+                continue
+            seen = set()
+            for row in grid[header_idx + 1 :]:
+                row_label = row[0].get_text(" ", strip=True) if row else ""
+                for c, weekday in day_cols.items():
+                    if c >= len(row) or id(row[c]) in seen:
+                        continue
+                    seen.add(id(row[c]))
+                    text = row[c].get_text("\n", strip=True)
+                    if not _TIME_RANGE_RE.search(text) and _TIME_RANGE_RE.search(row_label):
+                        text = f"{_TIME_RANGE_RE.search(row_label).group(0)}\n{text}"
+                    parsed = parse_entry_text(text)
+                    if parsed:
+                        entries.append({**parsed, "weekday": weekday})
+
+    for e in entries:
+        for key in ("faculty", "major", "semester", "source_file"):
+            e[key] = meta.get(key, "") or ""
+    return entries
+
+
+# ----------------- SQLite-Index -----------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lectures (
+    course TEXT NOT NULL,
+    course_norm TEXT NOT NULL,
+    weekday INTEGER NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    room TEXT,
+    lecturer TEXT,
+    faculty TEXT,
+    major TEXT,
+    semester TEXT,
+    source_file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lectures_course ON lectures(course_norm);
+CREATE INDEX IF NOT EXISTS idx_lectures_partition ON lectures(faculty, major, semester);
+CREATE INDEX IF NOT EXISTS idx_lectures_source ON lectures(source_file);
+"""
+
+_COLUMNS = ("course", "weekday", "start", "end", "room", "lecturer", "faculty", "major", "semester", "source_file")
+
+_conn_lock = threading.Lock()
+_connections: Dict[str, sqlite3.Connection] = {}
+_course_cache: Dict[str, List[str]] = {}
+
+
+def _connect(db_path: Path = TIMETABLE_DB_PATH) -> sqlite3.Connection:
+    key = str(db_path)
+    with _conn_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            if key != ":memory:":
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(key, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.executescript(_SCHEMA)
+            _connections[key] = conn
+        return conn
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall((text or "").lower()))
+
+
+def write_entries(
+    entries: Iterable[TimetableEntry],
+    db_path: Path = TIMETABLE_DB_PATH,
+    source_files: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Ersetzt alle Zeilen der betroffenen Dateien durch `entries` (idempotent je Datei).
+    source_files: zu ersetzende Dateien; Standard sind die source_files der Einträge.
+    """
+    entries = list(entries)
+    sources = set(source_files) if source_files is not None else {e.get("source_file", "") for e in entries}
+    conn = _connect(db_path)
+    with _conn_lock, conn:
+        for source in sources:
+            conn.execute("DELETE FROM lectures WHERE source_file = ?", (source,))
+        conn.executemany(
+            f"INSERT INTO lectures (course_norm, {', '.join(_COLUMNS)}) VALUES (?, {', '.join('?' for _ in _COLUMNS)})",
+            [(_normalize(e.get("course", "")), *[e.get(c, "") for c in _COLUMNS]) for e in entries],
+        )
+    _course_cache.pop(str(db_path), None)
+    return len(entries)
+
+
+def query_entries(
+    course: Optional[str] = None,
+    weekday: Optional[int] = None,
+    faculty: Optional[str] = None,
+    major: Optional[str] = None,
+    semester: Optional[str] = None,
+    db_path: Path = TIMETABLE_DB_PATH,
+) -> List[TimetableEntry]:
+    """Direkter Lookup im Index; `course` matcht als Teilstring des normalisierten Namens."""
+    where, params = [], []
+    if course:
+        where.append("course_norm LIKE ?")
+        params.append(f"%{_normalize(course)}%")
+    for col, val in (("weekday", weekday), ("faculty", faculty), ("major", major), ("semester", semester)):
+        if val is not None and val != "":
+            where.append(f"{col} = ?")
+            params.append(val)
+    sql = f"SELECT {', '.join(_COLUMNS)} FROM lectures"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY weekday, start, course"
+    rows = _connect(db_path).execute(sql, params).fetchall()
+    return [dict(r) for r in rows]  # type: ignore[misc]
+
+
+def _known_courses(db_path: Path) -> List[str]:
+    key = str(db_path)
+    if key not in _course_cache:
+        rows = _connect(db_path).execute("SELECT DISTINCT course_norm FROM lectures").fetchall()
+        _course_cache[key] = [r[0] for r in rows]
+    return _course_cache[key]
+
+
+def match_courses(question: str, db_path: Path = TIMETABLE_DB_PATH, min_score: float = 0.5) -> List[str]:
+    """Findet die im Index bekannten Veranstaltungen, die in der Frage gemeint sind (Token-/Präfix-Überlappung)."""
+    q_tokens = [t for t in _normalize(question).split() if t not in _STOPWORDS and len(t) >= 2]
+    if not q_tokens:
+        return []
+    scored = []
+    for course in _known_courses(db_path):
+        c_tokens = [t for t in course.split() if t not in _STOPWORDS]
+        if not c_tokens:
+            continue
+        hits = sum(1 for ct in c_tokens if any(ct == qt or (len(qt) >= 4 and ct.startswith(qt)) for qt in q_tokens))
+        score = hits / len(c_tokens)
+        if score >= min_score:
+            scored.append((score, course))
+    if not scored:
+        return []
+    best = max(s for s, _ in scored)
+    return [c for s, c in scored if s == best]
+
+
+def lookup(
+    question: str,
+    faculty: Optional[str] = None,
+    major: Optional[str] = None,
+    semester: Optional[str] = None,
+    db_path: Path = TIMETABLE_DB_PATH,
+) -> List[TimetableEntry]:
+    """Beantwortet 'wann/wo ist X' direkt aus dem Index; leer, wenn keine Veranstaltung erkannt wurde."""
+    courses = match_courses(question, db_path)
+    weekday = parse_weekday(question)
+    results: List[TimetableEntry] = []
+    for course in courses:
+        results.extend(query_entries(course, weekday, faculty, major, semester, db_path=db_path))
+    return results
+
+
+def known_semesters(db_path: Path = TIMETABLE_DB_PATH) -> List[str]:
+    rows = _connect(db_path).execute("SELECT DISTINCT semester FROM lectures WHERE semester != ''").fetchall()
+    return [r[0] for r in rows]
+
+
+def extract_timetable_filters(query: str, known: Optional[Iterable[str]] = None) -> Dict[str, object]:
+    """
+    Leitet aus der Frage einen Metadatenfilter ab, z.B. "INFB 3" → {"semester": "INFB.3"}.
+    Ohne Semesterzahl wird auf alle bekannten Semester des Kürzels gefiltert ({"semester": {"$in": [...]}}).
+    """
+    known = list(known) if known is not None else []
+    known_upper = {k.upper(): k for k in known}
+    for m in _SEMESTER_CODE_RE.finditer(query or ""):
+        code, number = m.group(1).upper(), m.group(2) or m.group(3)
+        if not known and not m.group(1).isupper():
+            continue  # "infb 3" nur gegen bekannte Semester auflösen, sonst würde "die 3" zu "DIE.3"
+        if number:
+            candidate = f"{code}.{int(number)}"
+            if not known or candidate.upper() in known_upper:
+                return {"semester": known_upper.get(candidate.upper(), candidate)}
+        matches = [k for k in known if k.upper().split(".")[0] == code]
+        if matches:
+            return {"semester": matches[0]} if len(matches) == 1 else {"semester": {"$in": sorted(matches)}}
+    return {}
+
+
+def format_entries(entries: List[TimetableEntry]) -> str:
+    """Deterministische Antwort ohne LLM."""
+    lines = []
+    for e in entries:
+        line = f"- {e['course']}: {WEEKDAYS[e['weekday']]}, {e['start']}–{e['end']} Uhr"
+        if e.get("room"):
+            line += f", Raum {e['room']}"
+        if e.get("lecturer"):
+            line += f" ({e['lecturer']})"
+        lines.append(line)
+    sources = sorted({e["source_file"] for e in entries if e.get("source_file")})
+    text = "Laut Stundenplan:\n" + "\n".join(lines)
+    if sources:
+        text += "\n\nQuelle(n): " + ", ".join(sources)
+    return text
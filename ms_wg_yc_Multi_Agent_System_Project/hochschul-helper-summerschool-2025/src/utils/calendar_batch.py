@@ -0,0 +1,36 @@
+# src/utils/calendar_batch.py
+from __future__ import annotations
+
+from typing import List, Sequence
+
+# Obergrenze der Google Calendar API pro Batch-Request
+BATCH_LIMIT = 50
+
+
+def batch_insert_events(api_resource, calendar_id: str, bodies: Sequence[dict], batch_size: int = BATCH_LIMIT) -> List[dict]:
+    """
+    Legt viele Events mit einem HTTP-Roundtrip pro `batch_size` Events an (googleapiclient Batch-Request).
+    Ergebnis in Eingabereihenfolge: {"index", "summary", "ok", "event" | "error"} pro Event; ein Fehler bricht den Rest nicht ab.
+    """
+    results: List[dict] = [{"index": i, "summary": body.get("summary"), "ok": False, "error": "not executed"} for i, body in enumerate(bodies)]
+    batch_size = max(1, min(batch_size, BATCH_LIMIT))
+
+    def _callback(request_id, response, exception):
+        i = int(request_id)
+        if exception is not None:
+            results[i].update(ok=False, error=str(exception))
+        else:
+            results[i].update(ok=True, event=response)
+            results[i].pop("error", None)
+
+    for start in range(0, len(bodies), batch_size):
+        batch = api_resource.new_batch_http_request(callback=_callback)
+        for i in range(start, min(start + batch_size, len(bodies))):
+            batch.add(api_resource.events().insert(calendarId=calendar_id, body=bodies[i]), request_id=str(i))
+        try:
+            batch.execute()
+        except Exception as e:  # Transportfehler: gesamter Batch fehlgeschlagen
+            for i in range(start, min(start + batch_size, len(bodies))):
+                if not results[i]["ok"]:
+                    results[i]["error"] = str(e)
+    return results
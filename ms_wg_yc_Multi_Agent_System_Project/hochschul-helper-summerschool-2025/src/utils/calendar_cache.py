@@ -0,0 +1,136 @@
+# src/utils/calendar_cache.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Innerhalb dieses Fensters wird ohne API-Aufruf aus dem Cache gelesen; danach holt ein syncToken-Request nur Änderungen
+CALENDAR_SYNC_TTL_S = float(os.getenv("CALENDAR_SYNC_TTL_S", 30))
+_PAGE_SIZE = 250
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    resp = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+    status = getattr(resp, "status", None) or getattr(error, "status_code", None)
+    return int(status) if status is not None else None
+
+
+def event_start(event: dict, default_tz=timezone.utc) -> datetime:
+    """Start eines API-Events als aware datetime; ganztägige Termine beginnen um 00:00 in default_tz."""
+    start = event.get("start", {})
+    if "dateTime" in start:
+        return datetime.fromisoformat(start["dateTime"].replace("Z", "+00:00"))
+    return datetime.fromisoformat(start["date"]).replace(tzinfo=default_tz)
+
+
+def event_end(event: dict, default_tz=timezone.utc) -> datetime:
+    end = event.get("end", {})
+    if "dateTime" in end:
+        return datetime.fromisoformat(end["dateTime"].replace("Z", "+00:00"))
+    if "date" in end:
+        return datetime.fromisoformat(end["date"]).replace(tzinfo=default_tz)
+    return event_start(event, default_tz)
+
+
+class CalendarEventCache:
+    """
+    Lokale Kopie der Events eines Kalenders, aktuell gehalten über die inkrementelle Synchronisation der Calendar API:
+    einmal vollständig laden, danach mit `syncToken` nur Änderungen (inkl. gelöschter Events als status=cancelled).
+    """
+
+    def __init__(self, api_resource, calendar_id: str, ttl: float = CALENDAR_SYNC_TTL_S, clock: Callable[[], float] = time.monotonic):
+        self.api_resource = api_resource
+        self.calendar_id = calendar_id
+        self.ttl = ttl
+        self._clock = clock
+        self._events: Dict[str, dict] = {}
+        self._sync_token: Optional[str] = None
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {"full_syncs": 0, "incremental_syncs": 0, "cache_reads": 0}
+
+    # ----- Synchronisation -----
+    def _fetch(self, sync_token: Optional[str]) -> None:
+        page_token = None
+        while True:
+            # gleiche Parameter wie beim Voll-Sync; mit syncToken liefert die API gelöschte Events automatisch mit
+            params = {"calendarId": self.calendar_id, "singleEvents": True, "maxResults": _PAGE_SIZE}
+            if sync_token:
+                params["syncToken"] = sync_token
+            if page_token:
+                params["pageToken"] = page_token
+            result = self.api_resource.events().list(**params).execute()
+            for event in result.get("items", []):
+                if event.get("status") == "cancelled":
+                    self._events.pop(event["id"], None)
+                else:
+                    self._events[event["id"]] = event
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                self._sync_token = result.get("nextSyncToken")
+                return
+
+    def sync(self, force: bool = False) -> None:
+        with self._lock:
+            now = self._clock()
+            if not force and self._synced_at is not None and now - self._synced_at < self.ttl:
+                self.stats["cache_reads"] += 1
+                return
+            if self._sync_token:
+                try:
+                    self._fetch(self._sync_token)
+                    self.stats["incremental_syncs"] += 1
+                    self._synced_at = now
+                    return
+                except Exception as e:
+                    if _status_code(e) != 410:  # 410 Gone: Token abgelaufen → vollständig neu laden
+                        raise
+            self._events.clear()
+            self._fetch(None)
+            self.stats["full_syncs"] += 1
+            self._synced_at = now
+
+    def invalidate(self) -> None:
+        """Nächster Zugriff synchronisiert sofort (Token bleibt erhalten, es werden nur Änderungen geholt)."""
+        with self._lock:
+            self._synced_at = None
+
+    # ----- Lokale Schreibzugriffe (write-through nach erfolgreichem API-Aufruf) -----
+    def upsert(self, event: dict) -> None:
+        with self._lock:
+            if event.get("id"):
+                self._events[event["id"]] = event
+
+    def remove(self, event_id: str) -> None:
+        with self._lock:
+            self._events.pop(event_id, None)
+
+    # ----- Lesen -----
+    def get(self, event_id: str) -> Optional[dict]:
+        self.sync()
+        return self._events.get(event_id)
+
+    def events_between(self, start: datetime, end: datetime, max_results: Optional[int] = None) -> List[dict]:
+        """Events, die das Fenster [start, end) überlappen, nach Startzeit sortiert (wie orderBy=startTime)."""
+        self.sync()
+        tz_default = start.tzinfo or timezone.utc
+        with self._lock:
+            events = [e for e in self._events.values() if event_end(e, tz_default) > start and event_start(e, tz_default) < end]
+        events.sort(key=lambda e: event_start(e, tz_default))
+        return events[:max_results] if max_results else events
+
+
+_caches: Dict[str, CalendarEventCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_event_cache(api_resource, calendar_id: str) -> CalendarEventCache:
+    """Ein Cache pro Kalender, geteilt von allen Calendar-Tools (neue api_resource → neuer Cache)."""
+    with _caches_lock:
+        cache = _caches.get(calendar_id)
+        if cache is None or cache.api_resource is not api_resource:
+            cache = _caches[calendar_id] = CalendarEventCache(api_resource, calendar_id)
+        return cache
@@ -4,11 +4,12 @@ from typing import Any, Dict, List, Optional, Type
 
 from dateutil import parser, tz
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from langchain_google_community import CalendarToolkit
 from pydantic import BaseModel, Field
 
+from src.utils.calendar_batch import batch_insert_events
+from src.utils.calendar_cache import get_event_cache
+from src.utils.recurrence import normalize_rrule
+
 load_dotenv()
 
 # Path of service account JSON key
@@ -20,14 +21,40 @@ SCOPES = ["https://www.googleapis.com/auth/calendar"]
 # Test Calender ID
 CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID")
 
-# create credential using service account
-credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+_api_resource = None
+_toolkit = None
+
+
+def get_api_resource():
+    """Calendar-API-Resource beim ersten Zugriff bauen (liest die Service-Account-Datei, Discovery-Aufruf)."""
+    global _api_resource
+    if _api_resource is None:
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+
+        # create credential using service account
+        credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+        # build the api resource manually
+        _api_resource = build("calendar", "v3", credentials=credentials)
+    return _api_resource
+
+
+def get_toolkit():
+    global _toolkit
+    if _toolkit is None:
+        from langchain_google_community import CalendarToolkit
+
+        _toolkit = CalendarToolkit(api_resource=get_api_resource())
+    return _toolkit
 
-# build teh api resource manually
-api_resource = build("calendar", "v3", credentials=credentials)
 
-# initialize the toolkit with the api_resource
-toolkit = CalendarToolkit(api_resource=api_resource)
+def __getattr__(name: str):
+    # Abwärtskompatibel: `api_resource` / `toolkit` als Modulattribute, aber erst bei Zugriff erzeugt
+    if name == "api_resource":
+        return get_api_resource()
+    if name == "toolkit":
+        return get_toolkit()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class GoogleCalendarBaseTool:
@@ -65,15 +92,12 @@ class ListGoogleCalendarEvents(GoogleCalendarBaseTool):
 
     def _run(self, start_datetime, end_datetime, max_results=10, timezone="Europe/Berlin"):
         calendar_id = CALENDAR_ID
-        events = []
         start = datetime.strptime(start_datetime, "%Y-%m-%dT%H:%M:%S")
-        start = start.replace(tzinfo=tz.gettz(timezone)).isoformat()
+        start = start.replace(tzinfo=tz.gettz(timezone))
         end = datetime.strptime(end_datetime, "%Y-%m-%dT%H:%M:%S")
-        end = end.replace(tzinfo=tz.gettz(timezone)).isoformat()
-        events_result = self.api_resource.events().list(calendarId=calendar_id, timeMin=start, timeMax=end, maxResults=max_results, singleEvents=True, orderBy="startTime").execute()
-        cal_events = events_result.get("items", [])
-        events.extend(cal_events)
-        events = sorted(events, key=lambda x: x["start"].get("dateTime", x["start"].get("date")))
+        end = end.replace(tzinfo=tz.gettz(timezone))
+        # gemeinsamer Event-Cache aller Calendar-Tools; holt per syncToken nur Änderungen seit dem letzten Aufruf
+        events = get_event_cache(self.api_resource, calendar_id).events_between(start, end, max_results)
         return [self._parse_event(e, timezone) for e in events]
 
 
@@ -84,24 +108,67 @@ class CreateEventSchema(BaseModel):
     location: Optional[str] = Field(default="", description="Event location")
     description: Optional[str] = Field(default="", description="Event description")
     timezone: str = Field(default="Europe/Berlin", description="Timezone (TZ database name)")
+    recurrence: Optional[str] = Field(default=None, description="RRULE for recurring events, e.g. RRULE:FREQ=WEEKLY;UNTIL=20260131T235959Z")
+
+
+def event_body(start_datetime, end_datetime, summary, location="", description="", timezone="Europe/Berlin", recurrence=None) -> dict:
+    start = datetime.strptime(start_datetime, "%Y-%m-%dT%H:%M:%S")
+    start = start.replace(tzinfo=tz.gettz(timezone)).isoformat()
+    end = datetime.strptime(end_datetime, "%Y-%m-%dT%H:%M:%S")
+    end = end.replace(tzinfo=tz.gettz(timezone)).isoformat()
+    body = {"summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}}
+    if location:
+        body["location"] = location
+    if description:
+        body["description"] = description
+    if recurrence:
+        # Serienevents brauchen eine Zeitzone, sonst lehnt die API die RRULE ab
+        body["recurrence"] = [normalize_rrule(recurrence)]
+        body["start"]["timeZone"] = timezone
+        body["end"]["timeZone"] = timezone
+    return body
+
+
+def _remember_created(api_resource, calendar_id, event) -> None:
+    cache = get_event_cache(api_resource, calendar_id)
+    if event.get("recurrence"):
+        cache.invalidate()  # Cache hält Einzeltermine (singleEvents) → Instanzen beim nächsten Lesen synchronisieren
+    else:
+        cache.upsert(event)
 
 
 class CreateGoogleCalendarEvent(GoogleCalendarBaseTool):
-    def _run(self, start_datetime, end_datetime, summary, location="", description="", timezone="Europe/Berlin"):
+    def _run(self, start_datetime, end_datetime, summary, location="", description="", timezone="Europe/Berlin", recurrence=None):
         calendar_id = CALENDAR_ID
-        start = datetime.strptime(start_datetime, "%Y-%m-%dT%H:%M:%S")
-        start = start.replace(tzinfo=tz.gettz(timezone)).isoformat()
-        end = datetime.strptime(end_datetime, "%Y-%m-%dT%H:%M:%S")
-        end = end.replace(tzinfo=tz.gettz(timezone)).isoformat()
-        body = {"summary": summary, "start": {"dateTime": start}, "end": {"dateTime": end}}
-        if location:
-            body["location"] = location
-        if description:
-            body["description"] = description
+        body = event_body(start_datetime, end_datetime, summary, location, description, timezone, recurrence)
         event = self.api_resource.events().insert(calendarId=calendar_id, body=body).execute()
+        _remember_created(self.api_resource, calendar_id, event)
         return "Event created: " + event.get("htmlLink", "Failed to create event")
 
 
+class CreateGoogleCalendarEventsBatch(GoogleCalendarBaseTool):
+    """Legt viele Events per Batch-HTTP an (ein Roundtrip je 50 Events) und liefert den Status pro Event."""
+
+    def _run(self, events: List[Dict[str, Any]], timezone="Europe/Berlin") -> List[Dict[str, Any]]:
+        calendar_id = CALENDAR_ID
+        results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+        bodies, positions = [], []
+        for i, e in enumerate(events):
+            try:
+                title = e.get("title") or e.get("summary") or "HKA Termin"
+                bodies.append(event_body(e["start"], e["end"], title, e.get("location", ""), e.get("description", ""), timezone, e.get("recurrence")))
+                positions.append(i)
+            except (KeyError, TypeError, ValueError) as err:
+                results[i] = {"summary": e.get("title") or e.get("summary"), "ok": False, "error": f"invalid event data: {err}"}
+        for pos, res in zip(positions, batch_insert_events(self.api_resource, calendar_id, bodies)):
+            if res["ok"]:
+                _remember_created(self.api_resource, calendar_id, res["event"])
+                results[pos] = {"summary": res["summary"], "ok": True, "link": res["event"].get("htmlLink"), "id": res["event"].get("id")}
+            else:
+                results[pos] = {"summary": res["summary"], "ok": False, "error": res["error"]}
+        return results
+
+
 class DeleteEventSchema(BaseModel):
     event_id: str = Field(..., description="The event ID to delete.")
     calendar_id: Optional[str] = Field(default=None, description="The calendar ID. Defaults to your test calendar.")
@@ -123,6 +190,7 @@ class DeleteGoogleCalendarEvent:
         calendar_id = calendar_id or self.calendar_id
         try:
             self.api_resource.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+            get_event_cache(self.api_resource, calendar_id).remove(event_id)
             return f"Event {event_id} deleted from calendar {calendar_id}."
         except Exception as e:
             return f"Failed to delete event: {e}"
@@ -164,6 +232,7 @@ class PostponeGoogleCalendarEvent:
             event["end"]["timeZone"] = timezone
 
             updated_event = self.api_resource.events().update(calendarId=calendar_id, eventId=event_id, body=event).execute()
+            get_event_cache(self.api_resource, calendar_id).upsert(updated_event)
 
             return f"Event postponed: {updated_event.get('htmlLink', 'No link')}"
         except Exception as e:
@@ -0,0 +1,165 @@
+# src/utils/llm_resilience.py
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Fehlerklassen ohne Statuscode, die auf ein vorübergehendes Problem hindeuten (openai/httpx)
+_TRANSIENT_ERRORS = {"APITimeoutError", "APIConnectionError", "TimeoutError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError"}
+
+_stats: Dict[str, int] = {"calls": 0, "retries": 0, "fallbacks": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+_stats_lock = threading.Lock()
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += n
+
+
+def get_llm_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_llm_stats() -> None:
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+# ----------------- Fehlerklassifikation -----------------
+def status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return int(status) if status is not None else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """429, 408/409 und 5xx sowie Timeouts/Verbindungsabbrüche sind vorübergehend – alles andere nicht."""
+    status = status_code(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in _TRANSIENT_ERRORS or isinstance(error, TimeoutError)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Retry-After-Header (Sekunden) einer 429-Antwort, falls vorhanden."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: Callable[[float, float], float] = random.uniform) -> float:
+    """Full Jitter: zufällig in [0, min(cap, base * 2^attempt)] – verteilt Wiederholungen vieler Clients."""
+    return rng(0.0, min(cap, base * (2**attempt)))
+
+
+# ----------------- Aufrufstrategien -----------------
+def call_with_retries(
+    fn: Callable[[], T],
+    max_retries: int,
+    base: float,
+    cap: float,
+    sleep: Optional[Callable[[float], None]] = None,
+) -> T:
+    """Ruft fn auf und wiederholt vorübergehende Fehler bis zu max_retries-mal mit gejittertem Backoff."""
+    sleep = sleep or time.sleep  # erst beim Aufruf auflösen, damit time.sleep patchbar bleibt
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base, cap)
+            hinted = retry_after(e)
+            _count("retries")
+            sleep(min(cap, max(delay, hinted)) if hinted is not None else delay)
+    raise AssertionError("unreachable")
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        return _hedge_pool
+
+
+def _hedged(models: Sequence[str], call_model: Callable[[str], T], hedge_after: float) -> T:
+    """
+    Erstes Modell starten; liefert es nach hedge_after Sekunden nichts, parallel das zweite – erste Antwort gewinnt.
+    Scheitert das erste vorher, startet das zweite sofort als normaler Fallback.
+    """
+    pool = _get_pool()
+    pending: Dict[Future, str] = {pool.submit(call_model, models[0]): models[0]}
+    hedged = False
+    done, _ = wait(pending, timeout=hedge_after)
+    if not done:
+        _count("hedges")
+        pending[pool.submit(call_model, models[1])] = models[1]
+        hedged = True
+    error: Optional[BaseException] = None
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            model = pending.pop(future)
+            if future.exception() is None:
+                if model != models[0] and hedged:
+                    _count("hedge_wins")
+                return future.result()  # Verlierer läuft im Hintergrund aus, sein Ergebnis wird verworfen
+            error = future.exception()
+            print(f"LLM {model} failed: {type(error).__name__}: {error}")
+            if model == models[0] and not hedged:
+                _count("fallbacks")
+                pending[pool.submit(call_model, models[1])] = models[1]
+                hedged = True
+    raise error  # type: ignore[misc]
+
+
+def call_with_fallback(models: Sequence[str], call_model: Callable[[str], T], hedge_after: float = 0.0) -> T:
+    """
+    Probiert die Modelle der Reihe nach (call_model enthält Timeout und Retries je Modell).
+    hedge_after > 0: die ersten beiden Modelle laufen gestaffelt parallel (Hedged Request), danach wie gehabt.
+    """
+    _count("calls")
+    models = list(models)
+    last_error: Optional[BaseException] = None
+    start = 0
+    if hedge_after > 0 and len(models) > 1:
+        try:
+            return _hedged(models, call_model, hedge_after)
+        except Exception as e:
+            last_error, start = e, 2
+    for i, model in enumerate(models[start:], start):
+        if i > 0:
+            _count("fallbacks")
+        try:
+            return call_model(model)
+        except Exception as e:
+            print(f"LLM {model} failed: {type(e).__name__}: {e}")
+            last_error = e
+    _count("failures")
+    raise last_error if last_error is not None else RuntimeError("no models configured")
+
+
+def parse_models(model: "str | Sequence[str]", fallbacks: "str | Sequence[str] | None" = None) -> List[str]:
+    """'a,b' oder ['a', 'b'] plus Fallbacks → geordnete Liste ohne Duplikate."""
+    out: List[str] = []
+    for group in (model, fallbacks or ()):
+        items = group.split(",") if isinstance(group, str) else group
+        for item in items:
+            item = item.strip()
+            if item and item not in out:
+                out.append(item)
+    return out
@@ -0,0 +1,217 @@
+# src/utils/rate_limiter.py
+from __future__ import annotations
+
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Prioritätsklassen: kleiner = früher dran. Nutzerantworten vor Routing (Guard/Supervisor/Scope) vor Batch (Evaluation)
+INTERACTIVE, ROUTING, BATCH = 0, 1, 2
+PRIORITIES = {"interactive": INTERACTIVE, "routing": ROUTING, "batch": BATCH}
+
+# Requests pro Minute je Bucket (0 = unbegrenzt); OpenRouter Free-Tier: 20/min über alle ":free"-Modelle eines Keys
+LLM_RPM = float(os.getenv("LLM_RPM", 20))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", 5))
+# Einzelne Limits: "openai/gpt-4o-mini=120,:free=20" (":free" = gemeinsamer Bucket aller Free-Modelle)
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+# Länger als so viele Sekunden wird pro LLM.chat() nicht auf Slots gewartet – über alle Retries und Fallbacks zusammen
+LLM_RATE_MAX_WAIT_S = float(os.getenv("LLM_RATE_MAX_WAIT_S", 60))
+
+FREE_BUCKET = ":free"
+
+
+class RateLimitTimeout(RuntimeError):
+    """Innerhalb von max_wait wurde kein Slot frei."""
+
+
+def parse_limits(spec: str) -> Dict[str, float]:
+    """'a=120, :free=20' → {'a': 120.0, ':free': 20.0}; ungültige Einträge werden ignoriert."""
+    out: Dict[str, float] = {}
+    for item in spec.split(","):
+        name, sep, value = item.strip().rpartition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            out[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return out
+
+
+def bucket_name(model: str, limits: Dict[str, float]) -> str:
+    """Eigenes Limit schlägt den Free-Bucket; alle übrigen ':free'-Modelle teilen sich einen Bucket."""
+    if model in limits:
+        return model
+    return FREE_BUCKET if model.endswith(":free") else model
+
+
+def key_id(api_key: object) -> str:
+    """Buckets werden je API-Key geführt – gespeichert wird nur ein Fingerprint, nie der Key selbst."""
+    return hashlib.sha256(str(api_key or "").encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    def __init__(self, rpm: float, burst: int, now: float):
+        self.rate = rpm / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Nach einem 429 des Servers: Bucket leeren, sodass frühestens nach `seconds` wieder ein Slot frei wird."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class RateScheduler:
+    """
+    Prozessweiter Token-Bucket-Scheduler je (Modell bzw. Free-Bucket, API-Key).
+    Wartende werden pro Bucket streng nach Priorität, innerhalb einer Klasse in Ankunftsreihenfolge bedient.
+    """
+
+    def __init__(
+        self,
+        rpm: float = LLM_RPM,
+        burst: int = LLM_RATE_BURST,
+        limits: Optional[Dict[str, float]] = None,
+        max_wait: float = LLM_RATE_MAX_WAIT_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rpm = rpm
+        self.burst = burst
+        self.limits = parse_limits(LLM_RATE_LIMITS) if limits is None else limits
+        self.max_wait = max_wait
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._queues: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        self._seq = itertools.count()
+        self.stats = {"granted": 0, "waited": 0, "wait_s": 0.0, "timeouts": 0, "throttled": 0}
+
+    def _bucket(self, model: str, api_key: object) -> Tuple[Tuple[str, str], Optional[TokenBucket]]:
+        name = bucket_name(model, self.limits)
+        key = (name, key_id(api_key))
+        rpm = self.limits.get(name, self.rpm)
+        if rpm <= 0:
+            return key, None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rpm, self.burst, self._clock())
+        return key, bucket
+
+    def acquire(self, model: str, api_key: object = None, priority: "int | str" = INTERACTIVE, max_wait: Optional[float] = None) -> float:
+        """Blockiert, bis ein Slot frei ist; gibt die Wartezeit in Sekunden zurück."""
+        priority = PRIORITIES.get(priority, priority) if isinstance(priority, str) else priority
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._cond:
+            key, bucket = self._bucket(model, api_key)
+            if bucket is None:
+                return 0.0
+            queue = self._queues.setdefault(key, [])
+            ticket = (priority, next(self._seq))
+            heapq.heappush(queue, ticket)
+            start = self._clock()
+            try:
+                while True:
+                    now = self._clock()
+                    delay = bucket.wait_time(now) if queue[0] == ticket else None
+                    if delay == 0.0:
+                        heapq.heappop(queue)
+                        bucket.take(now)
+                        waited = now - start
+                        self.stats["granted"] += 1
+                        if waited > 0:
+                            self.stats["waited"] += 1
+                            self.stats["wait_s"] += waited
+                        self._cond.notify_all()  # nächster in der Schlange prüft seinen Slot
+                        return waited
+                    remaining = start + max_wait - now
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise RateLimitTimeout(f"kein Slot für {model} nach {max_wait:.0f}s")
+                    self._cond.wait(remaining if delay is None else min(delay, remaining))
+            except BaseException:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                    self._cond.notify_all()
+                raise
+
+    def throttle(self, model: str, api_key: object, seconds: float) -> None:
+        """Server hat 429 geliefert: alle Aufrufer dieses Buckets pausieren, statt weiter anzuklopfen."""
+        with self._cond:
+            _, bucket = self._bucket(model, api_key)
+            if bucket is not None and seconds > 0:
+                bucket.pause(seconds, self._clock())
+                self.stats["throttled"] += 1
+                self._cond.notify_all()
+
+    def waiting(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def reset_stats(self) -> None:
+        with self._cond:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+class RateBudget:
+    """
+    Wartezeit-Budget eines LLM.chat()-Aufrufs über alle Retries und Fallbacks.
+    Ist ein Bucket einmal ausgelaufen, werden weitere Modelle desselben Buckets (z.B. andere ":free") übersprungen.
+    """
+
+    def __init__(self, scheduler: RateScheduler, max_wait: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.scheduler = scheduler
+        self._clock = clock
+        self.deadline = clock() + (scheduler.max_wait if max_wait is None else max_wait)
+        self.exhausted: Set[str] = set()
+
+    def acquire(self, model: str, api_key: object = None, priority: "int | str" = INTERACTIVE) -> float:
+        name = bucket_name(model, self.scheduler.limits)
+        if name in self.exhausted:
+            raise RateLimitTimeout(f"Bucket {name} in diesem Aufruf schon ohne Slot geblieben, {model} übersprungen")
+        try:
+            return self.scheduler.acquire(model, api_key, priority, max_wait=max(0.0, self.deadline - self._clock()))
+        except RateLimitTimeout:
+            self.exhausted.add(name)
+            raise
+
+
+_scheduler: Optional[RateScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_rate_scheduler() -> RateScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateScheduler()
+        return _scheduler
+
+
+def get_rate_stats() -> Dict[str, float]:
+    scheduler = get_rate_scheduler()
+    with scheduler._cond:
+        return dict(scheduler.stats)
+
+
+def reset_rate_stats() -> None:
+    get_rate_scheduler().reset_stats()
@@ -0,0 +1,69 @@
+# src/utils/recurrence.py
+from __future__ import annotations
+
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Optional, Sequence, Union
+
+# Ende der Vorlesungszeit für wöchentliche Serien; leer → nächster 31.07. (SoSe) bzw. 31.01. (WiSe) ab heute
+LECTURE_PERIOD_END = os.getenv("LECTURE_PERIOD_END", "")
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+_RRULE_RE = re.compile(r"^(?:RRULE:)?(FREQ=(?:" + "|".join(FREQUENCIES) + r")(?:;[A-Z]+=[A-Z0-9,+\-]+)*)$", re.IGNORECASE)
+
+
+def lecture_period_end(today: Optional[date] = None) -> date:
+    """Nächstes Vorlesungsende ab heute; in der vorlesungsfreien Zeit (Feb, Aug/Sep) das des folgenden Semesters."""
+    if LECTURE_PERIOD_END:
+        return date.fromisoformat(LECTURE_PERIOD_END)
+    today = today or date.today()
+    return min(end for end in (date(today.year, 1, 31), date(today.year, 7, 31), date(today.year + 1, 1, 31)) if end >= today)
+
+
+def build_rrule(
+    until: Union[date, datetime, None] = None,
+    count: Optional[int] = None,
+    freq: str = "WEEKLY",
+    interval: int = 1,
+    byday: Optional[Sequence[str]] = None,
+    floating: bool = False,
+) -> str:
+    """
+    RFC-5545-RRULE, z.B. "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959Z".
+    UNTIL ist UTC (Pflicht bei Startzeiten mit Zeitzone, z.B. Google Calendar); floating=True für ICS mit lokaler Zeit.
+    """
+    freq = freq.upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown FREQ '{freq}', choose one of {FREQUENCIES}")
+    if until is not None and count is not None:
+        raise ValueError("UNTIL and COUNT are mutually exclusive")
+    parts = [f"FREQ={freq}"]
+    if interval != 1:
+        parts.append(f"INTERVAL={int(interval)}")
+    if byday:
+        days = [d.upper() for d in byday]
+        if any(d not in WEEKDAYS for d in days):
+            raise ValueError(f"BYDAY must be from {WEEKDAYS}")
+        parts.append("BYDAY=" + ",".join(days))
+    if count is not None:
+        parts.append(f"COUNT={int(count)}")
+    if until is not None:
+        if isinstance(until, datetime):
+            if until.tzinfo is not None:
+                stamp = until.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            else:
+                stamp = until.strftime("%Y%m%dT%H%M%S") + ("" if floating else "Z")
+        else:
+            stamp = until.strftime("%Y%m%d") + "T235959" + ("" if floating else "Z")
+        parts.append(f"UNTIL={stamp}")
+    return "RRULE:" + ";".join(parts)
+
+
+def normalize_rrule(value: str) -> str:
+    """Akzeptiert "RRULE:FREQ=..." oder "FREQ=..." (z.B. aus LLM-Ausgaben) und liefert die kanonische Zeile."""
+    m = _RRULE_RE.match((value or "").strip().replace(" ", ""))
+    if not m:
+        raise ValueError(f"Invalid RRULE: {value!r}")
+    return "RRULE:" + m.group(1).upper()
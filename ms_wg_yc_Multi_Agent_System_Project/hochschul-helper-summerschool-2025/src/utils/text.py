@@ -0,0 +1,155 @@
+# src/utils/text.py
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_WS_RE = re.compile(r"\s+")
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+|\n{2,}")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", 0.85))
+
+
+def normalize_whitespace(text: str) -> str:
+    return _WS_RE.sub(" ", text or "").strip()
+
+
+def timetable_chunk_id(source_file: str, chunk_index: int, text: str) -> str:
+    """Id eines Stundenplan-Chunks in Chroma – dieselbe beim Ingest und beim Retrieval, stabil über Re-Ingests."""
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    return f"{source_file}:{chunk_index}:{digest}"
+
+
+def normalize_url(url: str) -> str:
+    """Vergleichbare URL: Host klein, ohne Fragment, Tracking-Parameter und abschließenden Slash."""
+    parts = urlsplit((url or "").strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(_TRACKING_PARAMS)])
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def content_hash(text: str) -> str:
+    """Stabiler Hash über whitespace-normalisierten, kleingeschriebenen Text."""
+    return hashlib.sha1(normalize_whitespace(text).lower().encode("utf-8")).hexdigest()
+
+
+def dedupe_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Entfernt Websuch-Treffer mit gleicher URL oder gleichem Inhalt; der erste Treffer gewinnt."""
+    seen_urls, seen_hashes = set(), set()
+    unique: List[Dict[str, Any]] = []
+    for r in results:
+        url = normalize_url(r.get("url") or "")
+        digest = content_hash(r.get("content") or "") if r.get("content") else None
+        if (url and url in seen_urls) or (digest and digest in seen_hashes):
+            continue
+        if url:
+            seen_urls.add(url)
+        if digest:
+            seen_hashes.add(digest)
+        unique.append(r)
+    return unique
+
+
+# ----------------- Token-Budget & Kontext-Packing -----------------
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Tokenzahl via tiktoken (cl100k_base); ohne tiktoken grob 4 Zeichen pro Token."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text or ""))
+    return (len(text or "") + 3) // 4
+
+
+def _shingles(text: str, n: int = 3) -> set:
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < n:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + n]) for i in range(len(words) - n + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Kürzt auf ganze Sätze innerhalb von `max_tokens`; passt nicht einmal ein Satz, wird wortweise gekürzt."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    out: List[str] = []
+    used = 0
+    for sentence in _SENTENCE_RE.split(text):
+        cost = count_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            break
+        out.append(sentence)
+        used += cost
+    if out:
+        return " ".join(out)
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > max_tokens:
+        words = words[: max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+    return " ".join(words)
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    *,
+    near_duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    min_tail_tokens: int = 40,
+    overhead_tokens: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Wählt Kontext-Chunks für einen Prompt innerhalb eines Token-Budgets.
+    - chunks: Dicts mit "text" und optional "score" (höher = relevanter); ohne Score zählt die Reihenfolge
+    - nahezu identische Chunks (Jaccard über Wort-Trigramme) werden verworfen
+    - der letzte passende Chunk wird an einer Satzgrenze gekürzt, wenn noch >= `min_tail_tokens` frei sind
+    - overhead_tokens: pro Chunk reservierte Tokens für Label/Trenner des Aufrufers
+    Rückgabe: Kopien der gewählten Chunks in Relevanzreihenfolge, "text" ggf. gekürzt.
+    """
+    order = list(range(len(chunks)))
+    if chunks and all(c.get("score") is not None for c in chunks):
+        order.sort(key=lambda i: chunks[i]["score"], reverse=True)
+    packed: List[Dict[str, Any]] = []
+    kept_shingles: List[set] = []
+    remaining = token_budget
+    for i in order:
+        chunk = chunks[i]
+        text = (chunk.get("text") or "").strip()
+        if not text:
+            continue
+        sh = _shingles(text)
+        if any(_jaccard(sh, other) >= near_duplicate_threshold for other in kept_shingles):
+            continue
+        available = remaining - overhead_tokens
+        cost = count_tokens(text)
+        if cost > available:
+            if available < min_tail_tokens:
+                break
+            text = truncate_to_tokens(text, available)
+            if not text:
+                break
+            cost = count_tokens(text)
+        packed.append({**chunk, "text": text})
+        kept_shingles.append(sh)
+        remaining -= cost + overhead_tokens
+        if remaining <= overhead_tokens:
+            break
+    return packed
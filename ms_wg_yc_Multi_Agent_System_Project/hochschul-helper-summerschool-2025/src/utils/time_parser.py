@@ -0,0 +1,325 @@
+# src/utils/time_parser.py
+# Deterministische DE/EN-Zeitangaben für Kalender-Anfragen; was nicht erkannt wird, liefert None → LLM-Fallback
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+WEEKDAYS = {
+    "montag": 0, "monday": 0, "dienstag": 1, "tuesday": 1, "mittwoch": 2, "wednesday": 2, "donnerstag": 3, "thursday": 3,
+    "freitag": 4, "friday": 4, "samstag": 5, "saturday": 5, "sonntag": 6, "sunday": 6,
+}
+RELATIVE_DAYS = {"heute": 0, "today": 0, "morgen": 1, "tomorrow": 1, "übermorgen": 2, "uebermorgen": 2}
+
+_NUMBER_WORDS = {
+    "ein": 1, "eine": 1, "einer": 1, "einen": 1, "zwei": 2, "drei": 3, "vier": 4, "fünf": 5, "sechs": 6, "sieben": 7, "acht": 8,
+    "neun": 9, "zehn": 10, "zwölf": 12, "fünfzehn": 15, "zwanzig": 20, "dreißig": 30, "anderthalb": 1.5, "eineinhalb": 1.5,
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "fifteen": 15, "twenty": 20, "thirty": 30,
+}
+_UNITS = [
+    (r"wochen?|weeks?|wk", timedelta(weeks=1)),
+    (r"tage?n?|days?", timedelta(days=1)),
+    (r"stunden?|std\.?|hours?|hrs?|h", timedelta(hours=1)),
+    (r"minuten?|min\.?|minutes?|mins?", timedelta(minutes=1)),
+]
+_NUM = r"(\d+(?:[.,]\d+)?|" + "|".join(sorted(map(re.escape, _NUMBER_WORDS), key=len, reverse=True)) + r")"
+_DURATION_RE = re.compile(rf"\b{_NUM}\s*(" + "|".join(u for u, _ in _UNITS) + r")(?![a-zäöü])", re.IGNORECASE)
+_COMPACT_RE = re.compile(r"\b(\d{1,2})\s*h\s*(\d{1,2})\b", re.IGNORECASE)  # "1h30"
+_HALF_HOUR_RE = re.compile(r"\b(eine\s+)?halbe\s+stunde\b|\bhalf\s+an\s+hour\b|\bhalf\s+hour\b", re.IGNORECASE)
+_AND_HALF_RE = re.compile(r"\b(?:and\s+a\s+half|einhalb)\b", re.IGNORECASE)
+_EARLIER_RE = re.compile(r"\b(früher|frueher|vorziehen|vorverlegen|nach\s+vorne|earlier|sooner|vorher)\b", re.IGNORECASE)
+# Eine Dauer ist nur dann eine Verschiebung, wenn "um"/"by" davor oder eine Richtung dahinter steht
+_SHIFT_BEFORE_RE = re.compile(r"\b(?:um|by)\s+$", re.IGNORECASE)
+_SHIFT_AFTER_RE = re.compile(
+    r"\s*(?:später|spaeter|later|nach\s+hinten|früher|frueher|earlier|sooner|nach\s+vorne|vorziehen|vorverlegen)\b", re.IGNORECASE
+)
+_JOIN_RE = re.compile(r"\s*(?:und|and|,)?\s*", re.IGNORECASE)
+
+DATE_RE = re.compile(r"\b(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})\.(\d{1,2})\.(\d{2,4})?)")
+_UNIT_AHEAD = r"(?!\s*(?:" + "|".join(u for u, _ in _UNITS) + r")(?![a-zäöü]))"
+# Uhrzeit nur mit eindeutigem Marker oder "um 8" – "um 2 Stunden" ist eine Verschiebung, keine Uhrzeit.
+# "am" ist nur bei "10:30 am", "8am" oder "at 8 am" a.m. ("Mathe 1 am Montag" ist keine Uhrzeit, siehe _clock)
+CLOCK_RE = re.compile(
+    r"\bum\s+(?P<hu>\d{1,2})(?:[:.](?P<mu>\d{2}))?(?![\d.,:a-zäöü])(?!\s*(?:pm|a\.m\.|p\.m\.))" + _UNIT_AHEAD
+    + r"|\b(?P<h>\d{1,2})(?:[:.](?P<m>\d{2}))?\s*(?P<marker>uhr|am|pm|a\.m\.|p\.m\.)(?![a-z])"
+    + r"|\b(?P<hc>\d{1,2}):(?P<mc>\d{2})\b|\bhalb\s+(?P<half>\d{1,2})\b",
+    re.IGNORECASE,
+)
+# Zeitspanne "von 14 bis 16 Uhr", "14–16 Uhr", "2-4pm", "10:00-11:30" → Start und Ende
+_MARKER = r"uhr|am|pm|a\.m\.|p\.m\."
+_RANGE_RE = re.compile(
+    rf"(?P<von>\b(?:von|from|zwischen|between)\s+)?\b(?P<h1>\d{{1,2}})(?::(?P<m1>\d{{2}}))?\s*(?P<marker1>{_MARKER})?"
+    rf"\s*(?:-|–|—|bis|to|until)\s*(?P<h2>\d{{1,2}})(?::(?P<m2>\d{{2}}))?\s*(?P<marker2>{_MARKER})?(?![a-zäöü])" + _UNIT_AHEAD,
+    re.IGNORECASE,
+)
+_ENGLISH_AM_RE = re.compile(r"\d{1,2}(?::\d{2}\s*am|am)", re.IGNORECASE)
+_AT_RE = re.compile(r"\bat\s+$", re.IGNORECASE)
+_NEXT_WEEKDAY_RE = re.compile(r"\b(?:nächste[nmr]?|naechste[nmr]?|kommende[nmr]?|next|this\s+coming)\s+([a-zäöü]+)", re.IGNORECASE)
+_NEXT_WEEK_RE = re.compile(r"\b(?:nächste|naechste|kommende)\s+woche\b|\bnext\s+week\b", re.IGNORECASE)
+_TARGET_RE = re.compile(r"\b(?:auf|to|zu|until)\b", re.IGNORECASE)
+
+
+@dataclass
+class TimeHints:
+    dates: List[date] = field(default_factory=list)
+    weekdays: List[int] = field(default_factory=list)
+    times: List[Tuple[int, int]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.dates or self.weekdays or self.times)
+
+
+def _fold(text: str) -> str:
+    return (text or "").lower()
+
+
+def _number(token: str) -> float:
+    token = token.lower()
+    return _NUMBER_WORDS[token] if token in _NUMBER_WORDS else float(token.replace(",", "."))
+
+
+# ----------------- Dauer / Verschiebung -----------------
+def _blank(m: re.Match) -> str:
+    return " " * len(m.group(0))  # Offsets bleiben erhalten
+
+
+def _duration_spans(text: str) -> List[Tuple[int, int, timedelta]]:
+    """(start, ende, dauer) je Dauerangabe, nach Position sortiert."""
+    spans = [(m.start(), m.end(), timedelta(hours=int(m.group(1)), minutes=int(m.group(2)))) for m in _COMPACT_RE.finditer(text)]
+    text = _COMPACT_RE.sub(_blank, text)
+    spans += [(m.start(), m.end(), timedelta(minutes=30)) for m in _HALF_HOUR_RE.finditer(text)]
+    text = _HALF_HOUR_RE.sub(_blank, text)
+    for m in _DURATION_RE.finditer(text):
+        unit = next(delta for pattern, delta in _UNITS if re.fullmatch(pattern, m.group(2), re.IGNORECASE))
+        amount, end = _number(m.group(1)), m.end()
+        half = _AND_HALF_RE.search(text, m.end(), m.end() + 16)
+        if half:
+            amount, end = amount + 0.5, half.end()
+        spans.append((m.start(), end, unit * amount))
+    return sorted(spans, key=lambda span: span[0])
+
+
+def parse_duration(text: str) -> Optional[timedelta]:
+    """Summe aller Dauerangaben ("2 Stunden 15 Minuten", "1,5h", "eine halbe Stunde", "1h30"); None wenn keine."""
+    spans = _duration_spans(text or "")
+    return sum((delta for _, _, delta in spans), timedelta()) if spans else None
+
+
+def parse_shift(text: str) -> Optional[timedelta]:
+    """
+    Verschiebung mit Vorzeichen: "um 2h später" → +2h, "30 Minuten früher" / "by 1 hour earlier" → negativ.
+    Nur Dauern hinter "um"/"by" oder vor später/früher zählen – "das 2h-Meeting auf 15 Uhr" ist keine Verschiebung.
+    """
+    text = text or ""
+    groups: List[List] = []
+    for start, end, delta in _duration_spans(text):
+        # "2 Stunden 15 Minuten" / "1 hour and 30 minutes" → eine Angabe
+        if groups and _JOIN_RE.fullmatch(text[groups[-1][1] : start]):
+            groups[-1][1:] = [end, groups[-1][2] + delta]
+        else:
+            groups.append([start, end, delta])
+    shifts = [delta for start, end, delta in groups if _SHIFT_BEFORE_RE.search(text[:start]) or _SHIFT_AFTER_RE.match(text, end)]
+    if not shifts:
+        return None
+    duration = sum(shifts, timedelta())
+    return -duration if _EARLIER_RE.search(text) else duration
+
+
+# ----------------- Datum / Uhrzeit -----------------
+def _next_weekday(today: date, weekday: int) -> date:
+    """Nächstes Vorkommen nach heute ("Montag" am Montag gesagt → in einer Woche)."""
+    return today + timedelta(days=(weekday - today.weekday()) % 7 or 7)
+
+
+def _am_pm(hour: int, marker: Optional[str]) -> int:
+    marker = (marker or "").lower().replace(".", "")
+    if marker == "pm" and hour < 12:
+        return hour + 12
+    if marker == "am" and hour == 12:
+        return 0
+    return hour
+
+
+def _is_english_am(m: re.Match, text: str, marker_group: str) -> bool:
+    """Marker "am" gilt nur bei "10:30 am", "8am" oder "at 8 am" als a.m. – nicht beim deutschen "1 am Montag"."""
+    return m.group(marker_group).lower() != "am" or bool(
+        _ENGLISH_AM_RE.fullmatch(m.group(0).strip()) or _AT_RE.search(text[: m.start()])
+    )
+
+
+def _clock(m: re.Match, text: str) -> Optional[time]:
+    if m.group("half"):  # "halb 10" → 9:30
+        hour, minute = (int(m.group("half")) - 1) % 24, 30
+    elif m.group("hu"):
+        hour, minute = int(m.group("hu")), int(m.group("mu") or 0)
+    elif m.group("marker"):
+        if not _is_english_am(m, text, "marker"):
+            return None
+        hour, minute = _am_pm(int(m.group("h")), m.group("marker")), int(m.group("m") or 0)
+    else:
+        hour, minute = int(m.group("hc")), int(m.group("mc"))
+    return time(hour, minute) if hour < 24 and minute < 60 else None
+
+
+def _clocks(text: str) -> List[Tuple[int, time]]:
+    """(position, uhrzeit) aller eindeutigen Uhrzeiten."""
+    out = []
+    for m in CLOCK_RE.finditer(text):
+        clock = _clock(m, text)
+        if clock is not None:
+            out.append((m.start(), clock))
+    return out
+
+
+def _ranges(text: str) -> List[Tuple[int, time, time]]:
+    """(position, start, ende) aller Zeitspannen mit Uhrzeit-Marker, Doppelpunkt oder "von"."""
+    out = []
+    for m in _RANGE_RE.finditer(text):
+        marker1 = m.group("marker1") if m.group("marker1") and _is_english_am(m, text, "marker1") else None
+        marker2 = m.group("marker2") if m.group("marker2") and _is_english_am(m, text, "marker2") else None
+        if not (m.group("von") or marker1 or marker2 or m.group("m1") or m.group("m2")):
+            continue  # "2-3" allein ist keine Uhrzeit
+        h1, h2 = int(m.group("h1")), int(m.group("h2"))
+        end_hour = _am_pm(h2, marker2)
+        if marker1 is None and marker2 and _am_pm(h1, marker2) <= end_hour:
+            marker1 = marker2  # "2-4pm" → 14–16, aber "11-1pm" → 11–13
+        start_hour = _am_pm(h1, marker1)
+        m1, m2 = int(m.group("m1") or 0), int(m.group("m2") or 0)
+        if max(start_hour, end_hour) < 24 and max(m1, m2) < 60:
+            out.append((m.start(), time(start_hour, m1), time(end_hour, m2)))
+    return out
+
+
+def parse_clock(text: str) -> Optional[time]:
+    """Erste Uhrzeit im Text; bei einer Zeitspanne ("von 14 bis 16 Uhr") deren Start."""
+    text = text or ""
+    candidates = _clocks(text)[:1] + [(pos, start) for pos, start, _ in _ranges(text)[:1]]
+    return min(candidates, key=lambda c: c[0])[1] if candidates else None
+
+
+def parse_time_range(text: str) -> Optional[Tuple[time, time]]:
+    """Erste Zeitspanne ("14–16 Uhr", "2-4pm", "von 9 bis 10:30") als (start, ende); None ohne Spanne."""
+    ranges = _ranges(text or "")
+    return (ranges[0][1], ranges[0][2]) if ranges else None
+
+
+def parse_date(text: str, now: Optional[datetime] = None) -> Optional[date]:
+    """Erstes Datum im Text: relative Tage, (nächster) Wochentag, "nächste Woche Dienstag", 24.01.(2025), 2025-01-24."""
+    now = now or datetime.now()
+    today = now.date()
+    folded = _fold(text)
+    for word, offset in sorted(RELATIVE_DAYS.items(), key=lambda kv: len(kv[0]), reverse=True):
+        if re.search(rf"\b{_fold(word)}\b", folded):
+            return today + timedelta(days=offset)
+    m = DATE_RE.search(folded)
+    if m:
+        try:
+            if m.group(1):
+                return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+            year = int(m.group(6)) if m.group(6) else today.year
+            year = year + 2000 if year < 100 else year
+            parsed = date(year, int(m.group(5)), int(m.group(4)))
+            # "24.01." ohne Jahr im Dezember gesagt → nächstes Jahr
+            return parsed if m.group(6) or parsed >= today - timedelta(days=30) else parsed.replace(year=year + 1)
+        except ValueError:
+            pass
+    m = _NEXT_WEEKDAY_RE.search(folded)
+    if m and m.group(1) in WEEKDAYS:
+        return _next_weekday(today, WEEKDAYS[m.group(1)])
+    for m in re.finditer(r"[a-zäöü]+", folded):
+        weekday = WEEKDAYS.get(m.group(0))
+        if weekday is not None:
+            if _NEXT_WEEK_RE.search(folded):
+                return today + timedelta(days=7 - today.weekday() + weekday)
+            return _next_weekday(today, weekday)
+    if _NEXT_WEEK_RE.search(folded):
+        return today + timedelta(days=7 - today.weekday())  # Montag der nächsten Woche
+    return None
+
+
+def resolve_datetime(text: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Datum + Uhrzeit ("nächsten Montag 9:00"); ohne Datum, aber mit Uhrzeit → heute bzw. morgen, falls schon vorbei."""
+    now = now or datetime.now()
+    day = parse_date(text, now)
+    clock = parse_clock(text)
+    if day is None and clock is None:
+        return None
+    if day is None:
+        day = now.date() if clock > now.time() else now.date() + timedelta(days=1)
+    return datetime.combine(day, clock or time(0, 0))
+
+
+def resolve_event_time(text: str, now: Optional[datetime] = None) -> Optional[Tuple[datetime, Optional[datetime]]]:
+    """
+    (start, ende) eines neuen Termins – nur wenn Datum UND ausdrückliche Uhrzeit genannt sind, sonst None.
+    Ende aus einer Zeitspanne ("von 14 bis 16 Uhr") oder Dauer ("für 90 Minuten"), sonst None.
+    """
+    now = now or datetime.now()
+    day, clock = parse_date(text, now), parse_clock(text)
+    if day is None or clock is None:
+        return None
+    start = datetime.combine(day, clock)
+    span = parse_time_range(text)
+    if span is not None and span[0] == clock:
+        end = datetime.combine(day, span[1])
+        return start, end if end > start else end + timedelta(days=1)
+    duration = parse_duration(text)
+    return start, start + duration if duration is not None else None
+
+
+def _target_tail(text: str) -> Optional[str]:
+    matches = list(_TARGET_RE.finditer(text or ""))
+    return text[matches[-1].end() :] if matches else None
+
+
+def parse_target(text: str, now: Optional[datetime] = None) -> Tuple[Optional[date], Optional[time]]:
+    """Neuer Zeitpunkt hinter "auf"/"to" ("verschiebe das Meeting am Montag auf Mittwoch 14 Uhr")."""
+    tail = _target_tail(text)
+    if tail is None:
+        return None, None
+    return parse_date(tail, now), parse_clock(tail)
+
+
+def parse_time_hints(text: str, now: Optional[datetime] = None) -> TimeHints:
+    """Alle Datums-, Wochentags- und Uhrzeitangaben (für die lokale Terminauswahl)."""
+    now = now or datetime.now()
+    folded = _fold(text)
+    hints = TimeHints()
+    for word, offset in RELATIVE_DAYS.items():
+        if re.search(rf"\b{_fold(word)}\b", folded):
+            hints.dates.append((now + timedelta(days=offset)).date())
+    for m in re.finditer(r"[a-zäöü]+", folded):
+        weekday = WEEKDAYS.get(m.group(0))
+        if weekday is not None and weekday not in hints.weekdays:
+            hints.weekdays.append(weekday)
+    for m in DATE_RE.finditer(folded):
+        day = parse_date(m.group(0), now)
+        if day is not None:
+            hints.dates.append(day)
+    clocks = _clocks(folded) + [(pos, start) for pos, start, _ in _ranges(folded)]
+    for _, clock in sorted(clocks, key=lambda c: c[0]):
+        if (clock.hour, clock.minute) not in hints.times:
+            hints.times.append((clock.hour, clock.minute))
+    return hints
+
+
+def postpone_delta(text: str, original_start: datetime, now: Optional[datetime] = None) -> Optional[timedelta]:
+    """
+    Verschiebung eines Termins: explizite Dauer ("um 2h später") hat Vorrang, sonst neues Ziel ("auf Freitag 10 Uhr",
+    "auf nächste Woche"; fehlendes Datum bzw. fehlende Uhrzeit vom ursprünglichen Termin). None → nicht erkannt.
+    """
+    shift = parse_shift(text)
+    if shift is not None:
+        return shift
+    day, clock = parse_target(text, now)
+    if day is None and clock is None:
+        return None
+    tail = _target_tail(text)
+    if _NEXT_WEEK_RE.search(tail) and parse_date(_NEXT_WEEK_RE.sub(" ", tail), now) is None:
+        # "auf nächste Woche" ohne Wochentag → gleicher Wochentag eine Woche später, nicht Montag
+        day = original_start.date() + timedelta(weeks=1)
+    new_start = datetime.combine(day or original_start.date(), clock or original_start.time().replace(tzinfo=None), original_start.tzinfo)
+    return new_start - original_start
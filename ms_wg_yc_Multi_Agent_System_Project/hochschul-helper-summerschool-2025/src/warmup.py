@@ -0,0 +1,138 @@
+# src/warmup.py
+"""
+Warm-up der teuren Ressourcen vor dem ersten Nutzer-Request, plus Readiness-Signal.
+
+    uv run python -m src.warmup      # CLI: einmal aufwärmen, Bericht ausgeben (Exit-Code 1 bei Fehlern)
+
+In der Chainlit-App läuft `start_background_warm_up()` beim Start; `/ready` liefert 503, bis alles geladen ist.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() == "true"
+# Wie lange eine Nachricht während des Warm-ups höchstens auf Readiness wartet
+WARMUP_WAIT_S = float(os.getenv("WARMUP_WAIT_S", 60))
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_started = False
+_report: Dict[str, dict] = {}
+
+
+# ----------------- Schritte -----------------
+def _warm_embedder():
+    from src.tools.ingest import get_embedder
+
+    get_embedder().encode(["Aufwärmen"])  # erster encode-Aufruf initialisiert Tokenizer/Runtime
+
+
+def _warm_hka_collection():
+    from src.tools import rag
+
+    rag.retrieve_scored("Prüfungsordnung", k=1)  # öffnet Chroma, lädt BM25 und HNSW-Index
+
+
+def _warm_timetables():
+    from src.tools import rag_calender
+
+    rag_calender.get_timetable_db()  # prozessweit gecachte Embeddings + Chroma, die alle Requests wiederverwenden
+    rag_calender.retrieve("Vorlesung", k=1)  # erste Query lädt den HNSW-Index
+
+
+def _warm_reranker():
+    from src.tools import rerank
+
+    if rerank.RERANK_ENABLED:
+        rerank.get_cross_encoder().predict([("Aufwärmen", "Aufwärmen")])
+
+
+def _warm_llm_connection():
+    from src.models import get_client
+
+    get_client().models.list()  # TLS-Handshake, Verbindung bleibt im Pool des Clients offen
+
+
+def _warm_agent_graph():
+    from src.agent import get_agent_graph
+
+    get_agent_graph()
+
+
+def _warm_calendar():
+    from src.utils.google_calendar_utils import get_api_resource
+
+    get_api_resource()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "embedder": _warm_embedder,
+    "hka_collection": _warm_hka_collection,
+    "timetables": _warm_timetables,
+    "reranker": _warm_reranker,
+    "llm_connection": _warm_llm_connection,
+    "agent_graph": _warm_agent_graph,
+    "calendar": _warm_calendar,
+}
+
+
+# ----------------- Ablauf & Readiness -----------------
+def warm_up(steps: Optional[Dict[str, Callable[[], None]]] = None) -> Dict[str, dict]:
+    """
+    Führt alle Schritte nacheinander aus und setzt danach das Readiness-Signal.
+    Ein fehlgeschlagener Schritt blockiert die Readiness nicht – die Komponente lädt dann beim ersten Request.
+    """
+    for name, step in (steps if steps is not None else WARMUP_STEPS).items():
+        start = time.perf_counter()
+        try:
+            step()
+            _report[name] = {"status": "ok", "seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            _report[name] = {"status": "error", "seconds": round(time.perf_counter() - start, 3), "error": f"{type(e).__name__}: {e}"}
+        print(f"WARMUP {name}: {_report[name]['status']} ({_report[name]['seconds']}s)")
+    _ready.set()
+    return dict(_report)
+
+
+def start_background_warm_up(steps: Optional[Dict[str, Callable[[], None]]] = None) -> threading.Thread:
+    """Startet das Warm-up einmalig in einem Daemon-Thread (weitere Aufrufe sind No-ops)."""
+    global _started
+    with _lock:
+        thread = threading.Thread(target=warm_up, args=(steps,), name="warmup", daemon=True)
+        if not _started:
+            _started = True
+            thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout: Optional[float] = WARMUP_WAIT_S) -> bool:
+    return _ready.wait(timeout)
+
+
+def readiness() -> dict:
+    return {
+        "ready": is_ready(),
+        "ok": is_ready() and all(r["status"] == "ok" for r in _report.values()),
+        "steps": dict(_report),
+    }
+
+
+def reset() -> None:
+    """Nur für Tests: Readiness-Zustand zurücksetzen."""
+    global _started
+    with _lock:
+        _started = False
+        _ready.clear()
+        _report.clear()
+
+
+if __name__ == "__main__":
+    report = warm_up()
+    raise SystemExit(0 if all(r["status"] == "ok" for r in report.values()) else 1)
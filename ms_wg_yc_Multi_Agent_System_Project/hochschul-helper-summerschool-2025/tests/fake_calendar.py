@@ -0,0 +1,139 @@
+"""In-memory stand-in for the Google Calendar `api_resource` (events().list/insert/get/update/delete, batch requests).
+
+Implements the incremental sync contract: list() without syncToken returns all live events plus a
+nextSyncToken; list(syncToken=...) returns only events changed since that token, deleted ones as
+status="cancelled". Tokens can be expired to simulate HTTP 410.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Resp", (), {"status": status})()
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeBatch:
+    """googleapiclient BatchHttpRequest: requests run on execute(), results go to callback(request_id, response, exception)."""
+
+    def __init__(self, calendar, callback):
+        self.calendar = calendar
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        if len(self.requests) >= 1000:
+            raise ValueError("too many requests in batch")
+        self.requests.append((request, callback or self.callback, request_id or str(len(self.requests))))
+
+    def execute(self):
+        self.calendar.batch_calls.append(len(self.requests))
+        for request, callback, request_id in self.requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class FakeEvents:
+    def __init__(self, calendar, page_size=None):
+        self.calendar = calendar
+        self.page_size = page_size
+
+    def list(self, calendarId, syncToken=None, pageToken=None, maxResults=250, **params):
+        return _Request(lambda: self.calendar.list_page(syncToken, pageToken, min(maxResults, self.page_size or maxResults), params))
+
+    def insert(self, calendarId, body):
+        return _Request(lambda: self.calendar.insert(body))
+
+    def get(self, calendarId, eventId):
+        return _Request(lambda: copy.deepcopy(self.calendar.store[eventId]))
+
+    def update(self, calendarId, eventId, body):
+        return _Request(lambda: self.calendar.update(eventId, body))
+
+    def delete(self, calendarId, eventId):
+        return _Request(lambda: self.calendar.delete(eventId))
+
+
+class FakeCalendar:
+    """Use as `api_resource`; `store` holds the events by id, `list_calls` records the parameters of every events().list request."""
+
+    def __init__(self, events=(), page_size=None):
+        self.store = {}
+        self.changes = []  # (version, event_id)
+        self.version = 0
+        self.expired_tokens = set()
+        self.list_calls = []
+        self.batch_calls = []  # Anzahl Requests je Batch-Roundtrip
+        self.insert_calls = 0
+        self.fail_summaries = set()  # insert() dieser Titel schlägt mit HTTP 400 fehl
+        self._ids = itertools.count(1)
+        self._page_size = page_size
+        for e in events:
+            self.insert(e)
+
+    # googleapiclient-style entry points
+    def events(self):
+        return FakeEvents(self, self._page_size)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def _touch(self, event_id):
+        self.version += 1
+        self.changes.append((self.version, event_id))
+
+    def insert(self, body):
+        self.insert_calls += 1
+        if body.get("summary") in self.fail_summaries:
+            raise FakeHttpError(400)
+        event = copy.deepcopy(body)
+        event.setdefault("id", f"evt{next(self._ids)}")
+        event["status"] = "confirmed"
+        event["htmlLink"] = f"https://calendar.example/{event['id']}"
+        self.store[event["id"]] = event
+        self._touch(event["id"])
+        return copy.deepcopy(event)
+
+    def update(self, event_id, body):
+        self.store[event_id] = {**copy.deepcopy(body), "id": event_id, "status": "confirmed"}
+        self._touch(event_id)
+        return copy.deepcopy(self.store[event_id])
+
+    def delete(self, event_id):
+        self.store[event_id]["status"] = "cancelled"
+        self._touch(event_id)
+        return ""
+
+    def list_page(self, sync_token, page_token, page_size, params):
+        self.list_calls.append({"syncToken": sync_token, "pageToken": page_token, **params})
+        if sync_token in self.expired_tokens:
+            raise FakeHttpError(410)
+        if sync_token is None:
+            items = [e for e in self.store.values() if e["status"] != "cancelled"]
+        else:
+            since = int(sync_token)
+            changed = sorted({eid for v, eid in self.changes if v > since})
+            items = [self.store[eid] for eid in changed]
+        start = int(page_token or 0)
+        page = [copy.deepcopy(e) for e in items[start : start + page_size]]
+        result = {"items": page}
+        if start + page_size < len(items):
+            result["nextPageToken"] = str(start + page_size)
+        else:
+            result["nextSyncToken"] = str(self.version)
+        return result
@@ -0,0 +1,45 @@
+"""Tests for the lexical BM25 index and rank fusion used by hybrid RAG retrieval."""
+
+from __future__ import annotations
+
+from src.tools.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "spo.pdf:0": "§ 12 Wiederholung von Prüfungen. Nicht bestandene Prüfungen können zweimal wiederholt werden.",
+    "mhb.pdf:3": "Modul INFB-120 Programmieren 1, 5 ECTS, Prüfungsleistung: Klausur 90 Minuten.",
+    "mhb.pdf:4": "Modul INFB-130 Mathematik 1, 7 ECTS, Prüfungsleistung: Klausur 120 Minuten.",
+    "rz.pdf:1": "Das Rechenzentrum bietet VPN-Zugang für alle Studierenden.",
+}
+
+
+def _index():
+    index = BM25Index()
+    index.upsert(list(DOCS), list(DOCS.values()))
+    return index
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    tokens = tokenize("Modul INFB-120 nach § 12 Abs. 3.1")
+    assert {"infb-120", "infb", "120", "§12", "3.1"} <= set(tokens)
+
+
+def test_search_ranks_exact_identifiers_first():
+    index = _index()
+    assert index.search("Was steht in INFB-130?", k=1)[0][0] == "mhb.pdf:4"
+    assert index.search("§12 Wiederholung", k=1)[0][0] == "spo.pdf:0"
+    assert index.search("Mensa Speiseplan") == []
+
+
+def test_save_load_roundtrip_and_delete(tmp_path):
+    path = tmp_path / "hka_bm25.json"
+    _index().save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("VPN", k=1)[0][0] == "rz.pdf:1"
+    loaded.delete(["rz.pdf:1"])
+    assert loaded.search("VPN") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = [doc_id for doc_id, _ in reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "e"]])]
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d", "e"}
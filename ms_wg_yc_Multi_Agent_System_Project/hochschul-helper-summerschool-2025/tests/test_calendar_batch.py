@@ -0,0 +1,52 @@
+"""Tests for batched Google Calendar event creation with per-event status."""
+
+from __future__ import annotations
+
+from src.utils.calendar_batch import batch_insert_events
+from tests.fake_calendar import FakeCalendar
+
+
+def _bodies(n):
+    return [{"summary": f"Vorlesung {i}", "start": {"dateTime": f"2025-01-20T{8 + i % 10:02d}:00:00+01:00"}, "end": {"dateTime": f"2025-01-20T{9 + i % 10:02d}:30:00+01:00"}} for i in range(n)]
+
+
+def test_one_round_trip_per_fifty_events():
+    calendar = FakeCalendar()
+    results = batch_insert_events(calendar, "cal", _bodies(120))
+    assert calendar.batch_calls == [50, 50, 20]
+    assert all(r["ok"] for r in results) and len(calendar.store) == 120
+    assert [r["index"] for r in results] == list(range(120))
+    assert results[7]["event"]["summary"] == "Vorlesung 7"
+
+
+def test_failures_are_reported_per_event_without_aborting_batch():
+    calendar = FakeCalendar()
+    calendar.fail_summaries = {"Vorlesung 1"}
+    results = batch_insert_events(calendar, "cal", _bodies(3))
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert "400" in results[1]["error"]
+    assert results[1]["summary"] == "Vorlesung 1"
+
+
+def test_transport_error_marks_whole_batch_failed():
+    class _BrokenBatch:
+        def __init__(self, *_, **__):
+            pass
+
+        def add(self, *_, **__):
+            pass
+
+        def execute(self):
+            raise ConnectionError("network down")
+
+    calendar = FakeCalendar()
+    calendar.new_batch_http_request = _BrokenBatch
+    results = batch_insert_events(calendar, "cal", _bodies(2))
+    assert not any(r["ok"] for r in results)
+    assert all("network down" in r["error"] for r in results)
+
+
+def test_empty_input_makes_no_requests():
+    calendar = FakeCalendar()
+    assert batch_insert_events(calendar, "cal", []) == []
+    assert calendar.batch_calls == []
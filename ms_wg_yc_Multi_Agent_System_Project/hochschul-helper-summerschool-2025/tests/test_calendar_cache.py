@@ -0,0 +1,109 @@
+"""Tests for the syncToken-based Google Calendar event cache, against an in-memory fake api_resource."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.utils.calendar_cache import CalendarEventCache, get_event_cache
+from tests.fake_calendar import FakeCalendar
+
+BERLIN = timezone(timedelta(hours=1))
+
+
+def _event(summary, day, hour, minutes=90):
+    start = datetime(2025, 1, day, hour, tzinfo=BERLIN)
+    return {"summary": summary, "start": {"dateTime": start.isoformat()}, "end": {"dateTime": (start + timedelta(minutes=minutes)).isoformat()}}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def calendar():
+    return FakeCalendar([_event("Mathe 1", 20, 9), _event("Programmieren 1", 21, 14), _event("Kickoff", 30, 10)])
+
+
+WEEK = (datetime(2025, 1, 20, tzinfo=BERLIN), datetime(2025, 1, 27, tzinfo=BERLIN))
+
+
+def test_full_sync_then_window_from_cache(calendar):
+    clock = _Clock()
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=clock)
+    assert [e["summary"] for e in cache.events_between(*WEEK)] == ["Mathe 1", "Programmieren 1"]
+    assert [e["summary"] for e in cache.events_between(*WEEK, max_results=1)] == ["Mathe 1"]
+    assert len(calendar.list_calls) == 1 and calendar.list_calls[0]["syncToken"] is None
+    assert "timeMin" not in calendar.list_calls[0]  # syncToken-Requests dürfen kein Zeitfenster haben
+
+
+def test_incremental_sync_fetches_only_changes(calendar):
+    clock = _Clock()
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=clock)
+    cache.events_between(*WEEK)
+    mathe = next(e for e in calendar.store.values() if e["summary"] == "Mathe 1")
+    calendar.delete(mathe["id"])
+    calendar.insert(_event("Übung", 22, 8))
+
+    clock.now = 31
+    summaries = [e["summary"] for e in cache.events_between(*WEEK)]
+    assert summaries == ["Programmieren 1", "Übung"]
+    last = calendar.list_calls[-1]
+    assert last["syncToken"] is not None
+    assert cache.stats == {"full_syncs": 1, "incremental_syncs": 1, "cache_reads": 0}
+
+
+def test_reads_within_ttl_do_not_hit_the_api(calendar):
+    clock = _Clock()
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=clock)
+    for _ in range(3):
+        cache.events_between(*WEEK)
+    assert len(calendar.list_calls) == 1 and cache.stats["cache_reads"] == 2
+    cache.invalidate()
+    cache.events_between(*WEEK)
+    assert len(calendar.list_calls) == 2
+
+
+def test_expired_sync_token_triggers_full_resync(calendar):
+    clock = _Clock()
+    cache = CalendarEventCache(calendar, "cal", ttl=0, clock=clock)
+    cache.events_between(*WEEK)
+    calendar.expired_tokens.add(str(calendar.version))
+    calendar.insert(_event("Tutorium", 23, 12))
+    assert "Tutorium" in [e["summary"] for e in cache.events_between(*WEEK)]
+    assert cache.stats["full_syncs"] == 2
+
+
+def test_pagination_is_followed():
+    calendar = FakeCalendar([_event(f"Termin {i}", 20 + i % 5, 8 + i % 8) for i in range(7)], page_size=3)
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=_Clock())
+    assert len(cache.events_between(*WEEK)) == 7
+    assert len(calendar.list_calls) == 3
+
+
+def test_local_writes_are_visible_without_resync(calendar):
+    clock = _Clock()
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=clock)
+    cache.events_between(*WEEK)
+    created = calendar.insert(_event("Neu", 24, 10))
+    cache.upsert(created)
+    assert "Neu" in [e["summary"] for e in cache.events_between(*WEEK)]
+    cache.remove(created["id"])
+    assert "Neu" not in [e["summary"] for e in cache.events_between(*WEEK)]
+    assert len(calendar.list_calls) == 1
+
+
+def test_all_day_events_overlap_window():
+    calendar = FakeCalendar([{"summary": "Feiertag", "start": {"date": "2025-01-22"}, "end": {"date": "2025-01-23"}}])
+    cache = CalendarEventCache(calendar, "cal", ttl=30, clock=_Clock())
+    assert [e["summary"] for e in cache.events_between(*WEEK)] == ["Feiertag"]
+
+
+def test_cache_is_shared_per_calendar(calendar):
+    assert get_event_cache(calendar, "shared") is get_event_cache(calendar, "shared")
+    assert get_event_cache(FakeCalendar(), "shared") is not get_event_cache(calendar, "shared")
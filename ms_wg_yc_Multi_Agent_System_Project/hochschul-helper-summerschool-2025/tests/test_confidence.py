@@ -0,0 +1,33 @@
+"""Tests for the retrieval-score based RAG confidence."""
+
+from __future__ import annotations
+
+from src.tools.confidence import CONF_CAP, CONF_FLOOR, confidence_from_scores, is_relevant, similarity_from_distance
+
+
+def test_similarity_from_distance_per_space():
+    assert similarity_from_distance(0.2, "cosine") == 0.8
+    assert similarity_from_distance(0.5, "l2") == 0.75
+    assert similarity_from_distance(1.7, "cosine") == 0.0
+
+
+def test_confidence_tracks_similarity_not_hit_count():
+    strong = confidence_from_scores([0.8, 0.7, 0.6])
+    weak = confidence_from_scores([0.2, 0.18, 0.15, 0.1, 0.1, 0.1])
+    assert strong > 0.8
+    assert weak == CONF_FLOOR
+    assert not is_relevant(weak)
+    assert is_relevant(strong)
+
+
+def test_confidence_is_monotonic_and_bounded():
+    values = [confidence_from_scores([s]) for s in (0.0, 0.3, 0.45, 0.6, 1.0)]
+    assert values == sorted(values)
+    assert values[0] == CONF_FLOOR and values[-1] == CONF_CAP
+    assert confidence_from_scores([]) == 0.0
+
+
+def test_rerank_scores_shift_confidence():
+    base = confidence_from_scores([0.45])
+    assert confidence_from_scores([0.45], rerank_scores=[6.0]) > base
+    assert confidence_from_scores([0.45], rerank_scores=[-6.0]) < base
@@ -0,0 +1,172 @@
+"""Tests for per-session conversation memory (follow-up detection, turn history, checkpointed graph)."""
+
+from __future__ import annotations
+
+import sys
+import types
+
+import pytest
+
+from src.conversation import cached_answer, follow_up_context, is_follow_up, last_turn, record_turn, thread_config
+
+TURN = {
+    "user_msg": "Wann ist Mathe 1?",
+    "tool": "rag_calendar",
+    "query": "Mathe 1 Vorlesung",
+    "chunk_ids": ["INFB.1.html:0:abc"],
+    "retrieval": {"answer": "Montag 9:45, E-201", "confidence": 0.9, "citations": ["INFB.1.html"]},
+    "answer": "Montag 9:45, E-201",
+}
+
+
+@pytest.mark.parametrize("msg", ["und am Dienstag?", "Und wo ist das?", "what about tuesday?", "Was ist mit der Übung?"])
+def test_follow_ups_are_detected(msg):
+    assert is_follow_up(msg, [TURN])
+
+
+@pytest.mark.parametrize("msg", ["und am Dienstag?", "Wann ist Mathe 1?"])
+def test_no_follow_up_without_history(msg):
+    assert not is_follow_up(msg, [])
+
+
+def test_long_standalone_question_is_not_a_follow_up():
+    assert not is_follow_up("Welche Zulassungsvoraussetzungen gelten für den Master Informatik an der HKA?", [TURN])
+
+
+def test_cached_answer_matches_normalized_query_and_tool():
+    assert cached_answer([TURN], "rag_calendar", "mathe 1  Vorlesung?") is TURN
+    assert cached_answer([TURN], "rag", "Mathe 1 Vorlesung") is None
+    assert cached_answer([TURN], "rag_calendar", "Mathe 2 Vorlesung") is None
+
+
+def test_history_keeps_only_the_latest_turns():
+    history = []
+    for i in range(5):
+        history = record_turn(history, {**TURN, "query": f"q{i}"}, max_turns=3)
+    assert [t["query"] for t in history] == ["q2", "q3", "q4"]
+    assert last_turn(history, "rag") is None and last_turn(history)["query"] == "q4"
+
+
+def test_follow_up_context_names_previous_plan():
+    context = follow_up_context([TURN])
+    assert "Wann ist Mathe 1?" in context and "tool=rag_calendar" in context
+    assert follow_up_context([]) == ""
+
+
+def test_thread_config():
+    assert thread_config("abc") == {"configurable": {"thread_id": "abc"}}
+    assert thread_config(None) is None
+
+
+def test_follow_up_reuses_previous_chunks_and_identical_query_hits_cache(monkeypatch, tmp_path):
+    pytest.importorskip("pydantic")
+    pytest.importorskip("langgraph")
+    calls = []
+    fake_rag = types.ModuleType("src.tools.rag")
+    fake_rag.answer_with_chunks = lambda q, prior=None: calls.append((q, prior)) or (f"A:{q}", 0.8, ["x.pdf#1"], ["x.pdf:1"])
+    monkeypatch.setitem(sys.modules, "src.tools.rag", fake_rag)
+    monkeypatch.setitem(sys.modules, "src.tools.search", types.ModuleType("src.tools.search"))
+    import src.tools
+
+    monkeypatch.setattr(src.tools, "rag", fake_rag, raising=False)
+    monkeypatch.setattr(src.tools, "search", sys.modules["src.tools.search"], raising=False)
+
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from src import agent
+
+    monkeypatch.setattr(agent, "_session_graph", agent.build_agent(checkpointer=MemorySaver()))
+    monkeypatch.setattr(agent._guard, "chat", lambda m: '{"valid": true}')
+    plans = iter(["SPO Informatik Prüfungen", "SPO Informatik Wiederholung", "SPO Informatik Prüfungen"])
+    monkeypatch.setattr(agent._supervisor, "chat", lambda m: '{"tool": "rag", "query": "%s"}' % next(plans))
+
+    agent.run_agent("Welche Prüfungen hat die SPO Informatik?", session_id="s1")
+    agent.run_agent("und die Wiederholung?", session_id="s1")
+    out = agent.run_agent("Welche Prüfungen hat die SPO Informatik?", session_id="s1")
+
+    assert calls == [("SPO Informatik Prüfungen", None), ("SPO Informatik Wiederholung", ["x.pdf:1"])]
+    assert out["answer"] == "A:SPO Informatik Prüfungen"
+
+
+def _session_agent(monkeypatch, answer_with_chunks):
+    fake_rag = types.ModuleType("src.tools.rag")
+    fake_rag.answer_with_chunks = answer_with_chunks
+    monkeypatch.setitem(sys.modules, "src.tools.rag", fake_rag)
+    monkeypatch.setitem(sys.modules, "src.tools.search", types.ModuleType("src.tools.search"))
+    import src.tools
+
+    monkeypatch.setattr(src.tools, "rag", fake_rag, raising=False)
+    monkeypatch.setattr(src.tools, "search", sys.modules["src.tools.search"], raising=False)
+
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from src import agent
+
+    monkeypatch.setattr(agent, "_session_graph", agent.build_agent(checkpointer=MemorySaver()))
+    monkeypatch.setattr(agent._guard, "chat", lambda m: '{"valid": true}')
+
+    def plan(messages):
+        wiederholung = any("Wiederholung" in m["content"] for m in messages if m["role"] == "user")
+        return '{"tool": "rag", "query": "%s"}' % ("SPO Informatik Wiederholung" if wiederholung else "SPO Informatik Prüfungen")
+
+    monkeypatch.setattr(agent._supervisor, "chat", plan)
+    return agent
+
+
+def test_coalesced_question_is_recorded_in_every_session(monkeypatch):
+    pytest.importorskip("pydantic")
+    pytest.importorskip("langgraph")
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls, release = [], threading.Event()
+
+    def answer_with_chunks(q, prior=None):
+        calls.append((q, prior))
+        release.wait(2)
+        return f"A:{q}", 0.8, ["x.pdf#1"], ["x.pdf:1"]
+
+    agent = _session_agent(monkeypatch, answer_with_chunks)
+    from src import router
+
+    router.reset_coalescing_stats()
+    question = "Welche Prüfungen hat die SPO Informatik?"
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(router.supervise, question, sid) for sid in ("s1", "s2")]
+        deadline = time.monotonic() + 2
+        while router.get_coalescing_stats()["shared"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+    assert [f.result()["answer"] for f in futures] == ["A:SPO Informatik Prüfungen"] * 2
+    assert len(calls) == 1
+
+    # Der Follower (wer auch immer es war) kennt den Turn jetzt ebenfalls und bekommt Kontext für die Folgefrage
+    for sid in ("s1", "s2"):
+        history = agent.get_session_graph().get_state({"configurable": {"thread_id": sid}}).values["history"]
+        assert [t["user_msg"] for t in history] == [question]
+    router.supervise("und die Wiederholung?", "s2")
+    assert calls[-1] == ("SPO Informatik Wiederholung", ["x.pdf:1"])
+
+
+@pytest.mark.parametrize(
+    "msg, expected",
+    [
+        ("Trag Mathe 1 in meinen Kalender ein", True),
+        ("Verschiebe Yoga um 2 Stunden", True),
+        ("lösche den Termin morgen", True),
+        ("add the lecture to my calendar", True),
+        ("Wann ist Mathe 1?", False),
+        ("Wie lange dauert der Vortrag?", False),
+    ],
+)
+def test_calendar_actions_are_never_coalesced(monkeypatch, msg, expected):
+    pytest.importorskip("pydantic")
+    from src import router
+
+    assert router.is_calendar_action(msg) is expected
+    direct = []
+    monkeypatch.setattr(router, "run_agent", lambda m, session_id=None: direct.append(session_id) or {"answer": "ok"})
+    monkeypatch.setattr(router, "_run_shared", lambda m, sid: {"result": {"answer": "shared"}, "turn": None, "session_id": sid})
+    router.supervise(msg, "s1")
+    assert bool(direct) is expected
@@ -0,0 +1,57 @@
+"""Parity of the ONNX / int8 embedding backends with the fp32 PyTorch reference (needs the model locally or network)."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from src.tools import ingest
+from src.tools.ingest import EMBEDDING_BACKENDS, load_embedder
+
+SENTENCES = [
+    "Wie oft darf ich eine Prüfung wiederholen?",
+    "Öffnungszeiten der Bibliothek am Wochenende",
+    "VPN-Zugang über das Rechenzentrum einrichten",
+    "Wann ist die Vorlesung Programmieren 1 im Semester INFB.1?",
+]
+# int8 verliert etwas Präzision, muss für Retrieval aber praktisch gleich ranken
+MIN_COSINE = {"local": 0.9999, "onnx": 0.999, "onnx-int8": 0.97, "torch-int8": 0.97}
+
+
+def _load(backend):
+    try:
+        return load_embedder(backend)
+    except ImportError as e:
+        pytest.skip(f"{backend} backend not installed: {e}")
+    except OSError as e:
+        pytest.skip(f"model not available offline: {e}")
+    except Exception as e:
+        # sentence-transformers meldet fehlendes optimum/onnxruntime als generische Exception
+        pytest.skip(f"{backend} backend not available: {e}")
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return _load("local").encode(SENTENCES, normalize_embeddings=True)
+
+
+@pytest.mark.parametrize("backend", EMBEDDING_BACKENDS)
+def test_backend_matches_fp32_reference(backend, reference):
+    vectors = _load(backend).encode(SENTENCES, normalize_embeddings=True)
+    assert vectors.shape == reference.shape
+    cosines = (vectors * reference).sum(axis=1)
+    assert cosines.min() >= MIN_COSINE[backend]
+    # nächster Nachbar jedes Satzes bleibt derselbe
+    assert ((vectors @ reference.T).argmax(axis=1) == list(range(len(SENTENCES)))).all()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_embedder("gpu-magic")
+
+
+def test_legacy_openai_backend_maps_to_local(monkeypatch, capsys):
+    monkeypatch.setattr(ingest, "SentenceTransformer", lambda name, **kwargs: ("st", name, kwargs))
+    assert load_embedder("openai", "m") == ("st", "m", {})
+    assert "deprecated" in capsys.readouterr().out
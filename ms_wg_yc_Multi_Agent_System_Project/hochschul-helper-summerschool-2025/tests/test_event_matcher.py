@@ -0,0 +1,66 @@
+"""Accuracy of the local event matcher for postpone/delete on a fixture calendar (now = Mon 2025-01-20 08:00)."""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from src.tools.event_matcher import get_matcher_stats, match_events, parse_time_hints, reset_matcher_stats
+
+EVENTS = json.loads((Path(__file__).parent / "fixtures" / "calendar_events.json").read_text(encoding="utf-8"))
+NOW = datetime(2025, 1, 20, 8, 0)
+
+# (Anfrage, erwartete Event-IDs) – None: mehrdeutig, muss ans LLM; []: kein Treffer
+CASES = [
+    ("verschiebe das Meeting mit Bob am Donnerstag um 1 Stunde", ["bob-thu"]),
+    ("postpone Meeting with Bob on monday by 2 hours", ["bob-mon"]),
+    ("delete Kickoff with Alice meeting", ["alice"]),
+    ("lösche den Zahnarzttermin", ["zahnarzt"]),
+    ("Sprechstunde bei Müller absagen", ["sprechstunde"]),
+    ("lösche das Tutorium Mathe", ["tut-mathe"]),
+    ("cancel team meeting on friday", ["team"]),
+    ("Mensa mit Lisa um 30 Minuten verschieben", ["mensa"]),
+    ("lösche den Termin morgen um 9:45", ["mathe-vl"]),
+    ("lösche Lerngruppe", ["lerngruppe"]),
+    ("verschiebe den Termin in der Bibliothek", ["lerngruppe"]),
+    ("verschiebe die Mathe Übung um 2 Stunden", ["mathe-ue"]),
+    ("postpone Meeting with Bob by 2 hours", None),
+    ("verschiebe Programmieren um 30 Minuten", None),
+    ("verschiebe Yoga", []),
+]
+
+
+@pytest.mark.parametrize("query,expected", CASES)
+def test_fixture_calendar_cases(query, expected):
+    result = match_events(query, EVENTS, now=NOW)
+    if expected is None:
+        assert result.ambiguous and not result.resolved
+        assert 2 <= len(result.candidates) < len(EVENTS)  # nur die knappen Kandidaten gehen ans LLM
+    else:
+        assert [e["id"] for e in result.selected] == expected
+
+
+def test_most_queries_resolve_without_llm():
+    reset_matcher_stats()
+    for query, _ in CASES:
+        match_events(query, EVENTS, now=NOW)
+    stats = get_matcher_stats()
+    assert stats["local"] == sum(1 for _, expected in CASES if expected)
+    assert stats["llm_rate"] <= 0.25
+
+
+def test_delete_all_selects_every_matching_event():
+    result = match_events("lösche alle Tutorien", EVENTS, now=NOW, allow_multiple=True)
+    assert sorted(e["id"] for e in result.selected) == ["tut-mathe", "tut-prog"]
+    assert not match_events("lösche alle Tutorien", EVENTS, now=NOW).resolved
+
+
+def test_time_hints_ignore_shift_amounts():
+    hints = parse_time_hints("verschiebe Mathe morgen um 14 Uhr um 2 Stunden", NOW)
+    assert hints.dates == [date(2025, 1, 21)]
+    assert hints.times == [(14, 0)]
+    assert parse_time_hints("postpone by 2 hours", NOW).times == []
+    assert parse_time_hints("meeting on 24.01. at 3pm", NOW).times == [(15, 0)]
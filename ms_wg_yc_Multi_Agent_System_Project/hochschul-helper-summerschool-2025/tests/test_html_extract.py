@@ -0,0 +1,56 @@
+"""Tests for the pluggable timetable HTML extractors."""
+
+from __future__ import annotations
+
+import importlib.util
+
+import pytest
+
+from src.tools import html_extract
+
+PAGE = """
+<html><head><script>var menu = "Boilerplate";</script><style>.x{}</style></head>
+<body>
+  <div class="ui-menu"><a>Startseite</a><a>Impressum</a></div>
+  <div id="form1:timetable">
+    <div class="inner"><table><tr><th>Mo</th></tr><tr><td>08:00 - 09:30<br>Mathematik 1<br>E-201</td></tr></table></div>
+  </div>
+  <footer>Kontakt</footer>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("name", html_extract.available_extractors())
+def test_extractors_return_only_timetable_container(name):
+    text = html_extract.EXTRACTORS[name](PAGE)
+    assert text.splitlines() == ["Mo", "08:00 - 09:30", "Mathematik 1", "E-201"]
+
+
+def test_stdlib_falls_back_to_whole_page_without_container():
+    assert html_extract.extract_stdlib("<p>Hallo</p><script>x()</script><p>Welt</p>") == "Hallo\nWelt"
+
+
+def test_resolve_extractor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        html_extract.resolve_extractor("regex")
+    assert html_extract.resolve_extractor("auto") in html_extract.available_extractors()
+
+
+def test_extract_files_matches_serial_extraction(tmp_path):
+    paths = []
+    for i in range(3):
+        p = tmp_path / f"page_{i}.html"
+        p.write_text(PAGE.replace("Mathematik 1", f"Kurs {i}"), encoding="utf-8")
+        paths.append(p)
+    parallel = html_extract.extract_files(paths, "stdlib", workers=2)
+    assert parallel == {p: html_extract.extract_stdlib(p.read_text(encoding="utf-8")) for p in paths}
+
+
+@pytest.mark.parametrize("value, expected", [("", None), ("0", None), ("3", 3)])
+def test_worker_count_from_env(monkeypatch, value, expected):
+    # .env.example liefert HTML_EXTRACT_WORKERS= (leer = CPU-Anzahl); der Import darf daran nicht scheitern
+    monkeypatch.setenv("HTML_EXTRACT_WORKERS", value)
+    spec = importlib.util.find_spec("src.tools.html_extract")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.HTML_EXTRACT_WORKERS == expected
@@ -0,0 +1,95 @@
+"""Tests for the streaming multi-event ICS writer."""
+
+from __future__ import annotations
+
+import io
+from datetime import date, datetime, timedelta
+
+from src.tools.ics_calendar_tool import escape_text, fold_line, iter_ics, timetable_events, write_ics
+
+
+def _event(i: int, **extra) -> dict:
+    start = datetime(2025, 10, 6, 8, 0) + timedelta(hours=i)
+    return {"summary": f"Termin {i}", "start": start, "end": start + timedelta(minutes=90), **extra}
+
+
+def _unfold(text: str) -> list:
+    return text.replace("\r\n ", "").split("\r\n")
+
+
+def test_fold_line_respects_75_octets_and_utf8_boundaries():
+    line = "DESCRIPTION:" + "Übung für Höhere Mathematik – " * 10
+    folded = fold_line(line)
+    physical = folded.split("\r\n")[:-1]
+    assert all(len(p.encode("utf-8")) <= 75 for p in physical)
+    assert all(p.startswith(" ") for p in physical[1:])
+    assert _unfold(folded)[0] == line
+
+
+def test_short_lines_are_not_folded():
+    assert fold_line("SUMMARY:Mathe") == "SUMMARY:Mathe\r\n"
+
+
+def test_text_values_are_escaped():
+    assert escape_text("Raum E-201, Gebäude E; Zeile 1\nZeile 2\\") == "Raum E-201\\, Gebäude E\\; Zeile 1\\nZeile 2\\\\"
+
+
+def test_bundle_streams_all_events_with_unique_uids():
+    buf = io.StringIO()
+    events = [_event(i) for i in range(200)] + [_event(0)]  # Duplikat → eigene UID
+    assert write_ics((e for e in events), buf) == 201
+    lines = _unfold(buf.getvalue())
+    uids = [l for l in lines if l.startswith("UID:")]
+    assert len(uids) == len(set(uids)) == 201
+    assert lines[0] == "BEGIN:VCALENDAR" and lines[-2] == "END:VCALENDAR"
+    assert lines.count("BEGIN:VEVENT") == lines.count("END:VEVENT") == 201
+
+
+def test_uids_are_stable_across_exports():
+    first = [l for l in iter_ics([_event(1)]) if l.startswith("UID:")]
+    assert first == [l for l in iter_ics([_event(1)]) if l.startswith("UID:")]
+
+
+def test_write_to_path_uses_crlf(tmp_path):
+    path = tmp_path / "semester.ics"
+    write_ics([_event(1, description="Prof. Dr. Müller")], path)
+    raw = path.read_bytes()
+    assert raw.count(b"\r\n") == raw.count(b"\n")
+    assert "DESCRIPTION:Prof. Dr. Müller" in raw.decode("utf-8")
+
+
+def test_timetable_entries_become_weekly_series():
+    entries = [{"course": "Mathe 1", "weekday": 2, "start": "09:45", "end": "11:15", "room": "E-201", "lecturer": "Prof. Dr. X", "major": "INFB", "semester": "1"}]
+    (event,) = timetable_events(entries, first_day=date(2025, 10, 6), until=date(2026, 1, 31))
+    assert event["start"] == datetime(2025, 10, 8, 9, 45) and event["end"] == datetime(2025, 10, 8, 11, 15)
+    assert event["rrule"] == "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959"
+    assert event["description"] == "Prof. Dr. X\nINFB 1"
+
+
+def test_timetable_uids_survive_other_weeks_and_room_changes():
+    entries = [
+        {"course": "Mathe 1", "weekday": 0, "start": "09:45", "end": "11:15", "room": "E-201", "major": "INFB", "semester": "1"},
+        {"course": "Mathe 1", "weekday": 0, "start": "14:00", "end": "15:30", "room": "E-201", "major": "INFB", "semester": "1"},
+    ]
+    until = date(2027, 1, 31)
+    first = [e["uid"] for e in timetable_events(entries, first_day=date(2026, 10, 19), until=until)]
+    later = [e["uid"] for e in timetable_events(entries, first_day=date(2026, 10, 26), until=until)]
+    moved = [dict(entries[0], room="LI-137", start="10:00", end="11:30"), entries[1]]
+    assert first == later == [e["uid"] for e in timetable_events(moved, first_day=date(2026, 10, 19), until=until)]
+    assert len(set(first)) == 2  # zwei Termine am selben Tag bleiben getrennte Serien
+    next_semester = [e["uid"] for e in timetable_events(entries, first_day=date(2027, 4, 12), until=date(2027, 7, 31))]
+    assert not set(first) & set(next_semester)
+
+
+def test_export_from_different_weeks_writes_same_uids(monkeypatch):
+    from src.tools import ics_calendar_tool, timetable_index
+
+    entries = [{"course": "Mathe 1", "weekday": 2, "start": "09:45", "end": "11:15", "room": "E-201", "major": "INFB", "semester": "1"}]
+    monkeypatch.setattr(timetable_index, "query_entries", lambda **filters: entries)
+    monkeypatch.setattr(ics_calendar_tool, "lecture_period_end", lambda today=None: date(2027, 1, 31))
+    exports = []
+    for first_day in (date(2026, 10, 19), date(2026, 10, 26)):
+        buf = io.StringIO()
+        ics_calendar_tool.export_timetable_ics(buf, first_day=first_day)
+        exports.append([l for l in _unfold(buf.getvalue()) if l.startswith("UID:")])
+    assert exports[0] == exports[1] and len(exports[0]) == 1
@@ -0,0 +1,50 @@
+"""Guards the Chainlit start-up path: importing src.agent must stay cheap and free of side effects."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_S = float(os.getenv("AGENT_IMPORT_BUDGET_S", 1.0))
+# dürfen erst beim ersten Request geladen werden
+HEAVY_MODULES = ["langgraph", "chromadb", "sentence_transformers", "torch", "tavily", "googleapiclient", "langchain", "langchain_core", "openai"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.agent
+print(json.dumps({"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}))
+"""
+
+
+@pytest.fixture(scope="module")
+def probe():
+    # frischer Interpreter, damit bereits importierte Module das Ergebnis nicht verfälschen
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        if "ModuleNotFoundError" in proc.stderr:
+            pytest.skip(f"agent dependencies not installed: {proc.stderr.strip().splitlines()[-1]}")
+        pytest.fail(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stdout
+
+
+def test_import_has_no_heavy_dependencies(probe):
+    result, _ = probe
+    loaded = {m.split(".")[0] for m in result["modules"]}
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_import_prints_nothing(probe):
+    _, stdout = probe
+    assert "graph TD" not in stdout and len(stdout.strip().splitlines()) == 1
+
+
+def test_import_time_budget(probe):
+    result, _ = probe
+    assert result["seconds"] < IMPORT_BUDGET_S
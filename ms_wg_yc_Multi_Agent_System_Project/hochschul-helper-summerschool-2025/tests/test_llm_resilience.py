@@ -0,0 +1,157 @@
+"""Tests for LLM timeouts, jittered retries, model fallback and hedged requests."""
+
+from __future__ import annotations
+
+import threading
+import types
+
+import pytest
+
+from src.utils import llm_resilience as lr
+
+
+class ApiError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = types.SimpleNamespace(status_code=status, headers={"retry-after": retry_after} if retry_after else {})
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    lr.reset_llm_stats()
+    yield
+    lr.reset_llm_stats()
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn, calls
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [(ApiError(429), True), (ApiError(503), True), (APITimeoutError(), True), (ApiError(400), False), (ApiError(401), False), (ValueError(), False)],
+)
+def test_retryable_classification(error, retryable):
+    assert lr.is_retryable(error) is retryable
+
+
+def test_backoff_is_full_jitter_with_cap():
+    assert lr.backoff_delay(0, 0.5, 8, rng=lambda lo, hi: hi) == 0.5
+    assert lr.backoff_delay(3, 0.5, 8, rng=lambda lo, hi: hi) == 4.0
+    assert lr.backoff_delay(10, 0.5, 8, rng=lambda lo, hi: hi) == 8
+    assert 0 <= lr.backoff_delay(2, 0.5, 8) <= 2.0
+
+
+def test_retries_transient_errors_then_succeeds():
+    fn, calls = _flaky([ApiError(429), ApiError(502)])
+    sleeps = []
+    assert lr.call_with_retries(fn, max_retries=2, base=0.5, cap=8, sleep=sleeps.append) == "ok"
+    assert len(calls) == 3 and len(sleeps) == 2 and lr.get_llm_stats()["retries"] == 2
+
+
+def test_retry_after_header_is_respected():
+    fn, _ = _flaky([ApiError(429, retry_after="3")])
+    sleeps = []
+    lr.call_with_retries(fn, max_retries=1, base=0.01, cap=8, sleep=sleeps.append)
+    assert sleeps == [3.0]
+
+
+def test_non_retryable_error_is_raised_immediately():
+    fn, calls = _flaky([ApiError(400)])
+    with pytest.raises(ApiError):
+        lr.call_with_retries(fn, max_retries=3, base=0.01, cap=1, sleep=lambda s: None)
+    assert len(calls) == 1
+
+
+def test_fallback_to_next_model():
+    def call_model(model):
+        if model == "free":
+            raise ApiError(429)
+        return f"answer from {model}"
+
+    assert lr.call_with_fallback(["free", "paid"], call_model) == "answer from paid"
+    assert lr.get_llm_stats()["fallbacks"] == 1
+
+
+def test_all_models_failing_raises_last_error():
+    def call_model(model):
+        raise ApiError(503 if model == "a" else 500)
+
+    with pytest.raises(ApiError, match="500"):
+        lr.call_with_fallback(["a", "b"], call_model)
+    assert lr.get_llm_stats()["failures"] == 1
+
+
+def test_hedged_request_takes_faster_model():
+    slow_done = threading.Event()
+
+    def call_model(model):
+        if model == "slow":
+            slow_done.wait(2)
+            return "slow"
+        return "fast"
+
+    try:
+        assert lr.call_with_fallback(["slow", "fast"], call_model, hedge_after=0.02) == "fast"
+    finally:
+        slow_done.set()
+    stats = lr.get_llm_stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_no_hedge_when_primary_is_quick():
+    seen = []
+    assert lr.call_with_fallback(["a", "b"], lambda m: seen.append(m) or m, hedge_after=1.0) == "a"
+    assert seen == ["a"] and lr.get_llm_stats()["hedges"] == 0
+
+
+def test_hedged_primary_failure_falls_back_immediately():
+    def call_model(model):
+        if model == "a":
+            raise ApiError(429)
+        return model
+
+    assert lr.call_with_fallback(["a", "b", "c"], call_model, hedge_after=5.0) == "b"
+
+
+def test_parse_models():
+    assert lr.parse_models("a, b", "b,c") == ["a", "b", "c"]
+    assert lr.parse_models(["a"], "") == ["a"]
+
+
+def test_llm_chat_passes_timeout_and_falls_back(monkeypatch):
+    pytest.importorskip("dotenv")
+    from src import models
+    from src.utils.rate_limiter import RateScheduler
+
+    requests = []
+
+    def create(**kwargs):
+        requests.append((kwargs["model"], kwargs["timeout"]))
+        if kwargs["model"] == "free":
+            raise ApiError(429)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content="hallo"))])
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    monkeypatch.setattr(models, "get_client", lambda: client)
+    monkeypatch.setattr(models, "get_rate_scheduler", lambda: RateScheduler(rpm=0))
+    slept = []
+    monkeypatch.setattr(lr.time, "sleep", slept.append)
+    llm = models.LLM("free", fallbacks=["paid"], timeout=7, max_retries=1, hedge_after=0)
+    assert llm.model == "free"
+    assert llm.chat([{"role": "user", "content": "hi"}]) == "hallo"
+    assert requests == [("free", 7), ("free", 7), ("paid", 7)]
+    assert len(slept) == 1  # Backoff lief über das gepatchte time.sleep, nicht wirklich
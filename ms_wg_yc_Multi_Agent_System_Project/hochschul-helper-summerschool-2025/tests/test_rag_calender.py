@@ -0,0 +1,114 @@
+"""Tests for the timetable vector path in rag_calender, run against an in-memory stand-in for Chroma."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+
+class FakeEmbeddings:
+    created = 0
+
+    def __init__(self, model_name):
+        FakeEmbeddings.created += 1
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+class FakeCollection:
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, ids, include):
+        found = [i for i in ids if i in self.rows]
+        return {
+            "ids": found,
+            "documents": [self.rows[i][0] for i in found],
+            "metadatas": [self.rows[i][1] for i in found],
+            "embeddings": [[1.0, 0.0] for _ in found],
+        }
+
+
+class FakeChroma:
+    instances = []
+
+    def __init__(self, persist_directory, collection_name, embedding_function):
+        self.collection_name = collection_name
+        self.embeddings = embedding_function
+        self._collection = FakeCollection()
+        FakeChroma.instances.append(self)
+
+    def as_retriever(self, search_kwargs):
+        return None
+
+    def similarity_search_with_score(self, query, k, filter=None):
+        from langchain_core.documents import Document
+
+        return [(Document(page_content=d, metadata=m), 0.1) for d, m in list(self._collection.rows.values())[:k]]
+
+
+def _load(monkeypatch):
+    FakeEmbeddings.created, FakeChroma.instances = 0, []
+    vectorstores = types.ModuleType("langchain.vectorstores")
+    vectorstores.Chroma = FakeChroma
+    huggingface = types.ModuleType("langchain_huggingface")
+    huggingface.HuggingFaceEmbeddings = FakeEmbeddings
+    ingest = types.ModuleType("src.tools.ingest")
+    ingest.get_embedder = lambda: None
+    monkeypatch.setitem(sys.modules, "langchain", types.ModuleType("langchain"))
+    monkeypatch.setitem(sys.modules, "langchain.vectorstores", vectorstores)
+    monkeypatch.setitem(sys.modules, "langchain_huggingface", huggingface)
+    monkeypatch.setitem(sys.modules, "src.tools.ingest", ingest)
+    spec = importlib.util.find_spec("src.tools.rag_calender")
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "src.tools.rag_calender", module)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "structured_answer", lambda q: None)
+    monkeypatch.setattr(module._llm, "chat", lambda messages: "Mathe 1: Montag 09:45")
+    return module
+
+
+def test_embeddings_and_store_are_loaded_once(monkeypatch):
+    pytest.importorskip("langchain_core")
+    rc = _load(monkeypatch)
+    rc.retrieve("Vorlesung", k=1, semester="INFB.1")
+    rc.retrieve("Mathe", k=1, semester="INFB.1")
+    rc.retrieve_known("Mathe", ["x"], k=1)
+    assert FakeEmbeddings.created == 1 and len(FakeChroma.instances) == 1
+
+
+def _ingest(db, rows):
+    """Legt Chunks unter denselben Ids ab wie scripts/ingest_timetables.py."""
+    from src.utils.text import timetable_chunk_id
+
+    for i, (source, text) in enumerate(rows):
+        db._collection.rows[timetable_chunk_id(source, i, text)] = (text, {"source_file": source, "chunk_index": i})
+
+
+def test_reads_the_collection_ingest_writes(monkeypatch):
+    rc = _load(monkeypatch)
+    assert rc.get_timetable_db().collection_name == "timetables"
+
+
+def test_chunk_keys_from_an_answer_are_found_again_on_follow_up(monkeypatch):
+    pytest.importorskip("langchain_core")
+    rc = _load(monkeypatch)
+    db = rc.get_timetable_db()
+    _ingest(db, [("INFB.1.html", "INFB.1 Mathe 1 Montag 09:45 E-201"), ("INFB.1.html", "INFB.1 Programmieren Dienstag 11:30 LI-137")])
+
+    _, _, cites, keys = rc.answer_with_chunks("Wann ist Mathe 1 in INFB 1?")
+    assert cites and keys
+    assert [h[0].page_content for h in rc.retrieve_known("und am Dienstag?", keys)]
+
+    searches = []
+    monkeypatch.setattr(db, "similarity_search_with_score", lambda *a, **kw: searches.append(a) or [])
+    rc.answer_with_chunks("und am Dienstag?", keys)
+    assert searches == []  # Folgefrage nutzt die bekannten Chunks, keine neue Vektorsuche
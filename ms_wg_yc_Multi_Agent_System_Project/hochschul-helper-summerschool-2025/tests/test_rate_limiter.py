@@ -0,0 +1,166 @@
+"""Tests for the process-wide token-bucket rate limiter with priority classes."""
+
+from __future__ import annotations
+
+import threading
+import time
+import types
+
+import pytest
+
+from src.utils.rate_limiter import BATCH, INTERACTIVE, ROUTING, RateBudget, RateLimitTimeout, RateScheduler, bucket_name, parse_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_refill_at_configured_rate():
+    clock = FakeClock()
+    scheduler = RateScheduler(rpm=60, burst=2, limits={}, max_wait=0, clock=clock)
+    scheduler.acquire("m", "k")
+    scheduler.acquire("m", "k")
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire("m", "k")
+    clock.now = 1.0
+    assert scheduler.acquire("m", "k") == 0.0
+    assert scheduler.stats["granted"] == 3 and scheduler.stats["timeouts"] == 1
+    assert scheduler.waiting() == 0
+
+
+def test_buckets_are_per_model_and_api_key():
+    scheduler = RateScheduler(rpm=60, burst=1, limits={}, max_wait=0, clock=FakeClock())
+    scheduler.acquire("a", "key1")
+    scheduler.acquire("b", "key1")
+    scheduler.acquire("a", "key2")
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire("a", "key1")
+
+
+def test_free_models_share_one_bucket_unless_overridden():
+    limits = parse_limits("openai/gpt-4o-mini=120, x:free=30, kaputt, y=abc")
+    assert limits == {"openai/gpt-4o-mini": 120.0, "x:free": 30.0}
+    assert bucket_name("deepseek/deepseek-chat-v3.1:free", limits) == ":free"
+    assert bucket_name("x:free", limits) == "x:free"
+    scheduler = RateScheduler(rpm=60, burst=1, limits={}, max_wait=0, clock=FakeClock())
+    scheduler.acquire("deepseek/deepseek-chat-v3.1:free", "k")
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire("mistralai/mistral-7b-instruct:free", "k")
+
+
+def test_zero_rpm_disables_limit():
+    scheduler = RateScheduler(rpm=60, burst=1, limits={"paid": 0}, max_wait=0, clock=FakeClock())
+    for _ in range(5):
+        assert scheduler.acquire("paid", "k") == 0.0
+
+
+def test_server_429_pauses_the_bucket():
+    clock = FakeClock()
+    scheduler = RateScheduler(rpm=60, burst=5, limits={}, max_wait=0, clock=clock)
+    scheduler.throttle("m", "k", 10)
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire("m", "k")
+    clock.now = 10.0
+    scheduler.acquire("m", "k")
+    assert scheduler.stats["throttled"] == 1
+
+
+def test_waiting_callers_are_served_by_priority():
+    scheduler = RateScheduler(rpm=1200, burst=1, limits={}, max_wait=2)
+    scheduler.acquire("m", "k")  # Bucket leer: die nächsten Aufrufer müssen warten
+    order = []
+
+    def call(priority, name):
+        scheduler.acquire("m", "k", priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=args) for args in [(BATCH, "batch"), (ROUTING, "routing"), ("interactive", "interactive")]]
+    for t in threads:
+        t.start()
+        deadline = time.monotonic() + 1
+        while scheduler.waiting() < threads.index(t) + 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+    for t in threads:
+        t.join(2)
+    assert order == ["interactive", "routing", "batch"]
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    scheduler = RateScheduler(rpm=60, burst=1, limits={}, max_wait=0.01)
+    scheduler.acquire("m", "k")
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire("m", "k", INTERACTIVE)
+    assert scheduler.waiting() == 0
+
+
+def test_budget_caps_total_wait_across_buckets():
+    clock = FakeClock()
+    scheduler = RateScheduler(rpm=60, burst=1, limits={}, max_wait=60, clock=clock)
+    scheduler.acquire("a", "k")
+    budget = RateBudget(scheduler, max_wait=5, clock=clock)
+    clock.now = 5.0  # Budget verbraucht: nur noch sofort freie Slots
+    assert budget.acquire("b", "k") == 0.0
+    with pytest.raises(RateLimitTimeout):
+        budget.acquire("b", "k")
+
+
+def test_llm_chat_skips_fallbacks_in_an_exhausted_bucket(monkeypatch):
+    pytest.importorskip("dotenv")
+    from src import models
+
+    scheduler = RateScheduler(rpm=60, burst=1, limits={"paid": 0}, max_wait=0.05)
+    scheduler.acquire("other:free", "key")  # Free-Bucket leer
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs["model"])
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content="ok"))])
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    monkeypatch.setattr(models, "get_client", lambda: client)
+    monkeypatch.setattr(models, "get_rate_scheduler", lambda: scheduler)
+    monkeypatch.setattr(models, "OPENAI_API_KEY", "key")
+    llm = models.LLM("a:free", fallbacks=["b:free", "paid"], max_retries=0, hedge_after=0)
+    started = time.monotonic()
+    assert llm.chat([{"role": "user", "content": "hi"}]) == "ok"
+    assert calls == ["paid"]
+    assert scheduler.stats["timeouts"] == 1  # b:free wartet nicht ein zweites Mal auf denselben Bucket
+    assert time.monotonic() - started < 1
+
+
+def test_llm_chat_uses_priority_and_throttles_on_429(monkeypatch):
+    pytest.importorskip("dotenv")
+    from src import models
+
+    class Fake429(Exception):
+        status_code = 429
+        response = types.SimpleNamespace(status_code=429, headers={"retry-after": "2"})
+
+    seen = []
+
+    class Recorder(RateScheduler):
+        def acquire(self, model, api_key=None, priority=INTERACTIVE, max_wait=None):
+            seen.append((model, priority))
+            return 0.0
+
+        def throttle(self, model, api_key, seconds):
+            seen.append(("throttle", model, seconds))
+
+    def create(**kwargs):
+        if kwargs["model"] == "free":
+            raise Fake429()
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content="ok"))])
+
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create)))
+    monkeypatch.setattr(models, "get_client", lambda: client)
+    monkeypatch.setattr(models, "get_rate_scheduler", lambda: Recorder(rpm=0))
+    llm = models.LLM("free", fallbacks=["paid"], max_retries=0, hedge_after=0, priority="routing")
+    assert llm.chat([{"role": "user", "content": "hi"}], priority="interactive") == "ok"
+    assert seen == [("free", INTERACTIVE), ("throttle", "free", 2.0), ("paid", INTERACTIVE)]
+    seen.clear()
+    llm.chat([{"role": "user", "content": "hi"}])
+    assert seen[0] == ("free", ROUTING)
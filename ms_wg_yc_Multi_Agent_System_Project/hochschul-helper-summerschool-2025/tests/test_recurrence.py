@@ -0,0 +1,62 @@
+"""Tests for RRULE construction and recurring events in the ICS writer."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.tools.ics_calendar_tool import make_ics
+from src.utils.recurrence import build_rrule, lecture_period_end, normalize_rrule
+
+
+def test_weekly_until_date_is_utc_end_of_day():
+    assert build_rrule(until=date(2026, 1, 31)) == "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959Z"
+
+
+def test_aware_until_is_converted_to_utc():
+    until = datetime(2026, 1, 31, 18, 0, tzinfo=timezone(timedelta(hours=1)))
+    assert build_rrule(until=until).endswith("UNTIL=20260131T170000Z")
+
+
+def test_floating_until_for_local_time_ics():
+    assert build_rrule(until=date(2026, 7, 15), floating=True) == "RRULE:FREQ=WEEKLY;UNTIL=20260715T235959"
+
+
+def test_count_interval_and_byday():
+    assert build_rrule(count=14, interval=2, byday=["mo", "th"]) == "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=14"
+
+
+@pytest.mark.parametrize("kwargs", [{"freq": "HOURLY"}, {"until": date(2026, 1, 1), "count": 3}, {"byday": ["XX"]}])
+def test_invalid_rules_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        build_rrule(**kwargs)
+
+
+def test_normalize_accepts_llm_variants():
+    assert normalize_rrule("freq=weekly;until=20260131T235959Z") == "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959Z"
+    assert normalize_rrule(" RRULE:FREQ=WEEKLY;COUNT=12 ") == "RRULE:FREQ=WEEKLY;COUNT=12"
+    with pytest.raises(ValueError):
+        normalize_rrule("jede Woche")
+
+
+def test_lecture_period_end_by_semester():
+    assert lecture_period_end(date(2025, 4, 10)) == date(2025, 7, 31)
+    assert lecture_period_end(date(2025, 10, 10)) == date(2026, 1, 31)
+    assert lecture_period_end(date(2026, 1, 5)) == date(2026, 1, 31)
+    # vorlesungsfrei: Ende des nächsten Semesters, nicht das schon vergangene
+    assert lecture_period_end(date(2026, 2, 15)) == date(2026, 7, 31)
+    assert lecture_period_end(date(2026, 8, 10)) == date(2027, 1, 31)
+
+
+def test_make_ics_emits_one_recurring_vevent():
+    start = datetime(2025, 10, 6, 9, 45)
+    ics = make_ics("Mathe 1", start, start + timedelta(minutes=90), location="E-201", rrule=build_rrule(until=date(2026, 1, 31), floating=True)).decode("utf-8")
+    assert ics.count("BEGIN:VEVENT") == 1
+    assert "RRULE:FREQ=WEEKLY;UNTIL=20260131T235959" in ics
+    assert "DTSTART:20251006T094500" in ics
+
+
+def test_make_ics_without_rrule_unchanged():
+    start = datetime(2025, 10, 6, 9, 45)
+    assert "RRULE" not in make_ics("Termin", start, start + timedelta(hours=1)).decode("utf-8")
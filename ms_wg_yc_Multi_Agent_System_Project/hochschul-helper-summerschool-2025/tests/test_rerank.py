@@ -0,0 +1,56 @@
+"""Tests for the cross-encoder rerank stage and its (query, chunk_id) score cache."""
+
+from __future__ import annotations
+
+from src.tools.rerank import ScoreCache, rerank, score
+
+
+class _CountingPredictor:
+    """Scores a pair by word overlap and records every batch it is asked to score."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, pairs):
+        self.batches.append(list(pairs))
+        return [len(set(q.lower().split()) & set(t.lower().split())) for q, t in pairs]
+
+
+CANDIDATES = [
+    ("a", "Öffnungszeiten der Bibliothek"),
+    ("b", "Prüfung Programmieren 1 Klausur Termin"),
+    ("c", "Mensa Speiseplan"),
+    ("d", "Klausur Termin Mathematik"),
+]
+
+
+def test_rerank_orders_by_score_and_truncates():
+    predict = _CountingPredictor()
+    top = rerank("klausur termin programmieren", CANDIDATES, top_k=2, predict=predict, cache=ScoreCache())
+    assert [CANDIDATES[i][0] for i, _ in top] == ["b", "d"]
+    assert top[0][1] > top[1][1]
+    assert len(predict.batches) == 1 and len(predict.batches[0]) == len(CANDIDATES)
+
+
+def test_cached_pairs_are_not_rescored():
+    predict, cache = _CountingPredictor(), ScoreCache()
+    score("klausur termin", CANDIDATES[:2], predict=predict, cache=cache)
+    score("klausur termin", CANDIDATES, predict=predict, cache=cache)
+    assert [len(b) for b in predict.batches] == [2, 2]
+    assert cache.hits == 2
+    score("klausur termin", CANDIDATES, predict=predict, cache=cache)
+    assert len(predict.batches) == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ScoreCache(maxsize=2)
+    cache.put(("q", "a"), 1.0)
+    cache.put(("q", "b"), 2.0)
+    assert cache.get(("q", "a")) == 1.0
+    cache.put(("q", "c"), 3.0)
+    assert cache.get(("q", "b")) is None
+    assert cache.get(("q", "a")) == 1.0 and len(cache) == 2
+
+
+def test_rerank_empty_candidates():
+    assert rerank("egal", [], predict=_CountingPredictor(), cache=ScoreCache()) == []
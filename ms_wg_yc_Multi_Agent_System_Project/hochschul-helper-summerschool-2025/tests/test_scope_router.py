@@ -0,0 +1,68 @@
+"""Tests for the local search-scope classifier."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.tools import scope_router
+
+
+def _fake_embed(texts):
+    """Bag-of-keywords embedding: one dimension per scope-typical word."""
+    vocab = ["fachschaft", "altklausuren", "urlaubssemester", "semester", "mensa", "zimmer"]
+    return [[1.0 if word in t.lower() else 0.0 for word in vocab] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    scope_router.reset_routing_stats()
+    yield
+    scope_router.reset_routing_stats()
+
+
+@pytest.mark.parametrize(
+    "query, scope",
+    [
+        ("Wann beginnt die O-Phase?", "fachschaft"),
+        ("Öffnungszeiten Studierendensekretariat", "hka"),
+        ("Welche Linie der KVV fährt zum Campus?", "general"),
+    ],
+)
+def test_rules_decide_obvious_queries(query, scope):
+    decision = scope_router.classify_scope(query, use_embeddings=False)
+    assert decision == {"scope": scope, "normalized_query": query, "stage": "rule"}
+
+
+def test_conflicting_keywords_are_uncertain():
+    assert scope_router.classify_scope("Fachschaft oder Prüfungsamt?", use_embeddings=False) is None
+
+
+def test_route_scope_falls_back_to_llm_and_counts():
+    calls = []
+
+    def llm_router(q):
+        calls.append(q)
+        return {"scope": "general", "normalized_query": q}
+
+    assert scope_router.route_scope("Fachschaft", llm_router, use_embeddings=False)["scope"] == "fachschaft"
+    assert scope_router.route_scope("Was ist los?", llm_router, use_embeddings=False)["scope"] == "general"
+
+    assert calls == ["Was ist los?"]
+    stats = scope_router.get_routing_stats()
+    assert stats["rule"] == 1
+    assert stats["llm_fallback"] == 1
+    assert stats["fallback_rate"] == pytest.approx(0.5)
+
+
+def test_embedding_stage_uses_exemplar_similarity():
+    decision = scope_router.classify_scope("Urlaubssemester beantragen", embed=_fake_embed)
+    assert decision == {"scope": "hka", "normalized_query": "Urlaubssemester beantragen", "stage": "embedding"}
+
+    assert scope_router.classify_scope("Gibt es noch freie Plätze?", embed=_fake_embed) is None
+
+
+def test_embedding_failure_is_treated_as_uncertain():
+    def broken(_texts):
+        raise RuntimeError("no model")
+
+    assert scope_router.classify_scope("Irgendwas Unklares", embed=broken) is None
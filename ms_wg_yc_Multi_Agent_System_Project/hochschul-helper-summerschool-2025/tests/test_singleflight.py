@@ -0,0 +1,71 @@
+"""Tests for single-flight request coalescing."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.conversation import looks_like_follow_up
+from src.utils.singleflight import SingleFlight
+
+
+def _slow(calls, release, value="antwort"):
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return {"answer": value, "citations": []}
+
+    return fn
+
+
+def _run_concurrently(flight, key_fn, n, release):
+    """Startet n Aufrufe und gibt die Leader erst frei, wenn alle angekommen sind."""
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(key_fn, i) for i in range(n)]
+        deadline = time.monotonic() + 2
+        while flight.stats["executed"] + flight.stats["shared"] < n and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+    return futures
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight, calls, release = SingleFlight(), [], threading.Event()
+    fn = _slow(calls, release)
+    futures = _run_concurrently(flight, lambda i: flight.do(("wann ist mathe", "shared"), fn), 8, release)
+    results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert flight.stats == {"executed": 1, "shared": 7}
+    assert all(r == {"answer": "antwort", "citations": []} for r in results)
+    assert len({id(r) for r in results}) == 8  # jeder Aufrufer bekommt eine eigene Kopie
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_run_separately():
+    flight, calls, release = SingleFlight(), [], threading.Event()
+    fn = _slow(calls, release)
+    futures = _run_concurrently(flight, lambda i: flight.do((f"frage {i % 2}", "shared"), fn), 4, release)
+    [f.result() for f in futures]
+    assert len(calls) == 2
+
+
+def test_exception_is_shared_and_nothing_is_cached():
+    flight, release = SingleFlight(), threading.Event()
+
+    def boom():
+        release.wait(2)
+        raise RuntimeError("LLM down")
+
+    futures = _run_concurrently(flight, lambda i: flight.do("k", boom), 3, release)
+    for f in futures:
+        with pytest.raises(RuntimeError, match="LLM down"):
+            f.result()
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+@pytest.mark.parametrize("msg, expected", [("und am Dienstag?", True), ("Wann ist die Mathe-Vorlesung?", False)])
+def test_follow_ups_are_not_coalesced_across_sessions(msg, expected):
+    assert looks_like_follow_up(msg) is expected
@@ -0,0 +1,55 @@
+"""Tests for the text helpers in src.utils.text."""
+
+from __future__ import annotations
+
+from src.utils.text import content_hash, count_tokens, dedupe_results, normalize_url, pack_context, timetable_chunk_id, truncate_to_tokens
+
+
+def test_normalize_url_ignores_tracking_fragment_and_trailing_slash():
+    assert normalize_url("https://WWW.H-KA.de/studium/?utm_source=x#top") == normalize_url("https://www.h-ka.de/studium")
+
+
+def test_content_hash_ignores_case_and_whitespace():
+    assert content_hash("Die  O-Phase\nbeginnt") == content_hash("die o-phase beginnt")
+
+
+def test_dedupe_results_by_url_and_content():
+    results = [
+        {"url": "https://www.h-ka.de/a", "content": "Rückmeldung bis 15.01.", "scope": "hka"},
+        {"url": "https://www.h-ka.de/a/", "content": "anderer Text", "scope": "general"},
+        {"url": "https://mirror.example/a", "content": "Rückmeldung  bis 15.01.", "scope": "general"},
+        {"url": "https://iwi-hka.de/ophase", "content": "O-Phase", "scope": "fachschaft"},
+    ]
+    unique = dedupe_results(results)
+    assert [r["url"] for r in unique] == ["https://www.h-ka.de/a", "https://iwi-hka.de/ophase"]
+
+
+def test_pack_context_respects_budget_and_drops_near_duplicates():
+    sentence = "Die Prüfung findet im Raum E-201 statt. "
+    chunks = [
+        {"text": sentence * 10, "score": 0.4, "id": "low"},
+        {"text": "Modul INFB-120 hat 5 ECTS. " * 5, "score": 0.9, "id": "top"},
+        {"text": "Modul INFB-120  hat 5 ECTS. " * 5, "score": 0.8, "id": "dup"},
+    ]
+    packed = pack_context(chunks, token_budget=count_tokens(chunks[1]["text"]) + 45, min_tail_tokens=10)
+
+    assert [c["id"] for c in packed] == ["top", "low"]
+    assert sum(count_tokens(c["text"]) for c in packed) <= count_tokens(chunks[1]["text"]) + 45
+    assert packed[1]["text"].endswith("statt.")
+
+
+def test_pack_context_keeps_order_without_scores():
+    chunks = [{"text": "Erster Treffer."}, {"text": "Zweiter Treffer."}]
+    assert [c["text"] for c in pack_context(chunks, token_budget=100)] == ["Erster Treffer.", "Zweiter Treffer."]
+
+
+def test_truncate_to_tokens_cuts_at_sentence_boundary():
+    text = "Satz eins ist kurz. Satz zwei ist deutlich länger als der erste Satz."
+    assert truncate_to_tokens(text, count_tokens("Satz eins ist kurz.") + 1) == "Satz eins ist kurz."
+
+
+def test_timetable_chunk_id_is_stable_and_content_addressed():
+    cid = timetable_chunk_id("INFB.1.html", 0, "Mathe 1 Mo 09:45")
+    assert cid == timetable_chunk_id("INFB.1.html", 0, "Mathe 1 Mo 09:45")
+    assert cid.startswith("INFB.1.html:0:") and len(cid.rsplit(":", 1)[1]) == 12
+    assert cid != timetable_chunk_id("INFB.1.html", 0, "Mathe 1 Di 09:45")
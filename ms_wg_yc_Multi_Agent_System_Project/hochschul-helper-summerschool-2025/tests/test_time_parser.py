@@ -0,0 +1,137 @@
+"""Tests for the deterministic DE/EN time-expression parser used before the calendar LLM."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from src.utils.time_parser import (
+    parse_clock,
+    parse_shift,
+    parse_target,
+    parse_time_hints,
+    parse_time_range,
+    postpone_delta,
+    resolve_datetime,
+    resolve_event_time,
+)
+
+NOW = datetime(2025, 1, 20, 8, 0)  # Montag
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("verschiebe Mathe um 2h später", timedelta(hours=2)),
+        ("postpone the meeting by 1.5 hours", timedelta(minutes=90)),
+        ("um 1,5 Stunden nach hinten", timedelta(minutes=90)),
+        ("um anderthalb Stunden", timedelta(minutes=90)),
+        ("an hour and a half later", timedelta(minutes=90)),
+        ("1h30 später", timedelta(minutes=90)),
+        ("um 2 Stunden 15 Minuten", timedelta(hours=2, minutes=15)),
+        ("eine halbe Stunde früher", -timedelta(minutes=30)),
+        ("move it 45 min earlier", -timedelta(minutes=45)),
+        ("Vorlesung um eine Woche verschieben", timedelta(weeks=1)),
+        ("push by a day", timedelta(days=1)),
+    ],
+)
+def test_parse_shift(query, expected):
+    assert parse_shift(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["verschiebe Mathe auf 14 Uhr", "move the lecture to 3pm", "verschiebe den Termin", "verschiebe das 2h-Meeting auf 15 Uhr"],
+)
+def test_clock_times_are_not_shifts(query):
+    assert parse_shift(query) is None
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Zahnarzt nächsten Montag 9:00", datetime(2025, 1, 27, 9, 0)),
+        ("morgen um 14 Uhr", datetime(2025, 1, 21, 14, 0)),
+        ("übermorgen halb 10", datetime(2025, 1, 22, 9, 30)),
+        ("am 24.01. um 10:15", datetime(2025, 1, 24, 10, 15)),
+        ("next friday 2pm", datetime(2025, 1, 24, 14, 0)),
+        ("nächste Woche Dienstag", datetime(2025, 1, 28)),
+        ("2025-03-01 8 uhr", datetime(2025, 3, 1, 8, 0)),
+        ("um 7:00", datetime(2025, 1, 21, 7, 0)),  # heute schon vorbei → morgen
+    ],
+)
+def test_resolve_datetime(query, expected):
+    assert resolve_datetime(query, NOW) == expected
+
+
+def test_unparsed_phrase_returns_none():
+    assert resolve_datetime("irgendwann nach der Klausur", NOW) is None
+
+
+def test_target_ignores_time_of_the_original_event():
+    assert parse_target("verschiebe das Meeting am Montag auf Mittwoch 14 Uhr", NOW) == (date(2025, 1, 22), time(14, 0))
+
+
+def test_postpone_delta_keeps_missing_parts_of_original_start():
+    start = datetime(2025, 1, 21, 10, 0, tzinfo=timezone(timedelta(hours=1)))
+    assert postpone_delta("verschiebe Mathe auf Freitag", start, NOW) == timedelta(days=3)
+    assert postpone_delta("verschiebe Mathe auf 11:30", start, NOW) == timedelta(minutes=90)
+    assert postpone_delta("Mathe um 30 Minuten früher", start, NOW) == -timedelta(minutes=30)
+    assert postpone_delta("verschiebe Mathe bitte", start, NOW) is None
+
+
+def test_postpone_to_next_week_keeps_weekday_and_time():
+    start = datetime(2025, 1, 21, 10, 0)  # Dienstag
+    assert postpone_delta("verschiebe Mathe auf nächste Woche", start, NOW) == timedelta(days=7)
+    assert postpone_delta("verschiebe Mathe auf nächste Woche Donnerstag", start, NOW) == timedelta(days=9)
+
+
+def test_duration_in_the_title_is_not_a_shift():
+    start = datetime(2025, 1, 21, 10, 0)
+    assert postpone_delta("verschiebe das 2h-Meeting auf 15 Uhr", start, NOW) == timedelta(hours=5)
+    assert postpone_delta("verschiebe das 2h-Meeting um 30 Minuten", start, NOW) == timedelta(minutes=30)
+
+
+def test_time_hints_collect_all_mentions():
+    hints = parse_time_hints("lösche den Termin am Mittwoch um 10 Uhr am 22.01.", NOW)
+    assert hints.dates == [date(2025, 1, 22)] and hints.weekdays == [2] and hints.times == [(10, 0)]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Trag mir morgen um 8 ein Treffen ein", (datetime(2025, 1, 21, 8, 0), None)),
+        ("Termin morgen von 14 bis 16 Uhr", (datetime(2025, 1, 21, 14, 0), datetime(2025, 1, 21, 16, 0))),
+        ("Termin am Freitag 14–16 Uhr", (datetime(2025, 1, 24, 14, 0), datetime(2025, 1, 24, 16, 0))),
+        ("meeting tomorrow 2-4pm", (datetime(2025, 1, 21, 14, 0), datetime(2025, 1, 21, 16, 0))),
+        ("tomorrow at 8 am", (datetime(2025, 1, 21, 8, 0), None)),
+        ("Zahnarzt morgen um 10 für 90 Minuten", (datetime(2025, 1, 21, 10, 0), datetime(2025, 1, 21, 11, 30))),
+        ("Trag die Vorlesung Mathe 1 am Montag ein", None),  # "1 am" ist kein a.m., keine Uhrzeit
+        ("Vorlesungen für nächste Woche", None),
+        ("morgen ein Treffen", None),
+    ],
+)
+def test_resolve_event_time_needs_date_and_explicit_clock(query, expected):
+    assert resolve_event_time(query, NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("Freitag 10:30 am", time(10, 30)), ("Montag 8am", time(8, 0)), ("Mathe 1 am Montag", None), ("um 2 Stunden", None)],
+)
+def test_german_am_is_not_a_clock(query, expected):
+    assert parse_clock(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [("14–16 Uhr", (time(14, 0), time(16, 0))), ("11-1pm", (time(11, 0), time(13, 0))), ("10:00-11:30", (time(10, 0), time(11, 30))), ("2-3 Stunden", None)],
+)
+def test_parse_time_range(query, expected):
+    assert parse_time_range(query) == expected
+
+
+def test_lecture_number_before_am_is_no_time_hint():
+    hints = parse_time_hints("lösche Mathe 1 am Montag", NOW)
+    assert hints.weekdays == [0] and hints.times == []
@@ -0,0 +1,126 @@
+"""Runs the timetable crawler against the static fixture site in tests/fixtures/raumzeit."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("playwright")
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE_URL = (Path(__file__).parent / "fixtures" / "raumzeit" / "timetables.html").as_uri()
+
+
+def _load_crawler():
+    spec = importlib.util.spec_from_file_location("time_table_crawler", ROOT / "scripts" / "time_table_crawler.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _chromium_available() -> bool:
+    from playwright.async_api import async_playwright
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            await browser.close()
+        return True
+    except Exception:  # browser binaries missing (uv run playwright install)
+        return False
+
+
+def test_crawler_saves_every_combination_concurrently(tmp_path):
+    if not asyncio.run(_chromium_available()):
+        pytest.skip("Chromium not installed for Playwright")
+    crawler = _load_crawler()
+    results = asyncio.run(crawler.scrape_all_departments(FIXTURE_URL, str(tmp_path), concurrency=2))
+
+    expected = {
+        ("Informatik", "Informatik (B)", "INFB.1"),
+        ("Informatik", "Informatik (B)", "INFB.2"),
+        ("Informatik", "Informatik (M)", "INFM.1"),
+        ("Wirtschaft", "Wirtschaftsinformatik (B)", "WIIB.1"),
+    }
+    assert set(results) == expected
+    for dept, cost, sem in expected:
+        html = (tmp_path / crawler.timetable_filename(dept, cost, sem)).read_text(encoding="utf-8")
+        assert f"{dept} | {cost} | {sem}" in html
+
+
+def test_second_crawl_rewrites_nothing(tmp_path):
+    if not asyncio.run(_chromium_available()):
+        pytest.skip("Chromium not installed for Playwright")
+    crawler = _load_crawler()
+    asyncio.run(crawler.scrape_all_departments(FIXTURE_URL, str(tmp_path), concurrency=2))
+    mtimes = {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.html")}
+
+    asyncio.run(crawler.scrape_all_departments(FIXTURE_URL, str(tmp_path), concurrency=2))
+    assert {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.html")} == mtimes
+    assert len(json.loads((tmp_path / "_changes.json").read_text(encoding="utf-8"))["changed"]) == 4
+
+
+class _FlakyPage:
+    """Stand-in page whose navigation fails the first `failures` times."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.gotos = 0
+
+    async def goto(self, url, **kwargs):
+        self.gotos += 1
+        if self.gotos <= self.failures:
+            raise TimeoutError("navigation timeout")
+
+
+class _FakeBrowser:
+    def __init__(self, page):
+        self.page = page
+
+    async def new_context(self):
+        page = self.page
+
+        class _Context:
+            async def new_page(self):
+                return page
+
+            async def close(self):
+                pass
+
+        return _Context()
+
+
+def test_open_retries_with_backoff_then_gives_up(monkeypatch):
+    crawler = _load_crawler()
+    opened = []
+
+    async def fake_open(page, url):
+        await page.goto(url)
+        opened.append(url)
+
+    monkeypatch.setattr(crawler, "_open_timetables", fake_open)
+    assert asyncio.run(crawler._open_with_retry(_FlakyPage(2), "u", 0, retries=2, backoff_s=0))
+    assert not asyncio.run(crawler._open_with_retry(_FlakyPage(5), "u", 0, retries=2, backoff_s=0))
+    assert opened == ["u"]
+
+
+def test_worker_that_cannot_open_leaves_jobs_and_does_not_raise(monkeypatch, tmp_path):
+    crawler = _load_crawler()
+
+    async def fake_open(page, url):
+        await page.goto(url)
+
+    monkeypatch.setattr(crawler, "_open_timetables", fake_open)
+    monkeypatch.setattr(crawler, "OPEN_BACKOFF_S", 0)
+
+    async def run():
+        queue = asyncio.Queue()
+        queue.put_nowait((0, "Informatik", 0, "Informatik (B)", 0, "INFB.1"))
+        await crawler._crawl_worker(0, _FakeBrowser(_FlakyPage(99)), "u", queue, str(tmp_path), [], {}, [], [])
+        return queue.qsize()
+
+    assert asyncio.run(run()) == 1
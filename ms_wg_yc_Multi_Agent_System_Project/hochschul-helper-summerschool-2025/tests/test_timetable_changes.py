@@ -0,0 +1,33 @@
+"""Tests for the incremental crawl manifest and change list."""
+
+from __future__ import annotations
+
+from src.tools import timetable_changes as tc
+
+PAGE = '<html><input name="javax.faces.ViewState" value="{state}"><script>var t={state};</script><td>Mathe 08:00 - 09:30</td></html>'
+
+
+def test_page_hash_ignores_view_state_and_scripts():
+    assert tc.page_hash(PAGE.format(state="111")) == tc.page_hash(PAGE.format(state="222"))
+    assert tc.page_hash(PAGE.format(state="1")) != tc.page_hash(PAGE.format(state="1").replace("Mathe", "Physik"))
+
+
+def test_record_page_skips_unchanged_pages(tmp_path):
+    manifest = {}
+    assert tc.record_page(manifest, tmp_path, "A.html", PAGE.format(state="1"), semester="INFB.1") is True
+    assert tc.record_page(manifest, tmp_path, "A.html", PAGE.format(state="2"), semester="INFB.1") is False
+    assert (tmp_path / "A.html").read_text(encoding="utf-8") == PAGE.format(state="1")
+
+    tc.save_manifest(tmp_path, manifest)
+    assert tc.load_manifest(tmp_path)["A.html"]["semester"] == "INFB.1"
+
+
+def test_change_list_accumulates_until_cleared(tmp_path):
+    assert tc.read_changes(tmp_path) is None
+    tc.merge_changes(tmp_path, ["A.html", "B.html"], [])
+    pending = tc.merge_changes(tmp_path, ["C.html"], ["B.html"])
+    assert pending == {"changed": ["A.html", "C.html"], "removed": ["B.html"]}
+    assert tc.read_changes(tmp_path) == pending
+
+    tc.clear_changes(tmp_path)
+    assert tc.read_changes(tmp_path) is None
@@ -0,0 +1,81 @@
+"""Tests for the structured timetable index."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.tools import timetable_index as ti
+
+ENTRIES = [
+    {"course": "Mathematik 1", "weekday": 0, "start": "08:00", "end": "09:30", "room": "E-201", "lecturer": "Prof. Dr. Müller",
+     "faculty": "IWI", "major": "INFB", "semester": "1", "source_file": "IWI-INFB-1.html"},
+    {"course": "Mathematik 1", "weekday": 2, "start": "11:30", "end": "13:00", "room": "E-201", "lecturer": "Prof. Dr. Müller",
+     "faculty": "IWI", "major": "INFB", "semester": "1", "source_file": "IWI-INFB-1.html"},
+    {"course": "Programmieren 1", "weekday": 1, "start": "09:45", "end": "11:15", "room": "LI-137", "lecturer": "",
+     "faculty": "IWI", "major": "INFB", "semester": "1", "source_file": "IWI-INFB-1.html"},
+]
+
+
+@pytest.fixture()
+def db(tmp_path):
+    path = tmp_path / "timetables.sqlite"
+    ti.write_entries(ENTRIES, path)
+    return path
+
+
+def test_parse_entry_text():
+    entry = ti.parse_entry_text("08:00 - 09:30\nMathematik 1\nE-201\nProf. Dr. Müller")
+    assert entry == {"start": "08:00", "end": "09:30", "course": "Mathematik 1", "room": "E-201", "lecturer": "Prof. Dr. Müller"}
+    assert ti.parse_entry_text("Kein Termin") is None
+
+
+def test_parse_weekday_only_accepts_abbreviations_when_asked():
+    assert ti.parse_weekday("Was ist am Dienstag?") == 1
+    assert ti.parse_weekday("Wo ist das?") is None
+    assert ti.parse_weekday("Do", allow_abbrev=True) == 3
+
+
+def test_lookup_finds_course_and_weekday(db):
+    hits = ti.lookup("HKA Stundenplan Termine Veranstaltungen: Wann ist Mathe am Mittwoch?", db_path=db)
+    assert [(h["course"], h["weekday"], h["start"]) for h in hits] == [("Mathematik 1", 2, "11:30")]
+
+    hits = ti.lookup("Wo findet Programmieren statt?", db_path=db)
+    assert [h["room"] for h in hits] == ["LI-137"]
+
+    assert ti.lookup("Wann ist Chemie?", db_path=db) == []
+
+
+def test_write_entries_replaces_rows_per_source_file(db):
+    ti.write_entries(ENTRIES[:1], db)
+    assert len(ti.query_entries(db_path=db)) == 1
+    ti.write_entries([], db, source_files=["IWI-INFB-1.html"])
+    assert ti.query_entries(db_path=db) == []
+
+
+def test_format_entries_is_deterministic(db):
+    text = ti.format_entries(ti.query_entries("Programmieren 1", db_path=db))
+    assert "Programmieren 1: Dienstag, 09:45–11:15 Uhr, Raum LI-137" in text
+    assert text.endswith("Quelle(n): IWI-INFB-1.html")
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Wann hat INFB 3 Mathe?", {"semester": "INFB.3"}),
+        ("Stundenplan INFB3", {"semester": "INFB.3"}),
+        ("Vorlesungen INFB im 3. Semester", {"semester": "INFB.3"}),
+        ("Was hat INFB am Montag?", {"semester": {"$in": ["INFB.1", "INFB.3"]}}),
+        ("HKA Stundenplan: Wann ist Mathe?", {}),
+        ("wann hat infb 3 mathe?", {"semester": "INFB.3"}),
+        ("Stundenplan Infb3", {"semester": "INFB.3"}),
+        ("was hat infb am montag?", {"semester": {"$in": ["INFB.1", "INFB.3"]}}),
+        ("Wann ist die 3. Vorlesung?", {}),
+    ],
+)
+def test_extract_timetable_filters(query, expected):
+    assert ti.extract_timetable_filters(query, ["INFB.1", "INFB.3", "ARTB.1"]) == expected
+
+
+def test_lower_case_codes_need_known_semesters():
+    assert ti.extract_timetable_filters("INFB 3") == {"semester": "INFB.3"}
+    assert ti.extract_timetable_filters("wann ist die 3 Vorlesung") == {}
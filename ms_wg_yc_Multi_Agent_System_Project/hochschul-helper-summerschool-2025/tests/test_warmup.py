@@ -0,0 +1,62 @@
+"""Tests for the warm-up sequence and the readiness signal."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src import warmup
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    warmup.reset()
+    yield
+    warmup.reset()
+
+
+def test_ready_only_after_all_steps_ran():
+    calls = []
+
+    def step(name):
+        def run():
+            assert not warmup.is_ready()
+            calls.append(name)
+
+        return run
+
+    assert warmup.readiness()["ready"] is False
+    report = warmup.warm_up({"embedder": step("embedder"), "llm_connection": step("llm_connection")})
+    assert calls == ["embedder", "llm_connection"]
+    assert warmup.is_ready() and warmup.readiness()["ok"]
+    assert set(report) == {"embedder", "llm_connection"}
+
+
+def test_failed_step_is_reported_but_does_not_block_readiness():
+    def broken():
+        raise RuntimeError("no service account")
+
+    warmup.warm_up({"calendar": broken, "embedder": lambda: None})
+    status = warmup.readiness()
+    assert status["ready"] and not status["ok"]
+    assert status["steps"]["calendar"]["status"] == "error"
+    assert "no service account" in status["steps"]["calendar"]["error"]
+    assert status["steps"]["embedder"]["status"] == "ok"
+
+
+def test_background_warm_up_runs_once_and_signals_waiters():
+    gate = threading.Event()
+    runs = []
+
+    def slow():
+        gate.wait(5)
+        runs.append(1)
+
+    thread = warmup.start_background_warm_up({"slow": slow})
+    warmup.start_background_warm_up({"slow": slow})
+    assert not warmup.wait_until_ready(timeout=0.05)
+    gate.set()
+    assert warmup.wait_until_ready(timeout=5)
+    thread.join(5)
+    assert runs == [1]